@@ -1,202 +1,333 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-from ingredient_api import load_database, merge_ewg_data
+from app_logging import configure_logging, get_logger, request_id, start_request
+# Before the imports below, which log while loading the database
+configure_logging()
+from ingredient_api import refresh_worker, resolver, snapshots, store
 from ml_classifier import IngredientMLClassifier
+from ocr_pool import OCRPool, OCRBusy, OCRTimeout
+from ocr_cache import OCRCache
+from ingredient_region import OCR_MODES
+from ingredient_tokenizer import (extract_ingredients, iter_label_ingredients,
+                                  normalize_ingredients, unique_ingredients)
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import os
-from PIL import Image
-import pytesseract
-import io
-import traceback
-import re
+import copy
+import json
+
+logger = get_logger(__name__)
 
 app = Flask(__name__, static_folder='../frontend')
 CORS(app)
 
-# Get the absolute path to the database file
-DB_PATH = os.path.join(os.path.dirname(__file__), 'toxic_chemicals_database.json')
+@app.before_request
+def assign_request_id():
+    """Tag log lines of this request, reusing the caller's X-Request-ID if sent."""
+    start_request(request.headers.get('X-Request-ID'))
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = request_id.get()
+    return response
 
 # Load database
-print("Loading database from:", DB_PATH)
-harmful_ingredients, safe_alternatives, toxicity_categories = load_database()
+logger.info("Loading database from: %s", store.path)
+snapshot = snapshots.current
+harmful_ingredients, safe_alternatives, toxicity_categories = (
+    snapshot.harmful_ingredients, snapshot.safe_alternatives, snapshot.toxicity_categories
+)
 
 # Initialize ML classifier with database
-ml_classifier = IngredientMLClassifier(harmful_ingredients, safe_alternatives)
-print("Training ML model...")
-if not ml_classifier.train():
-    print("Failed to train ML model")
+ml_classifier = IngredientMLClassifier(harmful_ingredients, safe_alternatives, resolver=resolver, store=store)
+logger.info("Loading ML model...")
+if not ml_classifier.load_or_train():
+    logger.error("Failed to load ML model")
+
+def apply_database_snapshot(snapshot):
+    """Swap a reloaded database into the app and classifier.
+    
+    Runs on the reload thread. The classifier is copied rather than
+    modified, so requests in flight keep a consistent model. Training is
+    too heavy for the serving process: if the training data changed, only
+    artifacts already trained for it (by `python ml_classifier.py train`)
+    are loaded, and until then the previous model keeps serving.
+    """
+    global harmful_ingredients, safe_alternatives, toxicity_categories, ml_classifier
+    if ml_classifier.model_fingerprint == ml_classifier.fingerprint():
+        classifier = copy.copy(ml_classifier)
+        classifier.harmful_ingredients = snapshot.harmful_ingredients
+        classifier.safe_alternatives = snapshot.safe_alternatives
+    else:
+        classifier = IngredientMLClassifier(snapshot.harmful_ingredients, snapshot.safe_alternatives,
+                                            resolver=resolver, store=store)
+        if not classifier.load():
+            logger.warning("ML model is out of date for the reloaded database, keeping the "
+                           "previous one; run `python ml_classifier.py train` to retrain it")
+            classifier = ml_classifier
+    
+    harmful_ingredients, safe_alternatives, toxicity_categories = (
+        snapshot.harmful_ingredients, snapshot.safe_alternatives, snapshot.toxicity_categories
+    )
+    ml_classifier = classifier
+
+snapshots.subscribe(apply_database_snapshot)
+snapshots.start()
+
+# Start periodic database update in the background
+logger.info("Starting periodic database update...")
+refresh_worker.start()
+
+# OCR runs in a bounded process pool instead of on the request threads
+ocr_pool = OCRPool(
+    max_workers=int(os.environ.get('OCR_WORKERS', 0)) or None,
+    max_queue=int(os.environ['OCR_QUEUE_SIZE']) if 'OCR_QUEUE_SIZE' in os.environ else None,
+    timeout=float(os.environ.get('OCR_TIMEOUT', 30))
+)
+
+# Image preprocessing preset applied before OCR (see image_preprocessing.PRESETS)
+OCR_PRESET = os.environ.get('OCR_PRESET', 'default')
+
+# 'full' OCRs the whole photo, 'ingredients' only the ingredient list;
+# clients can override it per request with a "mode" form field
+OCR_MODE = os.environ.get('OCR_MODE', 'full')
+
+# Repeat uploads of the same photo skip OCR; OCR_CACHE_DIR adds a disk tier
+ocr_cache = OCRCache(
+    maxsize=int(os.environ.get('OCR_CACHE_SIZE', 512)),
+    ttl=float(os.environ.get('OCR_CACHE_TTL', 0)) or None,
+    directory=os.environ.get('OCR_CACHE_DIR') or None
+)
 
-# Start periodic database update
-print("Starting periodic database update...")
-merge_ewg_data()
+def ocr_image(image_bytes, mode=OCR_MODE):
+    """OCR image bytes through the cache and the OCR pool."""
+    key = ocr_cache.key(image_bytes, OCR_PRESET, mode=mode)
+    text = ocr_cache.get(key)
+    if text is None:
+        text = ocr_pool.extract(image_bytes, OCR_PRESET, '', mode)
+        ocr_cache.set(key, text)
+    return text
 
-def extract_text_from_image(image_file):
+def extract_text_from_image(image_file, mode=OCR_MODE):
+    """OCR an uploaded image; OCRBusy and OCRTimeout are left to the caller."""
     try:
-        # Read image
-        image = Image.open(io.BytesIO(image_file.read()))
-        
-        # Perform OCR
-        text = pytesseract.image_to_string(image)
-        return text.strip()
+        return ocr_image(image_file.read(), mode)
+    except (OCRBusy, OCRTimeout):
+        raise
     except Exception as e:
-        print(f"Error extracting text: {e}")
+        logger.error("Error extracting text: %s", e)
         return None
 
+def ocr_unavailable_response(error):
+    """429 with Retry-After when the OCR queue is full, 504 on timeout."""
+    if isinstance(error, OCRBusy):
+        response = jsonify({'error': 'Server is busy, please retry shortly',
+                            'retry_after': error.retry_after})
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response, 429
+    return jsonify({'error': 'Text extraction timed out'}), 504
+
 def extract_ingredients_from_text(text):
     """Extract only valid ingredients from text."""
-    # Common non-ingredient words and invalid patterns
-    non_ingredients = {
-        # Common text patterns
-        'ingredients', 'contains', 'may', 'manufactured', 'facility', 'warning',
-        'directions', 'use', 'caution', 'storage', 'keep', 'away', 'children',
-        'safety', 'sealed', 'made', 'distributed', 'product', 'contact', 'email',
-        'website', 'address', 'phone', 'www', 'com', 'road', 'street', 'ltd',
-        'inc', 'limited', 'corporation',
-        
-        # Locations and addresses
-        'avenue', 'boulevard', 'lane', 'drive', 'place', 'court', 'circle',
-        'suite', 'floor', 'unit', 'building', 'block',
-        
-        # Common business terms
-        'company', 'industries', 'enterprises', 'group', 'international',
-        'worldwide', 'global', 'solutions', 'services',
+    return extract_ingredients(text)
+
+def resolve_ingredients(ingredients):
+    """Pair each ingredient with its resolver match."""
+    for ingredient in ingredients:
+        yield ingredient, resolver.resolve(ingredient)
+
+def build_verdict(ingredient, resolution):
+    """Turn a resolver match into the result shown for one ingredient."""
+    # Check known safe ingredients
+    if resolution['source'] == 'known_safe':
+        safe_info = resolution['safe_info']
+        return {
+            'ingredient': ingredient,
+            'is_harmful': False,
+            'confidence': 1.0,
+            'category': 'safe ingredients',
+            'chemical_score': 0,
+            'benefits': safe_info['benefits'],
+            'common_uses': safe_info['common_uses'],
+            'safety_notes': safe_info['safety_notes'],
+            'research_links': {
+                'pubchem': f'https://pubchem.ncbi.nlm.nih.gov/#query={ingredient}',
+                'cosing': f'https://ec.europa.eu/growth/tools-databases/cosing/index.cfm?fuseaction=search.results&search={ingredient}'
+            }
+        }
         
-        # Contact information
-        'tel', 'telephone', 'fax', 'email', 'website', 'customer', 'service',
-        'support', 'help', 'info', 'contact', 'us',
+    # Check against harmful database
+    if resolution['source'] == 'database':
+        info = resolution['info']
+        is_truly_harmful = info['score'] >= 7
         
-        # Measurements and quantities
-        'mg', 'ml', 'oz', 'gram', 'percent', 'daily', 'value',
+        return {
+            'ingredient': ingredient,
+            'is_harmful': is_truly_harmful,
+            'confidence': 1.0,
+            'category': info.get('categories', ['Unknown'])[0],
+            'chemical_score': info.get('score', 5),
+            'concerns': info.get('concerns', []) if is_truly_harmful else [],
+            'found_in': info.get('found_in', []),
+            'alternatives': get_safe_alternatives(ingredient) if is_truly_harmful else [],
+            'research_links': get_research_links(ingredient)
+        }
         
-        # Other non-ingredient terms
-        'best', 'before', 'date', 'batch', 'lot', 'number', 'expiry',
-        'expires', 'manufactured', 'date', 'packaging'
+    # For unknown ingredients, provide research links instead of AI warning
+    return {
+        'ingredient': ingredient,
+        'is_harmful': False,  # Default to safe if unknown
+        'confidence': 0.7,
+        'category': 'Unknown',
+        'research_links': {
+            'pubchem': f'https://pubchem.ncbi.nlm.nih.gov/#query={ingredient}',
+            'cosing': f'https://ec.europa.eu/growth/tools-databases/cosing/index.cfm?fuseaction=search.results&search={ingredient}',
+            'google_scholar': f'https://scholar.google.com/scholar?q={ingredient}+cosmetic+safety',
+            'fda': f'https://www.fda.gov/search?s={ingredient}',
+            'inci': f'https://incidecoder.com/ingredients/{ingredient.replace(" ", "-")}'
+        },
+        'note': 'Please check official sources for detailed information about this ingredient.'
     }
-    
-    # Split by common separators and clean
-    parts = re.split(r'[,;:()\[\]]', text.lower())
-    
-    ingredients = []
-    for part in parts:
-        # Clean the text
-        cleaned = part.strip()
-        words = cleaned.split()
-        
-        # Skip invalid entries
-        if any([
-            not cleaned,  # Empty string
-            not words,  # Empty word list
-            len(cleaned) <= 1,  # Single characters
-            cleaned.isdigit(),  # Just numbers
-            len(words) > 4,  # Too many words (likely not an ingredient)
-            '@' in cleaned,  # Email addresses
-            'www.' in cleaned,  # Websites
-            '.com' in cleaned,  # Websites
-            cleaned.startswith('http'),  # URLs
-            re.match(r'^[0-9-+()]+$', cleaned),  # Phone numbers
-            re.match(r'^[0-9]+[A-Za-z\s]', cleaned),  # Street numbers
-            re.match(r'.*\d+.*', cleaned),  # Contains numbers
-            any(word in non_ingredients for word in words),  # Contains non-ingredient words
-            any(word.endswith(('road', 'street', 'ave', 'lane', 'dr', 'blvd')) for word in words),  # Addresses
-            any(len(word) == 1 for word in words),  # Single letter words
-            any(word.isupper() and len(word) > 2 for word in words)  # Acronyms/abbreviations
-        ]):
-            continue
-            
-        # Additional validation for ingredient-like words
-        if all([
-            not re.match(r'^[0-9%]+$', cleaned),  # Not just numbers and percentages
-            not any(char.isdigit() for char in cleaned),  # No digits
-            len(cleaned) > 2,  # More than 2 characters
-            not any(cleaned.startswith(prefix) for prefix in ['tel:', 'fax:', 'email:', 'http']),  # Not contact info
-        ]):
-            ingredients.append(cleaned)
-    
-    return ingredients
 
-def analyze_ingredients(text):
+def iter_analysis(text):
+    """Yield one verdict per distinct ingredient as soon as it is resolved.
+
+    Pipeline: tokenize -> normalize -> dedupe -> resolve -> enrich.
+    """
     if not text:
-        return []
-    
-    ingredients = extract_ingredients_from_text(text)
-    results = []
-    
-    # Known safe ingredients with benefits
-    known_safe = {
-        'diethylamino hydroxybenzoyl hexyl benzoate': {
-            'benefits': ['UV protection', 'Skin protection'],
-            'common_uses': ['Sunscreens', 'Daily moisturizers'],
-            'safety_notes': 'FDA approved UV filter'
-        },
-        'vitamin e': {
-            'benefits': ['Antioxidant', 'Skin conditioning'],
-            'common_uses': ['Anti-aging products', 'Moisturizers'],
-            'safety_notes': 'Essential vitamin for skin health'
-        },
-        'aloe vera': {
-            'benefits': ['Soothing', 'Moisturizing', 'Anti-inflammatory'],
-            'common_uses': ['Skin care', 'After-sun care'],
-            'safety_notes': 'Natural plant extract'
-        },
-        # Add more safe ingredients...
-    }
-    
-    for ingredient in ingredients:
-        normalized = ingredient.lower()
-        
-        # Check known safe ingredients
-        if normalized in known_safe:
-            safe_info = known_safe[normalized]
-            results.append({
-                'ingredient': ingredient,
-                'is_harmful': False,
-                'confidence': 1.0,
-                'category': 'safe ingredients',
-                'chemical_score': 0,
-                'benefits': safe_info['benefits'],
-                'common_uses': safe_info['common_uses'],
-                'safety_notes': safe_info['safety_notes'],
-                'research_links': {
-                    'pubchem': f'https://pubchem.ncbi.nlm.nih.gov/#query={ingredient}',
-                    'cosing': f'https://ec.europa.eu/growth/tools-databases/cosing/index.cfm?fuseaction=search.results&search={ingredient}'
-                }
-            })
-            continue
-            
-        # Check against harmful database
-        if ingredient in harmful_ingredients:
-            info = harmful_ingredients[ingredient]
-            is_truly_harmful = info['score'] >= 7
-            
-            results.append({
-                'ingredient': ingredient,
-                'is_harmful': is_truly_harmful,
-                'confidence': 1.0,
-                'category': info.get('categories', ['Unknown'])[0],
-                'chemical_score': info.get('score', 5),
-                'concerns': info.get('concerns', []) if is_truly_harmful else [],
-                'found_in': info.get('found_in', []),
-                'alternatives': get_safe_alternatives(ingredient) if is_truly_harmful else [],
-                'research_links': get_research_links(ingredient)
-            })
-            continue
-            
-        # For unknown ingredients, provide research links instead of AI warning
-        results.append({
-            'ingredient': ingredient,
-            'is_harmful': False,  # Default to safe if unknown
-            'confidence': 0.7,
-            'category': 'Unknown',
-            'research_links': {
-                'pubchem': f'https://pubchem.ncbi.nlm.nih.gov/#query={ingredient}',
-                'cosing': f'https://ec.europa.eu/growth/tools-databases/cosing/index.cfm?fuseaction=search.results&search={ingredient}',
-                'google_scholar': f'https://scholar.google.com/scholar?q={ingredient}+cosmetic+safety',
-                'fda': f'https://www.fda.gov/search?s={ingredient}',
-                'inci': f'https://incidecoder.com/ingredients/{ingredient.replace(" ", "-")}'
-            },
-            'note': 'Please check official sources for detailed information about this ingredient.'
-        })
-    
-    return results
+        return
+    for ingredient, resolution in resolve_ingredients(iter_label_ingredients(text)):
+        yield build_verdict(ingredient, resolution)
+
+def analyze_ingredients(text):
+    return list(iter_analysis(text))
+
+def wants_stream():
+    """True if the client asked for an NDJSON stream of verdicts."""
+    return (request.args.get('stream') == '1'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+def stream_analysis(text):
+    """NDJSON response: the extracted text, one line per verdict, then a summary.
+
+    Events are {"event": "text" | "ingredient" | "done" | "error", ...}.
+    """
+    def generate():
+        yield json.dumps({'event': 'text', 'extracted_text': text}) + '\n'
+        count = 0
+        try:
+            for verdict in iter_analysis(text):
+                count += 1
+                yield json.dumps({'event': 'ingredient', 'result': verdict}) + '\n'
+        except Exception as e:
+            logger.exception("Error streaming analysis")
+            yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+            return
+        yield json.dumps({'event': 'done', 'count': count}) + '\n'
+
+    # X-Accel-Buffering stops nginx-style proxies from holding lines back
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Per-request limits for /analyze/batch
+BATCH_MAX_PRODUCTS = int(os.environ.get('BATCH_MAX_PRODUCTS', 1000))
+BATCH_MAX_IMAGES = int(os.environ.get('BATCH_MAX_IMAGES', 16))
+
+def product_ingredients(ingredients):
+    """Distinct ingredient names from label text or a list of names."""
+    if isinstance(ingredients, str):
+        return list(iter_label_ingredients(ingredients))
+    names = (name.lower() for name in ingredients if name.strip())
+    return list(unique_ingredients(normalize_ingredients(names)))
+
+def start_batch_ocr(image_bytes):
+    """Look up or start OCR for a batch image without waiting for it.
+
+    Returns (cache key, text, future); text is set on a cache hit,
+    future otherwise. Raises OCRBusy if the pool has no room.
+    """
+    key = ocr_cache.key(image_bytes, OCR_PRESET, mode=OCR_MODE)
+    text = ocr_cache.get(key)
+    if text is not None:
+        return key, text, None
+    return key, None, ocr_pool.submit(image_bytes, OCR_PRESET, '', OCR_MODE)
+
+def finish_batch_ocr(job):
+    """Wait for a job from start_batch_ocr and return its text."""
+    key, text, future = job
+    if future is not None:
+        try:
+            text = future.result(timeout=ocr_pool.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise OCRTimeout(f"OCR did not finish within {ocr_pool.timeout}s")
+        ocr_cache.set(key, text)
+    return text
+
+def iter_batch(products):
+    """Yield one result per product, in order, resolving each distinct
+    ingredient in the batch only once.
+
+    Each product is {'id', 'ingredients'} (text or list of names) or
+    {'id', 'ocr'} (a start_batch_ocr job, or an exception if it could not
+    be started). Results are {'id', 'ingredients': [verdicts]} plus
+    'extracted_text' for images, or {'id', 'error'}.
+    """
+    verdicts = {}
+    for product in products:
+        result = {'id': product['id']}
+        try:
+            if 'ocr' in product:
+                if isinstance(product['ocr'], Exception):
+                    raise product['ocr']
+                text = finish_batch_ocr(product['ocr'])
+                result['extracted_text'] = text
+                ingredients = product_ingredients(text or '')
+            else:
+                ingredients = product_ingredients(product['ingredients'])
+
+            for ingredient in ingredients:
+                if ingredient not in verdicts:
+                    verdicts[ingredient] = build_verdict(ingredient, resolver.resolve(ingredient))
+            result['ingredients'] = [verdicts[ingredient] for ingredient in ingredients]
+        except OCRBusy as e:
+            result['error'] = 'Server is busy, please retry shortly'
+            result['retry_after'] = e.retry_after
+        except OCRTimeout:
+            result['error'] = 'Text extraction timed out'
+        except Exception as e:
+            logger.error("Error analyzing batch product %s: %s", product['id'], e)
+            result['error'] = str(e)
+        yield result
+
+def parse_batch_request():
+    """Read products from a JSON body or a multipart form.
+
+    JSON: {"products": [{"id": ..., "ingredients": "text" or ["name", ...]}]}
+    Multipart: the same list as a "products" field plus image files under
+    "images", each analyzed as a product identified by its filename.
+    Returns (products, images, error message).
+    """
+    if request.files:
+        try:
+            products = json.loads(request.form.get('products', '[]'))
+        except ValueError:
+            return None, None, 'products must be a JSON list'
+        images = [image for image in request.files.getlist('images') if image]
+    else:
+        data = request.get_json(silent=True) or {}
+        products = data.get('products', [])
+        images = []
+
+    if not isinstance(products, list):
+        return None, None, 'products must be a list'
+    for index, product in enumerate(products):
+        ingredients = product.get('ingredients') if isinstance(product, dict) else None
+        if not (isinstance(ingredients, str) or isinstance(ingredients, list)
+                and all(isinstance(name, str) for name in ingredients)):
+            return None, None, f'product {index} needs "ingredients" as text or a list of names'
+    if not products and not images:
+        return None, None, 'No products provided'
+    return products, images, None
 
 def get_research_links(ingredient):
     """Get comprehensive research links for an ingredient."""
@@ -244,7 +375,7 @@ def get_safe_alternatives(ingredient):
         return alternatives
         
     except Exception as e:
-        print(f"Error getting alternatives for {ingredient}: {e}")
+        logger.error("Error getting alternatives for %s: %s", ingredient, e)
         return []
 
 # Serve frontend files
@@ -265,11 +396,21 @@ def analyze_product():
         image_file = request.files['image']
         if not image_file:
             return jsonify({'error': 'Empty image file'}), 400
+
+        mode = request.form.get('mode', OCR_MODE)
+        if mode not in OCR_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(OCR_MODES)}"}), 400
             
         # Extract text from image
-        text = extract_text_from_image(image_file)
+        try:
+            text = extract_text_from_image(image_file, mode)
+        except (OCRBusy, OCRTimeout) as e:
+            return ocr_unavailable_response(e)
         if not text:
             return jsonify({'error': 'Could not extract text from image'}), 400
+
+        if wants_stream():
+            return stream_analysis(text)
             
         # Analyze ingredients
         results = analyze_ingredients(text)
@@ -282,9 +423,70 @@ def analyze_product():
         })
         
     except Exception as e:
-        print(traceback.format_exc())  # Log the full error
+        logger.exception("Error handling %s", request.path)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze many products in one request.
+
+    Ingredients shared between products are resolved once per batch.
+    Streams one NDJSON line per product when asked to (see wants_stream),
+    otherwise returns {'products': [...], 'unique_ingredients': n}.
+    """
+    try:
+        products, images, error = parse_batch_request()
+        if error:
+            return jsonify({'error': error}), 400
+        if len(products) + len(images) > BATCH_MAX_PRODUCTS or len(images) > BATCH_MAX_IMAGES:
+            return jsonify({
+                'error': 'Batch too large',
+                'max_products': BATCH_MAX_PRODUCTS,
+                'max_images': BATCH_MAX_IMAGES
+            }), 413
+
+        batch = [{'id': product.get('id', index), 'ingredients': product['ingredients']}
+                 for index, product in enumerate(products)]
+        # Start every OCR job before resolving anything so images run in parallel
+        for image in images:
+            try:
+                job = start_batch_ocr(image.read())
+            except OCRBusy as e:
+                job = e
+            batch.append({'id': image.filename, 'ocr': job})
+
+        if wants_stream():
+            def generate():
+                unique = set()
+                for result in iter_batch(batch):
+                    unique.update(verdict['ingredient'] for verdict in result.get('ingredients', []))
+                    yield json.dumps({'event': 'product', 'result': result}) + '\n'
+                yield json.dumps({'event': 'done', 'count': len(batch),
+                                  'unique_ingredients': len(unique)}) + '\n'
+
+            return Response(generate(), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        results = list(iter_batch(batch))
+        unique = {verdict['ingredient'] for result in results
+                  for verdict in result.get('ingredients', [])}
+        return jsonify({'products': results, 'unique_ingredients': len(unique)})
+
+    except Exception as e:
+        logger.exception("Error handling %s", request.path)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/resolver/stats')
+def resolver_stats():
+    return jsonify(resolver.stats())
+
+@app.route('/ocr/stats')
+def ocr_stats():
+    return jsonify({
+        'pool': ocr_pool.stats(),
+        'cache': ocr_cache.stats()
+    })
+
 @app.route('/test-connection')
 def test_connection():
     return jsonify({'status': 'ok'})
@@ -298,10 +500,19 @@ def analyze_image():
         file = request.files['image']
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
+
+        mode = request.form.get('mode', OCR_MODE)
+        if mode not in OCR_MODES:
+            return jsonify({'error': f"mode must be one of {', '.join(OCR_MODES)}"}), 400
             
         # Process image and get ingredients
-        image = Image.open(file)
-        text = pytesseract.image_to_string(image)
+        try:
+            text = ocr_image(file.read(), mode)
+        except (OCRBusy, OCRTimeout) as e:
+            return ocr_unavailable_response(e)
+
+        if wants_stream():
+            return stream_analysis(text)
         
         # Analyze ingredients
         results = analyze_ingredients(text)
@@ -311,7 +522,7 @@ def analyze_image():
             'analysis': results
         })
     except Exception as e:
-        print(traceback.format_exc())  # Log the full error
+        logger.exception("Error handling %s", request.path)
         return jsonify({'error': str(e)}), 500
 
 # Add a test endpoint
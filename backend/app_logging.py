@@ -0,0 +1,69 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import uuid
+
+# Level for everything; per-ingredient trace lines are DEBUG, so the
+# default INFO level skips them before any message is formatted
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Fraction of per-ingredient trace lines kept when DEBUG is on
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+
+VALID_REQUEST_ID = re.compile(r'[\w.-]{1,64}\Z')
+
+# Id of the request being handled, attached to every log record
+request_id = contextvars.ContextVar('request_id', default='-')
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to each record as %(request_id)s."""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps about `rate` of the records logged to a logger.
+
+    Filters run only for records that passed the level check, so a
+    disabled logger costs nothing here.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return self.rate >= 1 or random.random() < self.rate
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+def get_trace_logger(name, rate=None):
+    """Logger for per-ingredient debug lines, sampled at LOG_SAMPLE_RATE."""
+    logger = logging.getLogger(name + '.trace')
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(LOG_SAMPLE_RATE if rate is None else rate))
+    return logger
+
+def configure_logging(level=LOG_LEVEL):
+    """Log to stderr with level, logger name and request id; safe to call twice."""
+    root = logging.getLogger()
+    if not any(isinstance(f, RequestIdFilter) for h in root.handlers for f in h.filters):
+        handler = logging.StreamHandler()
+        handler.addFilter(RequestIdFilter())
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def start_request(incoming_id=None):
+    """Set the request id for the current context and return it.
+
+    A caller-supplied id (e.g. an X-Request-ID header) is kept if it is a
+    short token, so it cannot inject text into log lines.
+    """
+    value = incoming_id if incoming_id and VALID_REQUEST_ID.match(incoming_id) else uuid.uuid4().hex[:16]
+    request_id.set(value)
+    return value
@@ -0,0 +1,77 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to no cross-process locking
+    fcntl = None
+
+# Process umask, read once at import: reading it means briefly changing it,
+# which is not safe once other threads may be creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _file_mode(path):
+    """Permissions for the new version of path.
+
+    The existing file's mode is kept; a new file gets the mode open() would
+    give it. mkstemp alone would leave every file readable only by its owner.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Write a file so readers see either the old or the new contents.
+
+    Data goes to a temporary file in the same directory, which is flushed,
+    fsynced and renamed over path. On error the original file is untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Persist the rename itself
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Hold an exclusive cross-process lock on path for the enclosed block.
+
+    Yields True once the lock is held. With blocking=False it yields False
+    immediately if another process holds the lock. Without fcntl, or with
+    no path, the lock is always granted.
+    """
+    if fcntl is None or path is None:
+        yield True
+        return
+
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
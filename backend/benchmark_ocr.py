@@ -0,0 +1,129 @@
+"""Compare OCR preprocessing presets and modes on a local corpus of label photos.
+
+Every image in the corpus directory may have a sidecar text file with the
+same name (e.g. label1.jpg + label1.txt) listing the expected ingredients,
+comma or newline separated. For each preset the benchmark reports
+preprocessing and OCR latency and, where sidecars exist, how many of the
+expected ingredients the app's tokenizer extracted from the OCR text
+(recall) and how many extracted ingredients were expected (precision).
+Each preset runs in every requested OCR mode, so 'ingredients' (region
+detection, see ingredient_region) can be compared against full-image OCR.
+
+    python benchmark_ocr.py path/to/corpus
+    python benchmark_ocr.py path/to/corpus --presets none default label --repeat 3
+    python benchmark_ocr.py path/to/corpus --backend pytesseract
+    python benchmark_ocr.py path/to/corpus --presets default --modes full ingredients
+"""
+import argparse
+import os
+import re
+import statistics
+import time
+from image_preprocessing import PRESETS, load_image, preprocess
+from ingredient_region import OCR_MODES, ocr_ingredients
+from ingredient_tokenizer import extract_ingredients
+from ocr_backends import OCR_BACKEND, create_backend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp')
+
+def split_ingredients(text):
+    """Normalized ingredient names from a sidecar file."""
+    names = (' '.join(part.lower().split()) for part in re.split(r'[,;\n]', text))
+    return {name.strip(' .*') for name in names if name.strip(' .*')}
+
+def load_corpus(directory):
+    """Return [(name, image_bytes, expected_ingredients or None)]."""
+    corpus = []
+    for filename in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(directory, filename), 'rb') as f:
+            image_bytes = f.read()
+        expected = None
+        sidecar = os.path.join(directory, stem + '.txt')
+        if os.path.exists(sidecar):
+            with open(sidecar, 'r') as f:
+                expected = split_ingredients(f.read())
+        corpus.append((filename, image_bytes, expected))
+    return corpus
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def benchmark_preset(corpus, preset, backend, repeat=1, config='', mode='full'):
+    """Run one preset and OCR mode over the corpus and return summary metrics."""
+    preprocess_times, ocr_times, recalls, precisions = [], [], [], []
+    for _, image_bytes, expected in corpus:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            image = preprocess(load_image(image_bytes), preset)
+            preprocessed = time.perf_counter()
+            if mode == 'ingredients':
+                text = ocr_ingredients(image, backend, fallback_config=config)
+            else:
+                text = backend.image_to_string(image, config=config)
+            finished = time.perf_counter()
+            preprocess_times.append(preprocessed - started)
+            ocr_times.append(finished - preprocessed)
+
+        if expected:
+            found = {' '.join(name.split()) for name in extract_ingredients(text)}
+            matched = len(found & expected)
+            recalls.append(matched / len(expected))
+            precisions.append(matched / len(found) if found else 0.0)
+
+    totals = [a + b for a, b in zip(preprocess_times, ocr_times)]
+    return {
+        'preset': preset,
+        'mode': mode,
+        'preprocess_ms': statistics.mean(preprocess_times) * 1000,
+        'ocr_ms': statistics.mean(ocr_times) * 1000,
+        'p95_ms': percentile(totals, 0.95) * 1000,
+        'recall': statistics.mean(recalls) if recalls else None,
+        'precision': statistics.mean(precisions) if precisions else None
+    }
+
+def format_row(values, widths):
+    return '  '.join(str(value).rjust(width) for value, width in zip(values, widths))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR preprocessing presets.')
+    parser.add_argument('corpus', help='Directory of label images with optional .txt sidecars')
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--modes', nargs='+', default=list(OCR_MODES), choices=list(OCR_MODES))
+    parser.add_argument('--repeat', type=int, default=1, help='OCR runs per image (default: 1)')
+    parser.add_argument('--config', default='', help='Extra tesseract config, e.g. "--psm 6"')
+    parser.add_argument('--backend', default=OCR_BACKEND, choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    # Load the engine before timing anything
+    backend = create_backend(args.backend)
+    backend.warm_up()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"No images found in {args.corpus}")
+        return
+    labelled = sum(1 for _, _, expected in corpus if expected)
+    print(f"{len(corpus)} images, {labelled} with expected ingredients, {backend.name} backend\n")
+
+    headers = ('preset', 'mode', 'preprocess ms', 'ocr ms', 'p95 total ms', 'recall', 'precision')
+    widths = [max(len(header), 10) for header in headers]
+    print(format_row(headers, widths))
+    for preset in args.presets:
+        for mode in args.modes:
+            result = benchmark_preset(corpus, preset, backend, args.repeat, args.config, mode)
+            print(format_row((
+                preset,
+                mode,
+                f"{result['preprocess_ms']:.1f}",
+                f"{result['ocr_ms']:.1f}",
+                f"{result['p95_ms']:.1f}",
+                '-' if result['recall'] is None else f"{result['recall']:.1%}",
+                '-' if result['precision'] is None else f"{result['precision']:.1%}"
+            ), widths))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Microbenchmark for ingredient extraction from OCR text.
+
+Times ingredient_tokenizer.extract_ingredients against the original
+implementation (reference_extract below) on a directory of OCR dumps and
+checks that both return the same ingredients. Any directory of .txt files
+works, including an OCR_CACHE_DIR full of real OCR output.
+
+    python benchmark_tokenizer.py
+    python benchmark_tokenizer.py path/to/ocr/dumps --repeat 2000
+"""
+import argparse
+import os
+import re
+import time
+from ingredient_tokenizer import extract_ingredients
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_samples')
+
+def reference_extract(text):
+    """The original app.extract_ingredients_from_text, kept for comparison."""
+    non_ingredients = {
+        'ingredients', 'contains', 'may', 'manufactured', 'facility', 'warning',
+        'directions', 'use', 'caution', 'storage', 'keep', 'away', 'children',
+        'safety', 'sealed', 'made', 'distributed', 'product', 'contact', 'email',
+        'website', 'address', 'phone', 'www', 'com', 'road', 'street', 'ltd',
+        'inc', 'limited', 'corporation',
+        'avenue', 'boulevard', 'lane', 'drive', 'place', 'court', 'circle',
+        'suite', 'floor', 'unit', 'building', 'block',
+        'company', 'industries', 'enterprises', 'group', 'international',
+        'worldwide', 'global', 'solutions', 'services',
+        'tel', 'telephone', 'fax', 'email', 'website', 'customer', 'service',
+        'support', 'help', 'info', 'contact', 'us',
+        'mg', 'ml', 'oz', 'gram', 'percent', 'daily', 'value',
+        'best', 'before', 'date', 'batch', 'lot', 'number', 'expiry',
+        'expires', 'manufactured', 'date', 'packaging'
+    }
+
+    parts = re.split(r'[,;:()\[\]]', text.lower())
+
+    ingredients = []
+    for part in parts:
+        cleaned = part.strip()
+        words = cleaned.split()
+
+        if any([
+            not cleaned,
+            not words,
+            len(cleaned) <= 1,
+            cleaned.isdigit(),
+            len(words) > 4,
+            '@' in cleaned,
+            'www.' in cleaned,
+            '.com' in cleaned,
+            cleaned.startswith('http'),
+            re.match(r'^[0-9-+()]+$', cleaned),
+            re.match(r'^[0-9]+[A-Za-z\s]', cleaned),
+            re.match(r'.*\d+.*', cleaned),
+            any(word in non_ingredients for word in words),
+            any(word.endswith(('road', 'street', 'ave', 'lane', 'dr', 'blvd')) for word in words),
+            any(len(word) == 1 for word in words),
+            any(word.isupper() and len(word) > 2 for word in words)
+        ]):
+            continue
+
+        if all([
+            not re.match(r'^[0-9%]+$', cleaned),
+            not any(char.isdigit() for char in cleaned),
+            len(cleaned) > 2,
+            not any(cleaned.startswith(prefix) for prefix in ['tel:', 'fax:', 'email:', 'http']),
+        ]):
+            ingredients.append(cleaned)
+
+    return ingredients
+
+def load_dumps(directory=SAMPLES_DIR):
+    """Return the contents of every .txt file under directory."""
+    dumps = []
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.endswith('.txt'):
+                with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                    dumps.append(f.read())
+    return dumps
+
+def time_extractor(extract, dumps, repeat):
+    """Average microseconds per dump."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in dumps:
+            extract(text)
+    return (time.perf_counter() - started) / (repeat * len(dumps)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ingredient extraction.')
+    parser.add_argument('dumps', nargs='?', default=SAMPLES_DIR,
+                        help='Directory of OCR text dumps (default: ocr_samples)')
+    parser.add_argument('--repeat', type=int, default=500, help='Passes over the dumps (default: 500)')
+    args = parser.parse_args()
+
+    dumps = load_dumps(args.dumps)
+    if not dumps:
+        print(f"No .txt files found in {args.dumps}")
+        return
+
+    mismatches = sum(1 for text in dumps if extract_ingredients(text) != reference_extract(text))
+    print(f"{len(dumps)} dumps, {sum(len(text) for text in dumps)} characters, "
+          f"{mismatches} with different output\n")
+
+    reference = time_extractor(reference_extract, dumps, args.repeat)
+    tokenizer = time_extractor(extract_ingredients, dumps, args.repeat)
+    print(f"reference:  {reference:8.1f} us/dump")
+    print(f"tokenizer:  {tokenizer:8.1f} us/dump  ({reference / tokenizer:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import re
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# Alternatives made only of these characters can be matched as plain literals
+_LITERAL = re.compile(r'^[a-z0-9 _-]+$')
+
+def _split_alternatives(pattern):
+    """Split a pattern on the top-level '|' operators."""
+    parts, current, depth = [], '', 0
+    for char in pattern:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == '|' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+def _literal_alternatives(pattern):
+    """Decompose a pattern into (literal, at_start, at_end) tuples.
+
+    Handles the shapes used by the classifier: ``word``, ``word$``,
+    ``a$|b$``, ``(a|b|c)``, ``^(a|b)`` and ``(a|b)$``. Returns None when the
+    pattern needs the full regex engine.
+    """
+    literals = []
+    for alternative in _split_alternatives(pattern):
+        at_start = alternative.startswith('^')
+        if at_start:
+            alternative = alternative[1:]
+        at_end = alternative.endswith('$')
+        if at_end:
+            alternative = alternative[:-1]
+
+        if alternative.startswith('(') and alternative.endswith(')'):
+            inner = alternative[1:-1]
+            if '(' in inner or ')' in inner:
+                return None
+            words = inner.split('|')
+        else:
+            words = [alternative]
+
+        for word in words:
+            if not _LITERAL.match(word):
+                return None
+            literals.append((word, at_start, at_end))
+    return literals
+
+class ChemicalFeatureEngine:
+    """Precompiled multi-pattern matcher for the chemical name features.
+
+    Every literal from every pattern is folded into one alternation that is
+    scanned once per name with an overlapping lookahead, so a single
+    ``finditer`` pass reports all features at once. The longest literal wins
+    at each position; the literals that are prefixes of it are resolved from
+    a table built at construction time. Patterns that are not plain literal
+    alternations (e.g. ``\\d+``) keep their own compiled regex.
+
+    Results are identical to running ``re.search(pattern, text.lower())``
+    for each pattern.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = dict(patterns)
+        self.names = list(self.patterns.keys())
+        self.feature_names = [f'has_{name}' for name in self.names]
+
+        literal_features = {}
+        self._fallback = []
+        for index, pattern in enumerate(self.patterns.values()):
+            literals = _literal_alternatives(pattern)
+            if literals is None:
+                self._fallback.append((index, re.compile(pattern)))
+                continue
+            for word, at_start, at_end in literals:
+                literal_features.setdefault(word, []).append((index, at_start, at_end))
+
+        # Longest first so each position reports its longest literal
+        words = sorted(literal_features, key=len, reverse=True)
+        self._scanner = re.compile('(?=(%s))' % '|'.join(re.escape(w) for w in words)) if words else None
+        self._hits = {
+            word: tuple(
+                (index, at_start, at_end, len(prefix))
+                for prefix in words if word.startswith(prefix)
+                for index, at_start, at_end in literal_features[prefix]
+            )
+            for word in words
+        }
+
+    def vector(self, text):
+        """Return the feature vector for one name as a tuple of 0/1 ints."""
+        text = text.lower()
+        vector = [0] * len(self.names)
+        length = len(text)
+        # '$' also matches right before a trailing newline
+        tail = length - 1 if text.endswith('\n') else length
+
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                position = match.start()
+                for index, at_start, at_end, size in self._hits[match.group(1)]:
+                    if at_start and position:
+                        continue
+                    if at_end and position + size not in (length, tail):
+                        continue
+                    vector[index] = 1
+
+        for index, regex in self._fallback:
+            if not vector[index] and regex.search(text):
+                vector[index] = 1
+        return tuple(vector)
+
+    def extract(self, text):
+        """Return the features for one name as an ordered ``has_*`` dict."""
+        return dict(zip(self.feature_names, self.vector(text)))
+
+    def transform(self, texts):
+        """Return the feature matrix for a batch of names."""
+        vectors = [self.vector(text) for text in texts]
+        return np.array(vectors, dtype=np.int8).reshape(len(vectors), len(self.names))
+
+class ChemicalFeatureTransformer(BaseEstimator, TransformerMixin):
+    """scikit-learn transformer producing sparse chemical feature columns."""
+
+    def __init__(self, patterns=None):
+        self.patterns = patterns
+
+    def fit(self, X, y=None):
+        self.engine_ = ChemicalFeatureEngine(self.patterns or {})
+        return self
+
+    def transform(self, X):
+        return sparse.csr_matrix(self.engine_.transform(X), dtype=np.float64)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array(self.engine_.feature_names, dtype=object)
@@ -0,0 +1,80 @@
+import threading
+from collections import namedtuple
+from ingredient_scraper import IngredientAnalyzer
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Immutable view of one store version; replaced as a whole, never mutated
+DatabaseSnapshot = namedtuple('DatabaseSnapshot', [
+    'version', 'harmful_ingredients', 'safe_alternatives', 'toxicity_categories', 'analyzer'
+])
+
+class SnapshotHolder:
+    """Keeps the current database snapshot in step with the ingredient store.
+
+    A background thread polls store.version() every `interval` seconds.
+    When it changes, the new data is read and a fresh IngredientAnalyzer
+    (with its index) is built on that thread, then published by replacing
+    `current` in a single assignment. Requests keep using whichever
+    snapshot they started with, so a reload never blocks or half-updates
+    them. Subscribers are called with each new snapshot to swap in state
+    derived from it.
+    """
+
+    def __init__(self, store, interval=5):
+        self.store = store
+        self.interval = interval
+        self.subscribers = []
+        self.current = self._build()
+
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _build(self):
+        version, harmful, safe, toxicity = self.store.versioned_snapshot()
+        analyzer = IngredientAnalyzer(self.store, database=(harmful, safe, toxicity))
+        return DatabaseSnapshot(version, harmful, safe, toxicity, analyzer)
+
+    def subscribe(self, callback):
+        """Register callback(snapshot) to run after each reload."""
+        self.subscribers.append(callback)
+
+    def check(self):
+        """Reload if the store has a new version; returns whether it did."""
+        if self.store.version() == self.current.version:
+            return False
+        with self._reload_lock:
+            if self.store.version() == self.current.version:
+                return False
+            snapshot = self._build()
+            logger.info("Reloading ingredient database: version %s -> %s",
+                        self.current.version, snapshot.version)
+            self.current = snapshot
+            for callback in self.subscribers:
+                try:
+                    callback(snapshot)
+                except Exception:
+                    logger.exception("Error applying database snapshot")
+            return True
+
+    def start(self):
+        """Start watching the store if not already running."""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='database-reload', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Error checking ingredient database version")
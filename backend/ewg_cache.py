@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+EWG_CACHE_PATH = os.environ.get(
+    'EWG_CACHE_PATH',
+    os.path.join(os.path.dirname(__file__), 'ewg_cache.sqlite3')
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+CREATE TABLE IF NOT EXISTS results (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL DEFAULT 0
+);
+'''
+
+class EWGCache:
+    """Persistent SQLite cache of scraped EWG pages and parsed results.
+
+    Raw pages are kept with their ETag/Last-Modified validators so stale
+    pages can be revalidated with a conditional GET instead of downloaded
+    again. Pages older than `ttl` seconds are reported as stale but kept
+    until the total size of stored pages exceeds `max_bytes`, at which
+    point the least recently used pages are evicted. Parsed results follow
+    the same staleness rule and are evicted least recently used first once
+    there are more than `max_results` of them.
+    """
+
+    def __init__(self, path=EWG_CACHE_PATH, ttl=7 * 86400, max_bytes=50 * 1024 * 1024,
+                 max_results=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_results = max_results
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(results)')]
+        if 'accessed_at' not in columns:
+            # Caches created before results were evicted
+            self._conn.execute('ALTER TABLE results ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)')
+        self._conn.commit()
+
+    def _fresh(self, fetched_at):
+        return time.time() - fetched_at < self.ttl
+
+    def get_page(self, url):
+        """Return the cached page for url as a dict, or None.
+
+        The dict holds body, etag, last_modified and whether it is fresh.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE pages SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return {
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': self._fresh(fetched_at)
+        }
+
+    def put_page(self, url, body, etag=None, last_modified=None):
+        """Store a downloaded page and evict old pages if over max_bytes."""
+        now = time.time()
+        size = len(body.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, now, now, size)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch_page(self, url):
+        """Mark a page as fresh again, e.g. after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for url, size in self._conn.execute('SELECT url, size FROM pages ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany('DELETE FROM pages WHERE url = ?', evicted)
+
+    def get_result(self, name):
+        """Return (data, fresh) for a parsed ingredient, or (None, False)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, fetched_at FROM results WHERE name = ?', (name.lower(),)
+            ).fetchone()
+            if row is None:
+                return None, False
+            self._conn.execute('UPDATE results SET accessed_at = ? WHERE name = ?',
+                               (time.time(), name.lower()))
+            self._conn.commit()
+        return json.loads(row[0]), self._fresh(row[1])
+
+    def put_result(self, name, data):
+        """Store the parsed data for an ingredient, evicting old results if over max_results."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                (name.lower(), json.dumps(data), now, now)
+            )
+            self._conn.execute(
+                'DELETE FROM results WHERE name IN '
+                '(SELECT name FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_results,)
+            )
+            self._conn.commit()
+
+    def results(self, min_hazard_score=None):
+        """Return parsed results keyed by lower-case name.
+
+        With min_hazard_score, only results scoring at least that much are
+        read, filtered in SQL rather than in memory.
+        """
+        query = 'SELECT name, data FROM results'
+        params = ()
+        if min_hazard_score is not None:
+            query += " WHERE CAST(json_extract(data, '$.hazard_score') AS INTEGER) >= ?"
+            params = (min_hazard_score,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def stats(self):
+        """Return page/result counts, stored bytes and page hit counters."""
+        with self._lock:
+            pages, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages'
+            ).fetchone()
+            results = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'pages': pages,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'results': results,
+                'max_results': self.max_results,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,256 @@
+import queue
+import random
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from rate_limit import TokenBucket
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+def is_stale(info, max_age_days=7):
+    """Whether an ingredient's EWG data is missing or older than max_age_days."""
+    last_updated = info.get('ewg_last_updated')
+    if not last_updated:
+        return True
+    try:
+        return (datetime.now() - datetime.fromisoformat(last_updated)).days > max_age_days
+    except ValueError:
+        return True
+
+def apply_ewg_data(info, ewg_data):
+    """Copy scraped EWG fields into a database entry."""
+    info.update({
+        'ewg_score': ewg_data['hazard_score'],
+        'ewg_concerns': ewg_data['concerns'],
+        'ewg_found_in': ewg_data.get('found_in', []),
+        'ewg_last_updated': ewg_data.get('last_updated') or datetime.now().isoformat()
+    })
+
+class EWGRefreshWorker:
+    """Background thread that keeps the EWG fields of the database fresh.
+
+    Every `interval` seconds (with jitter) the worker scrapes the stale
+    ingredients through a token-bucket rate limiter and backs off
+    exponentially when scraping fails. The new data is merged into a
+    freshly loaded copy of the database, saved, and handed to the
+    subscribers, which swap it into their in-memory state. Nothing here
+    runs on startup or on the request path.
+
+    Given scrape_many(names), stale ingredients are scraped in batches of
+    `batch_size` instead, leaving concurrency and rate limiting to the
+    scraper; pass rate=None then.
+
+    Request handlers that serve stale data call enqueue(name) to have a
+    single ingredient refreshed soon by a second thread sharing the same
+    rate limiter. Names in the database are scraped and saved; other names
+    are passed to lookup(name), if given.
+
+    scrape(name) returns EWG data or None, load() returns
+    (harmful_ingredients, safe_alternatives, toxicity_categories) and
+    save() takes the same three values. If update(updates) is given it is
+    used instead of load/modify/save to write the scraped data atomically,
+    returning the new database. exclusive(blocking=False), if given, is a
+    cross-process lock ensuring only one process runs the periodic refresh.
+    """
+
+    def __init__(self, scrape, load, save, interval=86400, initial_delay=30,
+                 max_age_days=7, rate=0.25, jitter=0.2, backoff=5, max_backoff=600,
+                 max_failures=5, lookup=None, max_queue=1000, update=None, exclusive=None,
+                 scrape_many=None, batch_size=50):
+        self.scrape = scrape
+        self.scrape_many = scrape_many
+        self.batch_size = batch_size
+        self.load = load
+        self.save = save
+        self.lookup = lookup
+        self.update = update
+        self.exclusive = exclusive or (lambda blocking=True: nullcontext(True))
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.max_age_days = max_age_days
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_failures = max_failures
+        # None when the scraper does its own rate limiting
+        self.limiter = TokenBucket(rate) if rate else None
+
+        self.subscribers = []
+        self.last_run = None
+        self.last_updated_count = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._apply_lock = threading.Lock()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._queued = set()
+        self._queue_lock = threading.Lock()
+        self._queue_thread = None
+
+    def subscribe(self, callback):
+        """Register callback(harmful, safe, toxicity) to receive refreshed data."""
+        self.subscribers.append(callback)
+
+    def start(self):
+        """Start the refresh threads if they are not already running.
+
+        An interval <= 0 disables the periodic refresh but not the queue.
+        """
+        self._stop.clear()
+        if self.interval > 0 and not (self._thread and self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='ewg-refresh', daemon=True)
+            self._thread.start()
+        if not (self._queue_thread and self._queue_thread.is_alive()):
+            self._queue_thread = threading.Thread(target=self._drain, name='ewg-refresh-queue', daemon=True)
+            self._queue_thread.start()
+
+    def stop(self, timeout=None):
+        """Ask the refresh threads to stop and wait for them."""
+        self._stop.set()
+        for thread in (self._thread, self._queue_thread):
+            if thread:
+                thread.join(timeout)
+
+    def enqueue(self, name):
+        """Schedule a background refresh of one ingredient.
+
+        Returns False if the name is already queued or the queue is full.
+        """
+        with self._queue_lock:
+            if name in self._queued:
+                return False
+            try:
+                self._queue.put_nowait(name)
+            except queue.Full:
+                return False
+            self._queued.add(name)
+            return True
+
+    def queue_size(self):
+        return self._queue.qsize()
+
+    def _drain(self):
+        while not self._stop.is_set():
+            try:
+                name = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if self._acquire():
+                    self.refresh(name)
+            except Exception:
+                logger.exception("Error refreshing %s", name)
+            finally:
+                with self._queue_lock:
+                    self._queued.discard(name)
+
+    def refresh(self, name):
+        """Refresh a single ingredient now; returns the scraped data or None."""
+        harmful_ingredients, _, _ = self.load()
+        if name not in harmful_ingredients:
+            return self.lookup(name) if self.lookup else None
+
+        ewg_data = self.scrape(name)
+        if ewg_data:
+            self.apply({name: ewg_data})
+        return ewg_data
+
+    def _acquire(self):
+        """Wait for the rate limiter; False if the worker is stopping."""
+        if self.limiter is None:
+            return not self._stop.is_set()
+        return self.limiter.acquire(self._stop)
+
+    def _scrape_batch(self, names):
+        """Scrape names, returning {name: data or None}, or None if stopping."""
+        if self.scrape_many:
+            if self._stop.is_set():
+                return None
+            return self.scrape_many(names)
+        results = {}
+        for name in names:
+            if not self._acquire():
+                return None
+            results[name] = self.scrape(name)
+        return results
+
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self):
+        if self._stop.wait(self._jittered(self.initial_delay)):
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error refreshing EWG data")
+            if self._stop.wait(self._jittered(self.interval)):
+                return
+
+    def run_once(self):
+        """Refresh every stale ingredient once; returns the number updated.
+
+        Does nothing if another process is already running a refresh.
+        """
+        with self.exclusive(blocking=False) as acquired:
+            if not acquired:
+                logger.info("EWG refresh already running in another process")
+                return 0
+            return self._refresh_stale()
+
+    def _refresh_stale(self):
+        harmful_ingredients, _, _ = self.load()
+        stale = [name for name, info in harmful_ingredients.items()
+                 if is_stale(info, self.max_age_days)]
+
+        # Without scrape_many, names go one at a time through the limiter
+        batch_size = self.batch_size if self.scrape_many else 1
+        updates = {}
+        failures = 0
+        for start in range(0, len(stale), batch_size):
+            results = self._scrape_batch(stale[start:start + batch_size])
+            if results is None:
+                break
+
+            scraped = {name: ewg_data for name, ewg_data in results.items() if ewg_data}
+            if scraped:
+                updates.update(scraped)
+                failures = 0
+                continue
+
+            failures += 1
+            if failures >= self.max_failures:
+                logger.warning("EWG refresh giving up after %d consecutive failures", failures)
+                break
+            delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+            if self._stop.wait(self._jittered(delay)):
+                break
+
+        if updates:
+            self.apply(updates)
+        self.last_run = datetime.now().isoformat()
+        self.last_updated_count = len(updates)
+        return len(updates)
+
+    def apply(self, updates):
+        """Merge scraped data into the stored database and publish it."""
+        with self._apply_lock:
+            if self.update:
+                harmful_ingredients, safe_alternatives, toxicity_categories = self.update(updates)
+            else:
+                # Reload so changes written since the scan are not overwritten
+                harmful_ingredients, safe_alternatives, toxicity_categories = self.load()
+                for name, ewg_data in updates.items():
+                    if name in harmful_ingredients:
+                        apply_ewg_data(harmful_ingredients[name], ewg_data)
+                self.save(harmful_ingredients, safe_alternatives, toxicity_categories)
+            logger.info("Database updated with EWG data for %d ingredients", len(updates))
+
+            for callback in self.subscribers:
+                try:
+                    callback(harmful_ingredients, safe_alternatives, toxicity_categories)
+                except Exception:
+                    logger.exception("Error publishing refreshed database")
@@ -1,28 +1,191 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
 import json
+import os
+import random
+import threading
 import time
 import re
+from rate_limit import TokenBucket
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+EWG_SITE_URL = os.environ.get('EWG_SITE_URL', 'https://www.ewg.org')
+
+# Responses worth retrying; anything else is final
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def create_session(pool_size=10):
+    """Create a requests session with a keep-alive connection pool of pool_size per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
 
 class EWGScraper:
-    def __init__(self):
-        self.base_url = "https://www.ewg.org/skindeep/search/"
+    """Scraper for EWG's Skin Deep database.
+
+    All requests share one pooled session and go through a per-host token
+    bucket allowing `rate` requests per second. Failed requests (connection
+    errors and 429/5xx responses) are retried with exponential backoff,
+    honouring Retry-After. scrape_many fetches up to `max_workers`
+    ingredients concurrently.
+
+    With an EWGCache, pages and parsed results persist across restarts:
+    fresh pages are served from the cache, stale ones are revalidated with
+    a conditional GET, and get_cached() answers without any network access.
+    Results are then read from the cache on demand rather than held in
+    memory; without one they are kept in `ingredients_db`.
+    """
+
+    def __init__(self, site_url=None, max_workers=None, rate=None, max_retries=3,
+                 backoff=0.5, timeout=10, cache=None):
+        self.site_url = (site_url or EWG_SITE_URL).rstrip('/')
+        self.base_url = f"{self.site_url}/skindeep/search/"
+        self.max_workers = max_workers or int(os.environ.get('EWG_MAX_WORKERS', 8))
+        self.rate = rate or float(os.environ.get('EWG_RATE_LIMIT', 5))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
         self.ingredients_db = {}
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = create_session(self.max_workers)
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+
+    def _limiter(self, url):
+        """Token bucket for the host of url."""
+        host = urlsplit(url).netloc
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = TokenBucket(self.rate)
+                self._limiters[host] = limiter
+            return limiter
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before retry number attempt (1-based)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        delay = self.backoff * 2 ** (attempt - 1)
+        return delay * random.uniform(0.5, 1.5)
+
+    def fetch(self, url, params=None, headers=None):
+        """GET url through the rate limiter, retrying transient failures.
+
+        Returns the response, or None if every attempt failed.
+        """
+        limiter = self._limiter(url)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            response = None
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            except requests.RequestException as e:
+                logger.warning("Error fetching %s: %s", url, e)
+
+            if attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt + 1, response))
+        return None
+
+    def fetch_page(self, url, params=None):
+        """Return the body of a page, going through the cache if there is one.
+
+        A stale cached page is revalidated with its ETag/Last-Modified and
+        is still returned if the site cannot be reached.
+        """
+        return self._fetch_page(url, params)[0]
+
+    def _fetch_page(self, url, params=None):
+        """Return (body, stale) for a page; stale is True when the body is a
+        stale cached copy served because the site could not be reached."""
+        if self.cache is None:
+            response = self.fetch(url, params)
+            return (response.text if response is not None and response.status_code == 200 else None), False
+
+        url = requests.Request('GET', url, params=params).prepare().url
+        page = self.cache.get_page(url)
+        if page and page['fresh']:
+            return page['body'], False
+
+        headers = {}
+        if page and page['etag']:
+            headers['If-None-Match'] = page['etag']
+        if page and page['last_modified']:
+            headers['If-Modified-Since'] = page['last_modified']
+
+        response = self.fetch(url, headers=headers)
+        if response is None:
+            return (page['body'], True) if page else (None, False)
+        if response.status_code == 304 and page:
+            self.cache.touch_page(url)
+            return page['body'], False
+        if response.status_code != 200:
+            return None, False
+
+        self.cache.put_page(url, response.text, response.headers.get('ETag'),
+                            response.headers.get('Last-Modified'))
+        return response.text, False
+
+    def get_cached(self, name):
+        """Return cached data for an ingredient without touching the network."""
+        return self.get_cached_entry(name)[0]
+
+    def get_cached_entry(self, name):
+        """Return (data, fresh) for an ingredient without touching the network."""
+        if self.cache is not None:
+            return self.cache.get_result(name)
+        data = self.ingredients_db.get(name.lower())
+        return data, data is not None
+
+    def scrape_many(self, names):
+        """Scrape several ingredients concurrently.
+
+        Returns a dict mapping each name to its data, or None if it could
+        not be scraped.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            results = executor.map(self.scrape_ingredient, names)
+            return dict(zip(names, results))
 
     def scrape_ingredient(self, name):
-        """Scrape ingredient data from EWG's Skin Deep database"""
+        """Scrape ingredient data from EWG's Skin Deep database.
+
+        While the site is unreachable, the last cached result is returned
+        as is, keeping its original last_updated, so an outage never makes
+        stale data look freshly scraped.
+        """
         try:
+            cached = None
+            if self.cache is not None:
+                cached, fresh = self.cache.get_result(name)
+                if fresh:
+                    return cached
+
             # Search for the ingredient
-            search_url = f"{self.base_url}?search={name}"
-            response = self.session.get(search_url)
-            if response.status_code != 200:
+            search_page, stale = self._fetch_page(self.base_url, params={'search': name})
+            if stale:
+                return cached
+            if search_page is None:
                 return None
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(search_page, 'html.parser')
             
             # Find the ingredient link
             ingredient_link = soup.find('a', {'class': 'product-tile'}, href=re.compile(r'/skindeep/ingredients/'))
@@ -30,17 +193,20 @@ class EWGScraper:
                 return None
 
             # Get ingredient details page
-            detail_url = f"https://www.ewg.org{ingredient_link['href']}"
-            detail_response = self.session.get(detail_url)
-            if detail_response.status_code != 200:
+            detail_url = f"{self.site_url}{ingredient_link['href']}"
+            detail_page, stale = self._fetch_page(detail_url)
+            if stale:
+                return cached
+            if detail_page is None:
                 return None
 
-            detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
+            detail_soup = BeautifulSoup(detail_page, 'html.parser')
             
             # Extract data
             hazard_score = self._extract_hazard_score(detail_soup)
             concerns = self._extract_concerns(detail_soup)
             categories = self._extract_categories(detail_soup)
+            found_in = self._extract_found_in(detail_soup)
             references = self._extract_references(detail_soup)
 
             data = {
@@ -48,16 +214,21 @@ class EWGScraper:
                 'hazard_score': hazard_score,
                 'concerns': concerns,
                 'categories': categories,
+                'found_in': found_in,
                 'references': references,
-                'ewg_url': detail_url
+                'ewg_url': detail_url,
+                'last_updated': datetime.now().isoformat()
             }
 
             # Cache the data
-            self.ingredients_db[name.lower()] = data
+            if self.cache is not None:
+                self.cache.put_result(name, data)
+            else:
+                self.ingredients_db[name.lower()] = data
             return data
 
         except Exception as e:
-            print(f"Error scraping ingredient {name}: {str(e)}")
+            logger.error("Error scraping ingredient %s: %s", name, e)
             return None
 
     def _extract_hazard_score(self, soup):
@@ -99,6 +270,10 @@ class EWGScraper:
             pass
         return categories
 
+    def _extract_found_in(self, soup):
+        """Extract the product types an ingredient is used in"""
+        return [item.text.strip() for item in soup.find_all('div', {'class': 'product-types'})]
+
     def _extract_references(self, soup):
         """Extract scientific references from EWG page"""
         references = []
@@ -115,10 +290,14 @@ class EWGScraper:
 
     def get_all_ingredients(self):
         """Get all ingredients from the cached database"""
+        if self.cache is not None:
+            return self.cache.results()
         return self.ingredients_db
 
     def get_harmful_ingredients(self):
         """Get all harmful ingredients (score >= 6) from the cached database"""
+        if self.cache is not None:
+            return self.cache.results(min_hazard_score=6)
         return {
             name: info for name, info in self.ingredients_db.items()
             if int(info.get('hazard_score', 0)) >= 6
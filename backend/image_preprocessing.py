@@ -0,0 +1,108 @@
+import io
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# Tunable preprocessing presets, from cheapest to most aggressive.
+#   max_side:  downscale so the longer side is at most this many pixels
+#              (phone photos carry no meaningful DPI; ~2000px keeps label
+#              text at roughly 300 DPI print size)
+#   grayscale: convert to 8-bit luminance
+#   threshold: adaptive binarization against the local mean over a
+#              window of threshold_radius pixels, darker by threshold_offset
+#   crop:      crop to the bounding box of dark (text) pixels plus a margin
+PRESETS = {
+    'none': {},
+    'fast': {
+        'max_side': 1600,
+        'grayscale': True
+    },
+    'default': {
+        'max_side': 2000,
+        'grayscale': True,
+        'threshold': True,
+        'threshold_radius': 15,
+        'threshold_offset': 10
+    },
+    'label': {
+        'max_side': 2000,
+        'grayscale': True,
+        'threshold': True,
+        'threshold_radius': 25,
+        'threshold_offset': 15,
+        'crop': True,
+        'crop_margin': 20
+    }
+}
+
+def get_preset(preset):
+    """Resolve a preset name or options dict to an options dict."""
+    if preset is None:
+        return PRESETS['none']
+    if isinstance(preset, dict):
+        return preset
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preprocessing preset: {preset}")
+    return PRESETS[preset]
+
+def adaptive_threshold(image, radius=15, offset=10):
+    """Binarize a grayscale image against its local mean brightness.
+
+    Unlike a global threshold this copes with the shadows and glare of
+    photographed labels.
+    """
+    pixels = np.asarray(image, dtype=np.int16)
+    local_mean = np.asarray(image.filter(ImageFilter.BoxBlur(radius)), dtype=np.int16)
+    binary = np.where(pixels < local_mean - offset, 0, 255).astype(np.uint8)
+    return Image.fromarray(binary)
+
+def crop_to_text(image, margin=20):
+    """Crop a binarized image to the area containing dark pixels."""
+    box = ImageOps.invert(image).getbbox()
+    if not box:
+        return image
+    left, top, right, bottom = box
+    return image.crop((
+        max(0, left - margin),
+        max(0, top - margin),
+        min(image.width, right + margin),
+        min(image.height, bottom + margin)
+    ))
+
+def preprocess(image, preset='default'):
+    """Apply a preprocessing preset to a PIL image before OCR."""
+    options = get_preset(preset)
+    max_side = options.get('max_side')
+    grayscale = options.get('grayscale') or options.get('threshold')
+
+    # Let the JPEG decoder downscale by a power of two and drop colour while
+    # decoding, which is much cheaper than resizing the full-size image
+    if max_side and image.format == 'JPEG' and max(image.size) > max_side:
+        image.draft('L' if grayscale else image.mode, (max_side, max_side))
+
+    if grayscale:
+        image = image.convert('L')
+
+    # Phone photos are often stored sideways with an EXIF rotation flag
+    image = ImageOps.exif_transpose(image)
+
+    if max_side and max(image.size) > max_side:
+        image = image.copy()
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    if options.get('threshold'):
+        image = adaptive_threshold(
+            image,
+            radius=options.get('threshold_radius', 15),
+            offset=options.get('threshold_offset', 10)
+        )
+        if options.get('crop'):
+            image = crop_to_text(image, margin=options.get('crop_margin', 20))
+
+    return image
+
+def load_image(image_bytes):
+    """Open uploaded image bytes as a PIL image.
+
+    Decoding is left to preprocess(), which can ask for a reduced size.
+    """
+    return Image.open(io.BytesIO(image_bytes))
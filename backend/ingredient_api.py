@@ -1,201 +1,138 @@
 from flask import Blueprint, jsonify, request
-from ingredient_scraper import IngredientAnalyzer, EWGScraper
+from ingredient_resolver import IngredientResolver
+from ingredient_store import IngredientStore
+from database_snapshot import SnapshotHolder
+from ewg_refresh import EWGRefreshWorker, is_stale, apply_ewg_data
+from ewg_scraper import EWGScraper
+from ewg_cache import EWGCache, EWG_CACHE_PATH
+from app_logging import get_logger
 import threading
-import time
-import json
 import os
-import requests
-from bs4 import BeautifulSoup
 from threading import Thread
-import random
-from datetime import datetime
+
+logger = get_logger(__name__)
 
 ingredient_api = Blueprint('ingredient_api', __name__)
-analyzer = IngredientAnalyzer()
-ewg_scraper = EWGScraper()
+store = IngredientStore()
 
-def scrape_ewg_data(ingredient_name):
-    """Scrape ingredient data from EWG's Skin Deep database."""
-    try:
-        # Format the search URL
-        search_url = f"https://www.ewg.org/skindeep/search/?search={ingredient_name.replace(' ', '+')}"
-        
-        # Add headers to mimic browser request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-        
-        # Make request with delay to respect rate limits
-        time.sleep(random.uniform(1, 3))
-        response = requests.get(search_url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find ingredient data
-        ingredient_data = {
-            'name': ingredient_name,
-            'score': None,
-            'hazard_score': None,
-            'concerns': [],
-            'found_in': [],
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        # Extract hazard score (0-10)
-        hazard_element = soup.find('div', class_='hazard-score')
-        if hazard_element:
-            ingredient_data['hazard_score'] = int(hazard_element.text.strip())
-        
-        # Extract health concerns
-        concerns = soup.find_all('div', class_='health-concerns')
-        if concerns:
-            ingredient_data['concerns'] = [c.text.strip() for c in concerns]
-        
-        # Extract product types
-        products = soup.find_all('div', class_='product-types')
-        if products:
-            ingredient_data['found_in'] = [p.text.strip() for p in products]
-        
-        return ingredient_data
-        
-    except Exception as e:
-        print(f"Error scraping EWG data for {ingredient_name}: {e}")
-        return None
+# Current database version; reloaded in the background when the store changes
+snapshots = SnapshotHolder(store, interval=float(os.environ.get('DB_RELOAD_INTERVAL', 5)))
+analyzer = snapshots.current.analyzer
+ewg_scraper = EWGScraper(cache=EWGCache(
+    EWG_CACHE_PATH,
+    ttl=float(os.environ.get('EWG_CACHE_TTL', 7 * 86400)),
+    max_bytes=int(os.environ.get('EWG_CACHE_MAX_BYTES', 50 * 1024 * 1024)),
+    max_results=int(os.environ.get('EWG_CACHE_MAX_RESULTS', 10000))
+))
 
-def merge_ewg_data():
-    """Periodically update database with EWG data."""
-    try:
-        # Use absolute path
-        db_path = os.path.join(os.path.dirname(__file__), 'toxic_chemicals_database.json')
-        
-        # Create file if it doesn't exist
-        if not os.path.exists(db_path):
-            initial_data = {
-                "harmful_ingredients": {},
-                "safe_alternatives": {},
-                "toxicity_categories": {}
-            }
-            with open(db_path, 'w') as f:
-                json.dump(initial_data, f, indent=4)
-        
-        # Load current database
-        with open(db_path, 'r') as f:
-            database = json.load(f)
-        
-        # Track updates
-        updates_made = False
-        
-        # Update harmful ingredients with EWG data
-        for ingredient_name in database['harmful_ingredients'].keys():
-            if 'ewg_last_updated' not in database['harmful_ingredients'][ingredient_name] or \
-               (datetime.now() - datetime.fromisoformat(database['harmful_ingredients'][ingredient_name]['ewg_last_updated'])).days > 7:
-                
-                print(f"Updating EWG data for {ingredient_name}...")
-                ewg_data = scrape_ewg_data(ingredient_name)
-                
-                if ewg_data:
-                    database['harmful_ingredients'][ingredient_name].update({
-                        'ewg_score': ewg_data['hazard_score'],
-                        'ewg_concerns': ewg_data['concerns'],
-                        'ewg_found_in': ewg_data['found_in'],
-                        'ewg_last_updated': ewg_data['last_updated']
-                    })
-                    updates_made = True
-                
-                # Add delay between requests
-                time.sleep(random.uniform(2, 5))
-        
-        # Save updated database if changes were made
-        if updates_made:
-            with open(db_path, 'w') as f:
-                json.dump(database, f, indent=4)
-            print("Database updated with EWG data")
-            
-        return True
-        
-    except Exception as e:
-        print(f"Error updating EWG data: {e}")
-        return False
+# Shared, cached ingredient lookups for the API, the app and the classifier
+resolver = IngredientResolver(
+    analyzer,
+    maxsize=int(os.environ.get('RESOLVER_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('RESOLVER_CACHE_TTL', 3600))
+)
+analyzer.resolver = resolver
+
+def update_ewg_data(updates):
+    """Apply scraped EWG data to the stored ingredients in one transaction.
+    
+    Each entry is re-read inside the transaction, so changes committed by
+    other workers since the data was scraped are kept. Returns the new
+    database.
+    """
+    with store.transaction():
+        for name, ewg_data in updates.items():
+            info = store.get(name)
+            if info is not None:
+                apply_ewg_data(info, ewg_data)
+                store.upsert(name, info)
+    return store.snapshot()
 
 def load_database():
     """Load the ingredient database."""
     try:
-        db_path = os.path.join(os.path.dirname(__file__), 'toxic_chemicals_database.json')
-        
-        # Create file if it doesn't exist
-        if not os.path.exists(db_path):
-            initial_data = {
-                "harmful_ingredients": {},
-                "safe_alternatives": {},
-                "toxicity_categories": {}
-            }
-            with open(db_path, 'w') as f:
-                json.dump(initial_data, f, indent=4)
-            return {}, {}, {}
-            
-        with open(db_path, 'r') as f:
-            data = json.load(f)
-            return (
-                data.get('harmful_ingredients', {}),
-                data.get('safe_alternatives', {}),
-                data.get('toxicity_categories', {})
-            )
+        return store.snapshot()
     except Exception as e:
-        print(f"Error loading database: {e}")
+        logger.error("Error loading database: %s", e)
         return {}, {}, {}
 
-def save_database(harmful_ingredients, safe_alternatives, toxicity_categories):
-    """Save the database to file."""
+def save_database(harmful_ingredients, safe_alternatives, toxicity_categories, expected_version=None):
+    """Save the database, writing only the entries that changed.
+    
+    Pass the version the data was read at (store.versioned_snapshot()) to
+    fail instead of overwriting concurrent changes.
+    """
     try:
-        db_path = os.path.join(os.path.dirname(__file__), 'toxic_chemicals_database.json')
-        data = {
-            'harmful_ingredients': harmful_ingredients,
-            'safe_alternatives': safe_alternatives,
-            'toxicity_categories': toxicity_categories
-        }
-        with open(db_path, 'w') as f:
-            json.dump(data, f, indent=4)
-        print("Database saved successfully")
+        store.save(harmful_ingredients, safe_alternatives, toxicity_categories, expected_version)
+        logger.info("Database saved successfully")
         return True
     except Exception as e:
-        print(f"Error saving database: {e}")
+        logger.error("Error saving database: %s", e)
         return False
 
+def _publish_analyzer(snapshot):
+    """Swap in the analyzer of a new snapshot and drop cached lookups."""
+    global analyzer
+    snapshot.analyzer.resolver = resolver
+    resolver.swap(snapshot.analyzer)
+    analyzer = snapshot.analyzer
+
+snapshots.subscribe(_publish_analyzer)
+
+# Background EWG refresh; started by the app, never on the request path
+# Scrapes go through ewg_scraper's pooled session and per-host rate limit
+refresh_worker = EWGRefreshWorker(
+    scrape=ewg_scraper.scrape_ingredient,
+    scrape_many=ewg_scraper.scrape_many,
+    load=load_database,
+    save=save_database,
+    interval=float(os.environ.get('EWG_REFRESH_INTERVAL', 86400)),
+    initial_delay=float(os.environ.get('EWG_REFRESH_INITIAL_DELAY', 30)),
+    rate=None,
+    lookup=ewg_scraper.scrape_ingredient,
+    update=update_ewg_data,
+    exclusive=store.exclusive
+)
+# Pick up our own refreshes right away instead of at the next poll
+refresh_worker.subscribe(lambda *database: snapshots.check())
+
 @ingredient_api.route('/ingredient/<name>', methods=['GET'])
 def get_ingredient_info(name):
-    """Get detailed information about a specific ingredient"""
+    """Get detailed information about a specific ingredient.
+    
+    Answers from local data only (stale-while-revalidate): `fresh` is False
+    when the EWG data is missing or out of date, in which case the
+    ingredient is queued for a background refresh.
+    """
     try:
         # First check our main database
-        result = analyzer._check_ingredient(name)
+        resolution = resolver.resolve(name)
+        result = resolution['match']
         if result['is_harmful']:
-            return jsonify(result)
-        
-        # If not found, try EWG database
-        ewg_data = ewg_scraper.scrape_ingredient(name)
+            fresh = not is_stale(resolution['info'] or {})
+            if not fresh:
+                refresh_worker.enqueue(result['matched_name'])
+            return jsonify(dict(result, fresh=fresh))
+        
+        # If not found, use cached EWG data
+        ewg_data, fresh = ewg_scraper.get_cached_entry(name)
+        if not fresh:
+            refresh_worker.enqueue(name)
         if ewg_data:
-            # Add to our database if hazardous
-            if int(ewg_data.get('hazard_score', 0)) >= 6:
-                merge_ewg_data()  # This will add the new ingredient
-                # Recheck our database
-                result = analyzer._check_ingredient(name)
-                return jsonify(result)
-            
             # Return EWG data even if not hazardous
             return jsonify({
                 'is_harmful': False,
                 'ewg_data': ewg_data,
                 'score': int(ewg_data.get('hazard_score', 0)),
-                'concerns': ewg_data.get('concerns', [])
+                'concerns': ewg_data.get('concerns', []),
+                'fresh': fresh
             })
             
         return jsonify({
             'is_harmful': False,
             'message': 'Ingredient not found in any database',
-            'score': 0
+            'score': 0,
+            'fresh': fresh
         })
     except Exception as e:
         return jsonify({'error': str(e), 'score': 0}), 500
@@ -238,9 +175,9 @@ def analyze_ingredients():
         # Use our main analyzer
         analysis = analyzer.analyze_ingredients(ingredients_text)
         
-        # Enhance with EWG data
+        # Enhance with cached EWG data; never scrape on the request path
         for ingredient in analysis['harmful_ingredients']:
-            ewg_data = ewg_scraper.scrape_ingredient(ingredient['ingredient'])
+            ewg_data = ewg_scraper.get_cached(ingredient['ingredient'])
             if ewg_data:
                 ingredient['ewg_data'] = ewg_data
         
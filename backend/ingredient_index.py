@@ -0,0 +1,106 @@
+from collections import Counter, namedtuple
+from types import MappingProxyType
+
+# One searchable form of a harmful ingredient (its own name or an alternative)
+NameForm = namedtuple('NameForm', ['normalized', 'lower', 'tags', 'parts'])
+
+# A harmful ingredient with every form it can be matched by
+IndexEntry = namedtuple('IndexEntry', [
+    'position', 'name', 'info', 'primary', 'alternatives', 'name_tags', 'has_family'
+])
+
+class NGramIndex:
+    """Inverted index from character n-grams to the texts containing them.
+
+    Postings keep the n-gram count of each text, so a query gets back, for
+    every text sharing at least one n-gram, the number of (query position,
+    text position) pairs with an identical n-gram.
+    """
+
+    def __init__(self, texts, n=3):
+        self.n = n
+        postings = {}
+        for key, text in enumerate(texts):
+            for gram, count in self._grams(text).items():
+                postings.setdefault(gram, []).append((key, count))
+        self.postings = MappingProxyType({gram: tuple(keys) for gram, keys in postings.items()})
+
+    def _grams(self, text):
+        return Counter(text[i:i + self.n] for i in range(len(text) - self.n + 1))
+
+    def candidates(self, query):
+        """Return (key, shared pair count) for texts sharing an n-gram, by key."""
+        shared = {}
+        for gram, count in self._grams(query).items():
+            for key, text_count in self.postings.get(gram, ()):
+                shared[key] = shared.get(key, 0) + count * text_count
+        return sorted(shared.items())
+
+class IngredientIndex:
+    """Immutable lookup structures over the harmful ingredient database.
+
+    Everything the matching stages of IngredientAnalyzer need is computed
+    once here: normalized names, compound parts, chemical pattern tags,
+    chemical-family flags and alternative-name back-references. Matching an
+    input ingredient then only reads precomputed data.
+    """
+
+    def __init__(self, harmful_ingredients, normalize, tag, variation_patterns, families):
+        entries = []
+        exact = {}
+        for position, (name, info) in enumerate(harmful_ingredients.items()):
+            primary = self._form(name, normalize, tag)
+            alternatives = tuple(
+                self._form(alt, normalize, tag) for alt in info.get('alternative_names', [])
+            )
+            entry = IndexEntry(
+                position=position,
+                name=name,
+                info=info,
+                primary=primary,
+                alternatives=alternatives,
+                name_tags=tag(name),
+                has_family=any(family in name.lower() for family in families)
+            )
+            entries.append(entry)
+
+            # First form wins, matching the order of a linear scan
+            exact.setdefault(primary.normalized, (entry, False))
+            for alt in alternatives:
+                exact.setdefault(alt.normalized, (entry, True))
+
+        self.entries = tuple(entries)
+        self.exact = MappingProxyType(exact)
+
+        # Every matchable form in scan order, with a trigram index over them
+        self.forms = tuple(
+            (entry, form) for entry in self.entries
+            for form in (entry.primary,) + entry.alternatives
+        )
+        self.ngrams = NGramIndex([form.normalized for _, form in self.forms], n=3)
+
+        # Entries whose name or an alternative contains both tokens of a
+        # prefix/suffix pair, in database order
+        variations = {}
+        for prefix, suffixes in variation_patterns.items():
+            for suffix in suffixes:
+                variations[(prefix, suffix)] = tuple(
+                    entry for entry in self.entries
+                    if (prefix in entry.primary.lower and suffix in entry.primary.lower) or
+                    any(prefix in alt.lower and suffix in alt.lower for alt in entry.alternatives)
+                )
+        self.variations = MappingProxyType(variations)
+
+    @staticmethod
+    def _form(name, normalize, tag):
+        normalized = normalize(name)
+        parts = frozenset(normalized.split('-'))
+        return NameForm(
+            normalized=normalized,
+            lower=name.lower(),
+            tags=tag(normalized),
+            parts=parts if len(parts) > 1 else None
+        )
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,117 @@
+import re
+import shlex
+import statistics
+from PIL import Image
+
+# OCR modes: 'full' reads the whole label, 'ingredients' locates the
+# ingredient list first and reads only that region
+OCR_MODES = ('full', 'ingredients')
+
+# The ingredient list is one block of running text: --psm 6 treats the crop
+# as a single uniform block, and the whitelist keeps tesseract from
+# "reading" logos, barcodes and symbols as stray punctuation
+INGREDIENT_CHARACTERS = (
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+    ",.;:()[]-/%&'+*"
+)
+# Quoted: both parse_config and pytesseract shlex.split the config, and the
+# whitelist contains an apostrophe
+INGREDIENTS_CONFIG = '--psm 6 -c ' + shlex.quote(f'tessedit_char_whitelist={INGREDIENT_CHARACTERS}')
+
+# Layout analysis only needs word positions, so it runs on a smaller copy
+DETECTION_MAX_SIDE = 1000
+
+HEADING_PATTERN = re.compile(r'\b(ingr[eé]dients?|ingredientes|inci)\b', re.IGNORECASE)
+# Sections that usually follow the ingredient list on a label
+STOP_PATTERN = re.compile(
+    r'^\W*(directions|how to use|usage|warnings?|caution|precautions|storage|'
+    r'made in|manufactured|distributed|net (wt|weight|contents)|keep out)\b',
+    re.IGNORECASE
+)
+
+def group_lines(words):
+    """Group image_to_data words into text lines in reading order."""
+    lines = {}
+    for word in words:
+        key = (word['block'], word['par'], word['line'])
+        line = lines.get(key)
+        right = word['left'] + word['width']
+        bottom = word['top'] + word['height']
+        if line is None:
+            lines[key] = {
+                'text': word['text'],
+                'block': word['block'],
+                'left': word['left'],
+                'top': word['top'],
+                'right': right,
+                'bottom': bottom
+            }
+        else:
+            line['text'] += ' ' + word['text']
+            line['left'] = min(line['left'], word['left'])
+            line['top'] = min(line['top'], word['top'])
+            line['right'] = max(line['right'], right)
+            line['bottom'] = max(line['bottom'], bottom)
+    return [lines[key] for key in sorted(lines)]
+
+def find_ingredients_region(words, margin=10):
+    """Bounding box (left, top, right, bottom) of the ingredient list, or None.
+
+    Starts at the line holding the "Ingredients" heading and takes the
+    lines below it until the next section heading, a large vertical gap or
+    a line that does not overlap the column of text collected so far.
+    """
+    lines = group_lines(words)
+    start = next((i for i, line in enumerate(lines) if HEADING_PATTERN.search(line['text'])), None)
+    if start is None:
+        return None
+
+    heading = lines[start]
+    line_height = statistics.median(line['bottom'] - line['top'] for line in lines) or 1
+    region = dict(heading)
+    for line in lines[start + 1:]:
+        if STOP_PATTERN.search(line['text']):
+            break
+        if line['top'] < heading['top']:
+            # Text beside or above the heading, e.g. another column
+            continue
+        if line['top'] - region['bottom'] > 2 * line_height:
+            break
+        if line['right'] < region['left'] or line['left'] > region['right']:
+            continue
+        region['left'] = min(region['left'], line['left'])
+        region['right'] = max(region['right'], line['right'])
+        region['bottom'] = max(region['bottom'], line['bottom'])
+
+    return (
+        max(0, region['left'] - margin),
+        max(0, region['top'] - margin),
+        region['right'] + margin,
+        region['bottom'] + margin
+    )
+
+def ocr_ingredients(image, backend, config=INGREDIENTS_CONFIG, fallback_config=''):
+    """OCR only the ingredient list of a label image.
+
+    Falls back to reading the whole image when no "Ingredients" heading
+    is found.
+    """
+    small = image
+    if max(image.size) > DETECTION_MAX_SIDE:
+        small = image.copy()
+        small.thumbnail((DETECTION_MAX_SIDE, DETECTION_MAX_SIDE), Image.Resampling.BILINEAR)
+
+    region = find_ingredients_region(backend.image_to_data(small))
+    if region is None:
+        return backend.image_to_string(image, config=fallback_config)
+
+    scale_x = image.width / small.width
+    scale_y = image.height / small.height
+    left, top, right, bottom = region
+    box = (
+        int(left * scale_x),
+        int(top * scale_y),
+        min(image.width, int(right * scale_x) + 1),
+        min(image.height, int(bottom * scale_y) + 1)
+    )
+    return backend.image_to_string(image.crop(box), config=config)
@@ -0,0 +1,110 @@
+import threading
+from cache import LRUCache
+
+# Known safe ingredients with benefits
+KNOWN_SAFE_INGREDIENTS = {
+    'diethylamino hydroxybenzoyl hexyl benzoate': {
+        'benefits': ['UV protection', 'Skin protection'],
+        'common_uses': ['Sunscreens', 'Daily moisturizers'],
+        'safety_notes': 'FDA approved UV filter'
+    },
+    'vitamin e': {
+        'benefits': ['Antioxidant', 'Skin conditioning'],
+        'common_uses': ['Anti-aging products', 'Moisturizers'],
+        'safety_notes': 'Essential vitamin for skin health'
+    },
+    'aloe vera': {
+        'benefits': ['Soothing', 'Moisturizing', 'Anti-inflammatory'],
+        'common_uses': ['Skin care', 'After-sun care'],
+        'safety_notes': 'Natural plant extract'
+    },
+    # Add more safe ingredients...
+}
+
+class IngredientResolver:
+    """Single, cached lookup path for ingredient names.
+
+    Resolves a name against the known safe table first and then the
+    IngredientAnalyzer matching cascade. Results are cached by normalized
+    name, so ingredients that appear on nearly every label are resolved
+    once. The app, the ingredient API and the ML classifier all share one
+    instance.
+
+    Each resolution is a dict with:
+        normalized: the cache key
+        source: 'known_safe', 'database' or 'unknown'
+        safe_info: the known safe entry, if any
+        match: the analyzer result (matched_name, score, concerns, ...)
+        info: the full database entry of the matched ingredient, if any
+
+    Resolutions are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, analyzer, known_safe=None, maxsize=4096, ttl=3600):
+        self.analyzer = analyzer
+        self.known_safe = KNOWN_SAFE_INGREDIENTS if known_safe is None else known_safe
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        # Bumped on every swap so results from a replaced analyzer are not cached
+        self.generation = 0
+        self._swap_lock = threading.Lock()
+
+    @staticmethod
+    def normalize(name):
+        """Cache key for an ingredient name."""
+        return ' '.join(name.lower().split())
+
+    def resolve(self, name):
+        """Resolve an ingredient name, using the cache when possible."""
+        key = self.normalize(name)
+        resolution = self.cache.get(key)
+        if resolution is None:
+            generation, analyzer = self.generation, self.analyzer
+            resolution = self._resolve(key, analyzer)
+            with self._swap_lock:
+                if generation == self.generation:
+                    self.cache.set(key, resolution)
+        return resolution
+
+    def _resolve(self, key, analyzer):
+        if key in self.known_safe:
+            return {
+                'normalized': key,
+                'source': 'known_safe',
+                'safe_info': self.known_safe[key],
+                'match': {
+                    'is_harmful': False,
+                    'matched_name': None,
+                    'score': 0,
+                    'concerns': [],
+                    'categories': [],
+                    'found_in': []
+                },
+                'info': None
+            }
+
+        match = analyzer._check_ingredient(key)
+        matched_name = match.get('matched_name')
+        return {
+            'normalized': key,
+            'source': 'database' if match['is_harmful'] else 'unknown',
+            'safe_info': None,
+            'match': match,
+            'info': analyzer.harmful_ingredients.get(matched_name) if matched_name else None
+        }
+
+    def swap(self, analyzer):
+        """Resolve against a new analyzer from now on, dropping cached results."""
+        with self._swap_lock:
+            self.analyzer = analyzer
+            self.generation += 1
+            self.cache.clear()
+
+    def clear(self):
+        """Forget every cached resolution, e.g. after the database changes."""
+        with self._swap_lock:
+            self.generation += 1
+            self.cache.clear()
+
+    def stats(self):
+        """Return cache hit/miss counters."""
+        return self.cache.stats()
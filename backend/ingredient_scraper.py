@@ -1,61 +1,111 @@
-import json
 import re
 from difflib import SequenceMatcher
-import os
+from ingredient_index import IngredientIndex
+from ingredient_store import IngredientStore
+from substring_similarity import SubstringScorer
+from app_logging import get_logger, get_trace_logger
+
+logger = get_logger(__name__)
+# Per-ingredient lines: DEBUG and sampled, so they cost nothing at INFO
+trace = get_trace_logger(__name__)
+
+# Prefix -> suffixes that together identify a chemical variation
+CHEMICAL_VARIATION_PATTERNS = {
+    'methyl': ['paraben', 'siloxane', 'isothiazolinone', 'ether', 'ester'],
+    'ethyl': ['paraben', 'phthalate', 'silicate', 'ether', 'ester'],
+    'propyl': ['paraben', 'phthalate', 'alcohol', 'ester'],
+    'butyl': ['paraben', 'phthalate', 'alcohol', 'ester'],
+    'benzyl': ['alcohol', 'salicylate', 'benzoate', 'paraben'],
+    'phenyl': ['acetate', 'salicylate', 'mercuric', 'paraben'],
+    'sodium': ['lauryl', 'laureth', 'benzoate', 'chloride'],
+    'potassium': ['sorbate', 'benzoate', 'chloride'],
+    'calcium': ['carbonate', 'phosphate', 'chloride'],
+    'zinc': ['oxide', 'pyrithione', 'stearate'],
+    'titanium': ['dioxide', 'oxide'],
+    'aluminum': ['chloride', 'hydroxide', 'oxide', 'stearate']
+}
+
+# Tokens compared by _chemical_tag_score
+CHEMICAL_MATCH_PATTERNS = (
+    'methyl', 'ethyl', 'propyl', 'butyl',
+    'benzyl', 'phenyl', 'sodium', 'potassium',
+    'calcium', 'zinc', 'aluminum', 'titanium',
+    'oxide', 'chloride', 'sulfate', 'phosphate',
+    'acetate', 'benzoate', 'salicylate', 'paraben',
+    'phthalate', 'siloxane', 'glycol'
+)
+
+# Families that trigger the chemical family comparison
+CHEMICAL_FAMILIES = ('phthalate', 'paraben', 'siloxane', 'glycol')
 
 class IngredientAnalyzer:
-    def __init__(self):
-        self.load_database()
+    def __init__(self, store=None, database=None):
+        # Optional shared IngredientResolver used to cache lookups
+        self.resolver = None
+        self.store = store
+        if database is not None:
+            # Already loaded (harmful_ingredients, safe_alternatives, toxicity_categories)
+            self.set_database(*database)
+        else:
+            if self.store is None:
+                self.store = IngredientStore()
+            self.load_database()
 
     def load_database(self):
         try:
-            # Get the absolute path to the database file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            database_path = os.path.join(current_dir, 'toxic_chemicals_database.json')
-            
-            print(f"Loading database from: {database_path}")
+            logger.info("Loading database from: %s", self.store.path)
             
-            with open(database_path, 'r') as f:
-                data = json.load(f)
-                self.harmful_ingredients = data.get('harmful_ingredients', {})
-                self.safe_alternatives = data.get('safe_alternatives', {})
-                self.toxicity_categories = data.get('toxicity_categories', {})
-                print(f"Successfully loaded {len(self.harmful_ingredients)} harmful ingredients from database")
-                print(f"Successfully loaded {len(self.safe_alternatives)} safe alternatives")
-                print(f"Successfully loaded {len(self.toxicity_categories)} toxicity categories")
-        except FileNotFoundError:
-            print(f"Error: Database file not found at {database_path}")
-            self.harmful_ingredients = {}
-            self.safe_alternatives = {}
-            self.toxicity_categories = {}
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in database file at {database_path}")
-            self.harmful_ingredients = {}
-            self.safe_alternatives = {}
-            self.toxicity_categories = {}
+            self.harmful_ingredients, self.safe_alternatives, self.toxicity_categories = self.store.snapshot()
+            logger.info("Loaded %d harmful ingredients, %d safe alternatives, %d toxicity categories",
+                        len(self.harmful_ingredients), len(self.safe_alternatives),
+                        len(self.toxicity_categories))
         except Exception as e:
-            print(f"Error loading database: {str(e)}")
+            logger.error("Error loading database: %s", e)
             self.harmful_ingredients = {}
             self.safe_alternatives = {}
             self.toxicity_categories = {}
+        self.build_index()
 
-    def analyze_ingredients(self, ingredients_text):
-        print("\n=== Starting Ingredient Analysis ===")
-        print(f"Raw text: {ingredients_text}")
+    def set_database(self, harmful_ingredients, safe_alternatives, toxicity_categories):
+        """Replace the database in memory, building the new index first."""
+        self.build_index(harmful_ingredients)
+        self.harmful_ingredients = harmful_ingredients
+        self.safe_alternatives = safe_alternatives
+        self.toxicity_categories = toxicity_categories
+
+    def build_index(self, harmful_ingredients=None):
+        """Precompute the lookup index over harmful_ingredients (default: the current ones)."""
+        self.index = IngredientIndex(
+            self.harmful_ingredients if harmful_ingredients is None else harmful_ingredients,
+            normalize=self._normalize_ingredient_name,
+            tag=self._chemical_tags,
+            variation_patterns=CHEMICAL_VARIATION_PATTERNS,
+            families=CHEMICAL_FAMILIES
+        )
+
+    def iter_analysis(self, ingredients_text):
+        """Yield (ingredient, match) for each cleaned ingredient as it is checked."""
+        logger.debug("Starting ingredient analysis, raw text: %r", ingredients_text)
         
         # Clean and split ingredients
         ingredients_list = self.clean_ingredients(ingredients_text)
-        print(f"\nCleaned ingredients ({len(ingredients_list)}): {ingredients_list}")
         
+        for ingredient in ingredients_list:
+            if self.resolver is not None:
+                result = self.resolver.resolve(ingredient)['match']
+            else:
+                result = self._check_ingredient(ingredient)
+            trace.debug("Analysis result for %s: %s", ingredient, result)
+            yield ingredient, result
+
+    def analyze_ingredients(self, ingredients_text):
         harmful_found = []
         safe_ingredients = []
         categories_found = {}
+        total = 0
         
-        for ingredient in ingredients_list:
-            print(f"\nAnalyzing ingredient: {ingredient}")
-            result = self._check_ingredient(ingredient)
-            print(f"Analysis result: {result}")
-            
+        for ingredient, result in self.iter_analysis(ingredients_text):
+            total += 1
             if result['is_harmful']:
                 harmful_found.append({
                     'ingredient': ingredient,
@@ -65,7 +115,6 @@ class IngredientAnalyzer:
                     'found_in': result['found_in'],
                     'matched_name': result['matched_name']
                 })
-                print(f"Found harmful ingredient: {ingredient} -> {result['matched_name']}")
                 
                 for category in result['categories']:
                     categories_found[category] = categories_found.get(category, 0) + 1
@@ -74,18 +123,15 @@ class IngredientAnalyzer:
                     'ingredient': ingredient,
                     'score': 0
                 })
-                print(f"Ingredient appears safe: {ingredient}")
         
-        print("\n=== Analysis Summary ===")
-        print(f"Total ingredients: {len(ingredients_list)}")
-        print(f"Harmful ingredients: {len(harmful_found)}")
-        print(f"Categories found: {categories_found}")
+        logger.debug("Analysis summary: %d ingredients, %d harmful, categories %s",
+                     total, len(harmful_found), categories_found)
         
         return {
             'harmful_ingredients': harmful_found,
             'safe_ingredients': safe_ingredients,
-            'total_ingredients': len(ingredients_list),
-            'safety_score': self._calculate_safety_score(harmful_found, len(ingredients_list)),
+            'total_ingredients': total,
+            'safety_score': self._calculate_safety_score(harmful_found, total),
             'categories_found': categories_found,
             'category_descriptions': {k: self.toxicity_categories[k] 
                                    for k in categories_found.keys()}
@@ -94,11 +140,10 @@ class IngredientAnalyzer:
     def _check_ingredient(self, ingredient):
         """Enhanced ingredient checking with improved matching accuracy."""
         ingredient_lower = ingredient.lower().strip()
-        print(f"\nChecking ingredient: {ingredient}")
         
         # Step 1: Normalize the ingredient name
         normalized = self._normalize_ingredient_name(ingredient_lower)
-        print(f"Normalized form: {normalized}")
+        trace.debug("Checking ingredient %s (normalized: %s)", ingredient, normalized)
         
         # Step 2: Check exact matches first (including alternative names)
         exact_match = self._check_exact_matches(normalized, ingredient_lower)
@@ -120,7 +165,7 @@ class IngredientAnalyzer:
         if partial_match:
             return partial_match
             
-        print(f"No harmful match found for: {ingredient}")
+        trace.debug("No harmful match found for: %s", ingredient)
         return {
             'is_harmful': False,
             'matched_name': None,
@@ -154,61 +199,37 @@ class IngredientAnalyzer:
 
     def _check_exact_matches(self, normalized, original):
         """Check for exact matches including alternative names."""
-        for harmful_name, info in self.harmful_ingredients.items():
-            harmful_normalized = self._normalize_ingredient_name(harmful_name)
-            
-            # Direct match check
-            if normalized == harmful_normalized:
-                print(f"Found exact match: {original} -> {harmful_name}")
-                return self._create_harmful_result(harmful_name, info)
-            
-            # Check alternative names
-            for alt_name in info.get('alternative_names', []):
-                alt_normalized = self._normalize_ingredient_name(alt_name)
-                if normalized == alt_normalized:
-                    print(f"Found alternative name match: {original} -> {harmful_name}")
-                    return self._create_harmful_result(harmful_name, info)
+        match = self.index.exact.get(normalized)
+        if match:
+            entry, is_alternative = match
+            if is_alternative:
+                trace.debug("Found alternative name match: %s -> %s", original, entry.name)
+            else:
+                trace.debug("Found exact match: %s -> %s", original, entry.name)
+            return self._create_harmful_result(entry.name, entry.info)
         return None
 
     def _check_chemical_variations(self, normalized, original):
         """Enhanced chemical variation checking."""
-        chemical_patterns = {
-            r'methyl': ['paraben', 'siloxane', 'isothiazolinone', 'ether', 'ester'],
-            r'ethyl': ['paraben', 'phthalate', 'silicate', 'ether', 'ester'],
-            r'propyl': ['paraben', 'phthalate', 'alcohol', 'ester'],
-            r'butyl': ['paraben', 'phthalate', 'alcohol', 'ester'],
-            r'benzyl': ['alcohol', 'salicylate', 'benzoate', 'paraben'],
-            r'phenyl': ['acetate', 'salicylate', 'mercuric', 'paraben'],
-            r'sodium': ['lauryl', 'laureth', 'benzoate', 'chloride'],
-            r'potassium': ['sorbate', 'benzoate', 'chloride'],
-            r'calcium': ['carbonate', 'phosphate', 'chloride'],
-            r'zinc': ['oxide', 'pyrithione', 'stearate'],
-            r'titanium': ['dioxide', 'oxide'],
-            r'aluminum': ['chloride', 'hydroxide', 'oxide', 'stearate']
-        }
-        
-        for prefix, suffixes in chemical_patterns.items():
+        for prefix, suffixes in CHEMICAL_VARIATION_PATTERNS.items():
             if prefix in normalized:
                 for suffix in suffixes:
                     if suffix in normalized:
-                        # Search for matching harmful ingredients with higher accuracy
-                        for harmful_name, info in self.harmful_ingredients.items():
-                            harmful_lower = harmful_name.lower()
-                            if (prefix in harmful_lower and suffix in harmful_lower) or \
-                               any(prefix in alt.lower() and suffix in alt.lower() 
-                                   for alt in info.get('alternative_names', [])):
-                                confidence = self._calculate_chemical_match_confidence(
-                                    normalized, harmful_lower, prefix, suffix)
-                                if confidence >= 0.85:  # High confidence threshold
-                                    print(f"Found chemical variation match: {original} -> {harmful_name}")
-                                    return self._create_harmful_result(harmful_name, info)
+                        # Only harmful ingredients indexed under this prefix/suffix pair
+                        for entry in self.index.variations[(prefix, suffix)]:
+                            confidence = self._calculate_chemical_match_confidence(
+                                normalized, entry.primary.lower, prefix, suffix, minimum=0.85)
+                            if confidence >= 0.85:  # High confidence threshold
+                                trace.debug("Found chemical variation match: %s -> %s", original, entry.name)
+                                return self._create_harmful_result(entry.name, entry.info)
         return None
 
-    def _calculate_chemical_match_confidence(self, str1, str2, prefix, suffix):
-        """Calculate confidence score for chemical matches."""
-        # Base similarity
-        base_similarity = SequenceMatcher(None, str1, str2).ratio()
+    def _calculate_chemical_match_confidence(self, str1, str2, prefix, suffix, minimum=None):
+        """Calculate confidence score for chemical matches.
         
+        With a minimum, an upper bound is returned instead as soon as it
+        shows the full score cannot reach that minimum.
+        """
         # Position similarity (prefix and suffix should be in similar positions)
         pos_similarity = 1.0
         pos1_prefix = str1.find(prefix)
@@ -224,6 +245,18 @@ class IngredientAnalyzer:
         # Length similarity
         len_similarity = 1 - (abs(len(str1) - len(str2)) / max(len(str1), len(str2)))
         
+        # Base similarity, bounded by the cheap quick ratios first
+        matcher = SequenceMatcher(None, str1, str2)
+        if minimum is not None:
+            for bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+                base_similarity = bound()
+                confidence = (base_similarity * 0.4 + 
+                              pos_similarity * 0.4 + 
+                              len_similarity * 0.2)
+                if confidence < minimum:
+                    return confidence
+        base_similarity = matcher.ratio()
+        
         # Combined score with weights
         confidence = (base_similarity * 0.4 + 
                      pos_similarity * 0.4 + 
@@ -233,77 +266,110 @@ class IngredientAnalyzer:
 
     def _check_compound_ingredient(self, normalized, original):
         """Enhanced compound ingredient checking."""
+        has_family = any(family in normalized for family in CHEMICAL_FAMILIES)
+        tags = self._chemical_tags(normalized)
+        
         # Check for compound ingredients with multiple parts
-        for harmful_name, info in self.harmful_ingredients.items():
-            harmful_parts = set(self._normalize_ingredient_name(harmful_name).split('-'))
-            
+        for entry in self.index.entries:
             # Check if all parts of the harmful ingredient are in the normalized name
-            if len(harmful_parts) > 1 and all(part in normalized for part in harmful_parts):
-                print(f"Found compound match: {original} -> {harmful_name}")
-                return self._create_harmful_result(harmful_name, info)
+            parts = entry.primary.parts
+            if parts and all(part in normalized for part in parts):
+                trace.debug("Found compound match: %s -> %s", original, entry.name)
+                return self._create_harmful_result(entry.name, entry.info)
             
             # Check compound alternative names
-            for alt_name in info.get('alternative_names', []):
-                alt_parts = set(self._normalize_ingredient_name(alt_name).split('-'))
-                if len(alt_parts) > 1 and all(part in normalized for part in alt_parts):
-                    print(f"Found compound alternative match: {original} -> {harmful_name}")
-                    return self._create_harmful_result(harmful_name, info)
+            for alt in entry.alternatives:
+                if alt.parts and all(part in normalized for part in alt.parts):
+                    trace.debug("Found compound alternative match: %s -> %s", original, entry.name)
+                    return self._create_harmful_result(entry.name, entry.info)
                 
             # Check for chemical family matches
-            if any(family in normalized for family in ['phthalate', 'paraben', 'siloxane', 'glycol']):
-                if any(family in harmful_name.lower() for family in ['phthalate', 'paraben', 'siloxane', 'glycol']):
-                    chemical_match_score = self._calculate_chemical_match_score(normalized, harmful_name)
-                    if chemical_match_score >= 0.8:  # High confidence threshold
-                        print(f"Found chemical family match: {original} -> {harmful_name}")
-                        return self._create_harmful_result(harmful_name, info)
+            if has_family and entry.has_family:
+                chemical_match_score = self._chemical_tag_score(tags, entry.name_tags)
+                if chemical_match_score >= 0.8:  # High confidence threshold
+                    trace.debug("Found chemical family match: %s -> %s", original, entry.name)
+                    return self._create_harmful_result(entry.name, entry.info)
         
         return None
 
     def _check_partial_matches(self, normalized, original):
         """Enhanced partial matching with improved accuracy."""
         best_match = None
+        best_position = None
         highest_confidence = 0.75  # Minimum confidence threshold
-        
-        for harmful_name, info in self.harmful_ingredients.items():
-            harmful_normalized = self._normalize_ingredient_name(harmful_name)
+        tags = self._chemical_tags(normalized)
+        scorer = SubstringScorer(normalized)
+        
+        # Names sharing no trigram have no common substring or chemical
+        # pattern and so score at most 0.5; only trigram candidates can pass.
+        candidates = []
+        for position, shared in self.index.ngrams.candidates(normalized):
+            bound = self._match_confidence_bound(normalized, self.index.forms[position][1], tags, shared)
+            if bound > highest_confidence:
+                candidates.append((bound, position))
+        
+        # Most promising first; the earliest name wins ties, as in a linear scan
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        for bound, position in candidates:
+            if bound < highest_confidence:
+                break
+            if bound == highest_confidence and position > best_position:
+                continue
             
-            # Calculate match confidence
-            confidence = self._calculate_match_confidence(normalized, harmful_normalized)
+            entry, form = self.index.forms[position]
+            confidence = self._calculate_match_confidence(
+                normalized, form.normalized, tags, form.tags, scorer, minimum=highest_confidence)
             
-            if confidence > highest_confidence:
+            if confidence > highest_confidence or \
+               (confidence == highest_confidence and best_position is not None and position < best_position):
                 highest_confidence = confidence
-                best_match = (harmful_name, info)
-                
-            # Check alternative names
-            for alt_name in info.get('alternative_names', []):
-                alt_normalized = self._normalize_ingredient_name(alt_name)
-                confidence = self._calculate_match_confidence(normalized, alt_normalized)
-                
-                if confidence > highest_confidence:
-                    highest_confidence = confidence
-                    best_match = (harmful_name, info)
+                best_match = entry
+                best_position = position
         
         if best_match:
-            print(f"Found partial match with {highest_confidence:.2f} confidence: {original} -> {best_match[0]}")
-            return self._create_harmful_result(best_match[0], best_match[1])
+            trace.debug("Found partial match with %.2f confidence: %s -> %s",
+                        highest_confidence, original, best_match.name)
+            return self._create_harmful_result(best_match.name, best_match.info)
             
         return None
 
-    def _calculate_match_confidence(self, str1, str2):
-        """Calculate the confidence score for partial matches."""
+    def _calculate_match_confidence(self, str1, str2, tags1=None, tags2=None, scorer=None, minimum=None):
+        """Calculate the confidence score for partial matches.
+        
+        Callers comparing one name against many can pass the precomputed
+        chemical tags and a SubstringScorer built for str1. With a minimum,
+        an upper bound below it is returned as soon as the sequence ratio
+        bounds show the score cannot reach it.
+        """
         # Length difference penalty
         length_diff = abs(len(str1) - len(str2)) / max(len(str1), len(str2))
         length_score = 1 - length_diff
         
-        # Sequence matcher similarity
-        sequence_score = SequenceMatcher(None, str1, str2).ratio()
-        
         # Common substring score
-        common_substrings = self._find_common_substrings(str1, str2)
-        substring_score = sum(len(s) for s in common_substrings) / max(len(str1), len(str2))
+        if scorer is None:
+            scorer = SubstringScorer(str1)
+        substring_score = scorer.score(str2)
         
         # Chemical pattern score
-        chemical_score = self._calculate_chemical_match_score(str1, str2)
+        if tags1 is None:
+            tags1 = self._chemical_tags(str1)
+        if tags2 is None:
+            tags2 = self._chemical_tags(str2)
+        chemical_score = self._chemical_tag_score(tags1, tags2)
+        
+        # Sequence matcher similarity, bounded by the cheap quick ratios first
+        matcher = SequenceMatcher(None, str1, str2)
+        if minimum is not None:
+            for bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+                confidence = (
+                    length_score * 0.2 +
+                    bound() * 0.3 +
+                    substring_score * 0.2 +
+                    chemical_score * 0.3
+                )
+                if confidence < minimum:
+                    return confidence
+        sequence_score = matcher.ratio()
         
         # Weighted average of all scores
         confidence = (
@@ -315,52 +381,42 @@ class IngredientAnalyzer:
         
         return confidence
 
-    def _calculate_chemical_match_score(self, str1, str2):
-        """Calculate similarity score based on chemical patterns."""
-        chemical_patterns = [
-            r'methyl', r'ethyl', r'propyl', r'butyl',
-            r'benzyl', r'phenyl', r'sodium', r'potassium',
-            r'calcium', r'zinc', r'aluminum', r'titanium',
-            r'oxide', r'chloride', r'sulfate', r'phosphate',
-            r'acetate', r'benzoate', r'salicylate', r'paraben',
-            r'phthalate', r'siloxane', r'glycol'
-        ]
-        
+    def _match_confidence_bound(self, normalized, form, tags, shared_trigrams):
+        """Upper bound of _calculate_match_confidence from index data alone.
+        
+        The sequence ratio is bounded by SequenceMatcher.real_quick_ratio and
+        the common-substring total by min length * shared trigram pairs,
+        since no longer common substring can occur more often than its
+        trigrams do.
+        """
+        len1, len2 = len(normalized), len(form.normalized)
+        longest = max(len1, len2)
+        length_score = 1 - abs(len1 - len2) / longest
+        sequence_bound = 2.0 * min(len1, len2) / (len1 + len2)
+        substring_bound = min(len1, len2) * shared_trigrams / longest
+        chemical_score = self._chemical_tag_score(tags, form.tags)
+        
+        return (
+            length_score * 0.2 +
+            sequence_bound * 0.3 +
+            substring_bound * 0.2 +
+            chemical_score * 0.3
+        )
+
+    def _chemical_tags(self, text):
+        """Return the chemical pattern tokens contained in a name."""
+        return frozenset(pattern for pattern in CHEMICAL_MATCH_PATTERNS if pattern in text)
+
+    def _chemical_tag_score(self, tags1, tags2):
+        """Similarity of two names from their shared chemical pattern tokens."""
         # Count matching patterns
-        matches = sum(1 for pattern in chemical_patterns 
-                     if re.search(pattern, str1) and re.search(pattern, str2))
+        matches = len(tags1 & tags2)
         
         # Calculate score based on matches
         if matches == 0:
             return 0
         return min(1.0, matches * 0.25)  # Cap at 1.0
 
-    def _find_common_substrings(self, str1, str2):
-        """Find all common substrings between two strings."""
-        common = []
-        len1, len2 = len(str1), len(str2)
-        
-        # Create a matrix of matches
-        matrix = [[0] * (len2 + 1) for _ in range(len1 + 1)]
-        longest = 0
-        
-        # Fill the matrix
-        for i in range(len1):
-            for j in range(len2):
-                if str1[i] == str2[j]:
-                    matrix[i + 1][j + 1] = matrix[i][j] + 1
-                    if matrix[i + 1][j + 1] > longest:
-                        longest = matrix[i + 1][j + 1]
-        
-        # Extract common substrings
-        for length in range(longest, 2, -1):  # Only consider substrings of length > 2
-            for i in range(len1 + 1):
-                for j in range(len2 + 1):
-                    if matrix[i][j] == length:
-                        common.append(str1[i - length:i])
-        
-        return common
-
     def _create_harmful_result(self, harmful_name, info):
         """Create a standardized harmful ingredient result."""
         return {
@@ -463,36 +519,39 @@ class IngredientAnalyzer:
 
     def clean_ingredients(self, text):
         """Enhanced ingredient cleaning and parsing."""
-        # Remove common unnecessary text
-        text = re.sub(r'\([^)]*\)', ' ', text)  # Remove content in parentheses
-        text = re.sub(r'\b(may contain|contains|ingredients|ingrédients|composition)\b', ' ', text, flags=re.IGNORECASE)
-        
-        # Replace various separators with commas
-        text = re.sub(r'[;|•|\n|/]', ',', text)
-        
-        # Split by comma and clean each ingredient
-        ingredients = []
-        for ingredient in text.split(','):
-            ingredient = ingredient.strip()
-            if ingredient and len(ingredient) > 1:
-                # Remove percentage numbers
-                ingredient = re.sub(r'\d+(\.\d+)?%', '', ingredient)
-                # Remove special characters but keep hyphens and periods
-                ingredient = re.sub(r'[^\w\s\-\.]', ' ', ingredient)
-                # Remove extra spaces
-                ingredient = ' '.join(ingredient.split())
-                # Remove common prefixes/suffixes
-                ingredient = re.sub(r'^(and|or|with|contains)\s+', '', ingredient, flags=re.IGNORECASE)
-                if ingredient:
-                    ingredients.append(ingredient)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        ingredients = [x for x in ingredients if not (x.lower() in seen or seen.add(x.lower()))]
-        
-        print(f"Found {len(ingredients)} unique ingredients: {ingredients}")  # Debug log
+        ingredients = split_ingredient_list(text)
+        logger.debug("Found %d unique ingredients: %s", len(ingredients), ingredients)
         return ingredients 
 
+def split_ingredient_list(text):
+    """Split an INCI-style ingredient list into unique, cleaned names."""
+    # Remove common unnecessary text
+    text = re.sub(r'\([^)]*\)', ' ', text)  # Remove content in parentheses
+    text = re.sub(r'\b(may contain|contains|ingredients|ingrédients|composition)\b', ' ', text, flags=re.IGNORECASE)
+    
+    # Replace various separators with commas
+    text = re.sub(r'[;|•|\n|/]', ',', text)
+    
+    # Split by comma and clean each ingredient
+    ingredients = []
+    for ingredient in text.split(','):
+        ingredient = ingredient.strip()
+        if ingredient and len(ingredient) > 1:
+            # Remove percentage numbers
+            ingredient = re.sub(r'\d+(\.\d+)?%', '', ingredient)
+            # Remove special characters but keep hyphens and periods
+            ingredient = re.sub(r'[^\w\s\-\.]', ' ', ingredient)
+            # Remove extra spaces
+            ingredient = ' '.join(ingredient.split())
+            # Remove common prefixes/suffixes
+            ingredient = re.sub(r'^(and|or|with|contains)\s+', '', ingredient, flags=re.IGNORECASE)
+            if ingredient:
+                ingredients.append(ingredient)
+    
+    # Remove duplicates while preserving order
+    seen = set()
+    return [x for x in ingredients if not (x.lower() in seen or seen.add(x.lower()))]
+
 class EWGScraper:
     def __init__(self):
         self.ingredients_data = {}
@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from atomic_file import atomic_write, file_lock
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+INGREDIENT_DB_PATH = os.environ.get(
+    'INGREDIENT_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ingredients.sqlite3')
+)
+
+# The JSON database stays the seed data and the import/export format
+INGREDIENT_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'toxic_chemicals_database.json')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS ingredients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    normalized TEXT NOT NULL,
+    score REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingredients_normalized ON ingredients (normalized);
+CREATE INDEX IF NOT EXISTS ingredients_score ON ingredients (score);
+CREATE TABLE IF NOT EXISTS ingredient_categories (
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    PRIMARY KEY (ingredient_id, category)
+);
+CREATE INDEX IF NOT EXISTS ingredient_categories_category ON ingredient_categories (category);
+CREATE TABLE IF NOT EXISTS safe_alternatives (
+    category TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS toxicity_categories (
+    category TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+class VersionConflict(Exception):
+    """The store changed since the version a write was based on."""
+
+def normalize_name(name):
+    """Lookup key for an ingredient name."""
+    return ' '.join(name.lower().split())
+
+class IngredientStore:
+    """SQLite storage for the ingredient database.
+
+    Harmful ingredients are stored one row per ingredient, indexed by
+    normalized name, score and category, so single ingredients can be
+    read and upserted without touching the rest of the database. Row ids
+    keep the original insertion order, which the analyzer's matching
+    depends on. snapshot() returns the same three dicts the JSON file
+    used to hold, read in one transaction.
+
+    An empty store is seeded from toxic_chemicals_database.json, which
+    remains available through import_json/export_json.
+    """
+
+    def __init__(self, path=INGREDIENT_DB_PATH, seed_path=INGREDIENT_JSON_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        if seed_path and os.path.exists(seed_path) and self.is_empty():
+            # Only one process seeds a new store
+            with file_lock(self._lock_path()):
+                if self.is_empty():
+                    logger.info("Seeding ingredient store from: %s", seed_path)
+                    self.import_json(seed_path)
+
+    def _lock_path(self):
+        # An in-memory store is private to this process and needs no lock file
+        return None if self.path == ':memory:' else self.path + '.lock'
+
+    def exclusive(self, blocking=True):
+        """Cross-process lock for jobs that only one process should run at a time.
+
+        Use as `with store.exclusive(blocking=False) as acquired:`.
+        """
+        return file_lock(self._lock_path(), blocking)
+
+    def transaction(self, write=True):
+        """Context manager running the enclosed calls in one transaction.
+
+        Write transactions take SQLite's write lock up front, so they are
+        serialized across threads and processes.
+        """
+        return _Transaction(self, write)
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM ingredients LIMIT 1').fetchone() is None
+
+    def snapshot(self):
+        """Return (harmful_ingredients, safe_alternatives, toxicity_categories)."""
+        return self.versioned_snapshot()[1:]
+
+    def versioned_snapshot(self):
+        """Return (version, harmful_ingredients, safe_alternatives, toxicity_categories)."""
+        with self.transaction(write=False):
+            version = self._version()
+            harmful = self._harmful_ingredients()
+            safe = self._category_table('safe_alternatives')
+            toxicity = self._category_table('toxicity_categories')
+        return version, harmful, safe, toxicity
+
+    def version(self):
+        """Return the store version, bumped by every committed change.
+
+        This is a single-row read, cheap enough to poll before deciding
+        whether a full snapshot is needed.
+        """
+        with self._lock:
+            return self._version()
+
+    def _version(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def harmful_ingredients(self):
+        """Return every harmful ingredient, in insertion order."""
+        with self._lock:
+            return self._harmful_ingredients()
+
+    def _harmful_ingredients(self):
+        rows = self._conn.execute('SELECT name, data FROM ingredients ORDER BY id')
+        return {name: json.loads(data) for name, data in rows}
+
+    def _category_table(self, table):
+        rows = self._conn.execute(f'SELECT category, data FROM {table} ORDER BY rowid')
+        return {category: json.loads(data) for category, data in rows}
+
+    def get(self, name):
+        """Return the entry for an ingredient, matched on its normalized name."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM ingredients WHERE normalized = ? ORDER BY id LIMIT 1',
+                (normalize_name(name),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_category(self, category):
+        """Return the harmful ingredients in a category."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT i.name, i.data FROM ingredients i '
+                'JOIN ingredient_categories c ON c.ingredient_id = i.id '
+                'WHERE c.category = ? ORDER BY i.id', (category,)
+            )
+            return {name: json.loads(data) for name, data in rows}
+
+    def with_min_score(self, min_score):
+        """Return the harmful ingredients scoring at least min_score."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT name, data FROM ingredients WHERE score >= ? ORDER BY id', (min_score,)
+            )
+            return {name: json.loads(data) for name, data in rows}
+
+    def upsert(self, name, info):
+        """Insert or update a single harmful ingredient."""
+        self.upsert_many({name: info})
+
+    def upsert_many(self, ingredients):
+        """Insert or update several harmful ingredients in one transaction.
+
+        Rows whose data did not change are left untouched.
+        """
+        with self.transaction():
+            for name, info in ingredients.items():
+                self._upsert(name, info)
+
+    def _upsert(self, name, info):
+        data = json.dumps(info)
+        row = self._conn.execute('SELECT id, data FROM ingredients WHERE name = ?', (name,)).fetchone()
+        if row and row[1] == data:
+            return
+        if row:
+            ingredient_id = row[0]
+            self._conn.execute(
+                'UPDATE ingredients SET score = ?, data = ? WHERE id = ?',
+                (info.get('score'), data, ingredient_id)
+            )
+            self._conn.execute('DELETE FROM ingredient_categories WHERE ingredient_id = ?', (ingredient_id,))
+        else:
+            ingredient_id = self._conn.execute(
+                'INSERT INTO ingredients (name, normalized, score, data) VALUES (?, ?, ?, ?)',
+                (name, normalize_name(name), info.get('score'), data)
+            ).lastrowid
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO ingredient_categories VALUES (?, ?)',
+            [(ingredient_id, category) for category in info.get('categories', [])]
+        )
+
+    def delete(self, name):
+        """Remove a harmful ingredient; returns whether it existed."""
+        with self.transaction():
+            return self._conn.execute('DELETE FROM ingredients WHERE name = ?', (name,)).rowcount > 0
+
+    def save(self, harmful_ingredients, safe_alternatives, toxicity_categories, expected_version=None):
+        """Make the store match the given database, writing only what changed.
+
+        With expected_version, raises VersionConflict instead of overwriting
+        changes committed since that version was read.
+        """
+        with self.transaction():
+            if expected_version is not None and self._version() != expected_version:
+                raise VersionConflict(
+                    f"store is at version {self._version()}, expected {expected_version}"
+                )
+            existing = [row[0] for row in self._conn.execute('SELECT name FROM ingredients')]
+            self._conn.executemany(
+                'DELETE FROM ingredients WHERE name = ?',
+                [(name,) for name in existing if name not in harmful_ingredients]
+            )
+            for name, info in harmful_ingredients.items():
+                self._upsert(name, info)
+            self._replace_category_table('safe_alternatives', safe_alternatives)
+            self._replace_category_table('toxicity_categories', toxicity_categories)
+
+    def _replace_category_table(self, table, values):
+        if self._category_table(table) == values:
+            return
+        self._conn.execute(f'DELETE FROM {table}')
+        self._conn.executemany(
+            f'INSERT INTO {table} VALUES (?, ?)',
+            [(category, json.dumps(data)) for category, data in values.items()]
+        )
+
+    def import_json(self, path=INGREDIENT_JSON_PATH):
+        """Replace the store's contents with a JSON database file."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.save(
+            data.get('harmful_ingredients', {}),
+            data.get('safe_alternatives', {}),
+            data.get('toxicity_categories', {})
+        )
+
+    def export_json(self, path=INGREDIENT_JSON_PATH):
+        """Atomically write the store to a JSON database file."""
+        harmful, safe, toxicity = self.snapshot()
+        with atomic_write(path) as f:
+            json.dump({
+                'harmful_ingredients': harmful,
+                'safe_alternatives': safe,
+                'toxicity_categories': toxicity
+            }, f, indent=4)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class _Transaction:
+    """Transaction that nests by joining the outermost one.
+
+    A write transaction that changed anything bumps the store version as
+    part of its commit.
+    """
+
+    def __init__(self, store, write=True):
+        self.store = store
+        self.write = write
+        self.outermost = False
+        self.changes = 0
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        conn = self.store._conn
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE' if self.write else 'BEGIN')
+            self.outermost = True
+            self.changes = conn.total_changes
+        return self.store
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.store._conn
+        try:
+            if self.outermost:
+                if exc_type:
+                    conn.execute('ROLLBACK')
+                else:
+                    try:
+                        if conn.total_changes != self.changes:
+                            conn.execute(
+                                "INSERT INTO meta VALUES ('version', '1') ON CONFLICT (key) "
+                                "DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+                            )
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        # e.g. "database is locked": end the transaction, or
+                        # later ones would join it and never commit
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                        raise
+        finally:
+            self.store._lock.release()
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description='Import or export the ingredient database.')
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('path', nargs='?', default=INGREDIENT_JSON_PATH,
+                        help='JSON database file (default: %(default)s)')
+    args = parser.parse_args()
+
+    store = IngredientStore(seed_path=None)
+    if args.command == 'import':
+        store.import_json(args.path)
+        print(f"Imported {len(store.harmful_ingredients())} harmful ingredients from {args.path}")
+    else:
+        store.export_json(args.path)
+        print(f"Exported {len(store.harmful_ingredients())} harmful ingredients to {args.path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import re
+
+# Words that mark a fragment of label text as something other than an
+# ingredient: headings, addresses, company and contact details, quantities
+NON_INGREDIENTS = frozenset({
+    # Common text patterns
+    'ingredients', 'contains', 'may', 'manufactured', 'facility', 'warning',
+    'directions', 'use', 'caution', 'storage', 'keep', 'away', 'children',
+    'safety', 'sealed', 'made', 'distributed', 'product', 'contact', 'email',
+    'website', 'address', 'phone', 'www', 'com', 'road', 'street', 'ltd',
+    'inc', 'limited', 'corporation',
+
+    # Locations and addresses
+    'avenue', 'boulevard', 'lane', 'drive', 'place', 'court', 'circle',
+    'suite', 'floor', 'unit', 'building', 'block',
+
+    # Common business terms
+    'company', 'industries', 'enterprises', 'group', 'international',
+    'worldwide', 'global', 'solutions', 'services',
+
+    # Contact information
+    'tel', 'telephone', 'fax', 'customer', 'service', 'support', 'help',
+    'info', 'us',
+
+    # Measurements and quantities
+    'mg', 'ml', 'oz', 'gram', 'percent', 'daily', 'value',
+
+    # Other non-ingredient terms
+    'best', 'before', 'date', 'batch', 'lot', 'number', 'expiry',
+    'expires', 'packaging'
+})
+
+ADDRESS_SUFFIXES = ('road', 'street', 'ave', 'lane', 'dr', 'blvd')
+
+SEPARATORS = re.compile(r'[,;:()\[\]]')
+# Email addresses, websites and anything with a digit in it (quantities,
+# phone numbers, street numbers, batch codes)
+REJECT = re.compile(r'@|www\.|\.com|^http|\d')
+# Fragments made only of phone-number or percentage symbols
+SYMBOLS_ONLY = re.compile(r'[-+]+|%+')
+
+def is_ingredient(fragment):
+    """True if a stripped, lowercased fragment of label text looks like an ingredient.
+
+    Cheap whole-fragment checks run first; the per-word checks stop at the
+    first word that rules the fragment out.
+    """
+    if len(fragment) <= 2 or REJECT.search(fragment) or SYMBOLS_ONLY.fullmatch(fragment):
+        return False
+    # \d covers decimal digits; superscripts and the like only occur outside ASCII
+    if not fragment.isascii() and any(char.isdigit() for char in fragment):
+        return False
+
+    words = fragment.split()
+    if len(words) > 4:
+        return False
+    for word in words:
+        if (len(word) == 1 or word in NON_INGREDIENTS or word.endswith(ADDRESS_SUFFIXES)
+                or (len(word) > 2 and word.isupper())):
+            return False
+    return True
+
+def iter_ingredients(text):
+    """Yield ingredient candidates from OCR text in label order."""
+    for part in SEPARATORS.split(text.lower()):
+        fragment = part.strip()
+        if is_ingredient(fragment):
+            yield fragment
+
+def normalize_ingredients(ingredients):
+    """Collapse runs of whitespace (OCR line breaks, tabs) to single spaces."""
+    for ingredient in ingredients:
+        yield ' '.join(ingredient.split())
+
+def unique_ingredients(ingredients):
+    """Drop repeats, keeping the first occurrence."""
+    seen = set()
+    for ingredient in ingredients:
+        if ingredient not in seen:
+            seen.add(ingredient)
+            yield ingredient
+
+def iter_label_ingredients(text):
+    """Tokenize, normalize and dedupe: the distinct ingredients on a label."""
+    return unique_ingredients(normalize_ingredients(iter_ingredients(text)))
+
+def extract_ingredients(text):
+    """Return the list of ingredient candidates found in OCR text."""
+    return list(iter_ingredients(text))
@@ -3,17 +3,45 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.metrics import precision_recall_fscore_support, classification_report
 from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import FeatureUnion, Pipeline
+from chemical_features import ChemicalFeatureEngine, ChemicalFeatureTransformer
+from ingredient_store import IngredientStore
+from atomic_file import atomic_write, file_lock
 import numpy as np
+from scipy import sparse
 import joblib
+import hashlib
+import argparse
 import os
 import json
 import re
+from datetime import datetime
+from app_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Known safe ingredient patterns
+SAFE_INGREDIENT_PATTERNS = [
+    re.compile(r'\b(vitamin|mineral)\s+[a-e]\d*\b', re.IGNORECASE),  # Vitamins and minerals
+    re.compile(r'\b(aloe|jojoba|shea|coconut|argan)\b', re.IGNORECASE),  # Natural oils and extracts
+    re.compile(r'\b(glycerin|panthenol|allantoin|hyaluronic acid)\b', re.IGNORECASE),  # Safe synthetics
+    re.compile(r'\b(niacinamide|tocopherol|ceramide)\b', re.IGNORECASE)  # Beneficial ingredients
+]
+
+# Files written to the model directory by save()
+MODEL_ARTIFACTS = ['features.joblib', 'classifier.joblib']
 
 class IngredientMLClassifier:
-    def __init__(self, harmful_ingredients=None, safe_alternatives=None):
+    def __init__(self, harmful_ingredients=None, safe_alternatives=None, resolver=None, store=None):
         self.harmful_ingredients = harmful_ingredients or {}
         self.safe_alternatives = safe_alternatives or {}
         
+        # Ingredient store holding the training database; opened on first use
+        self.store = store
+        
+        # Optional shared IngredientResolver for database lookups
+        self.resolver = resolver
+        
         self.vectorizer = TfidfVectorizer(
             analyzer='char_wb',
             ngram_range=(2, 7),
@@ -90,6 +118,16 @@ class IngredientMLClassifier:
             'ester': r'(acetate|propionate|stearate|palmitate)',
             'number': r'\d+'
         }
+        self.feature_engine = ChemicalFeatureEngine(self.chemical_patterns)
+        
+        # TF-IDF and scaled chemical features, kept sparse end-to-end
+        self.features = FeatureUnion([
+            ('tfidf', self.vectorizer),
+            ('chemical', Pipeline([
+                ('extract', ChemicalFeatureTransformer(self.chemical_patterns)),
+                ('scale', StandardScaler(with_mean=False))
+            ]))
+        ])
         
         # Category-specific confidence thresholds
         self.category_thresholds = {
@@ -101,6 +139,25 @@ class IngredientMLClassifier:
             'sulfate': {'base': 0.6, 'confidence': 0.7},
             'default': {'base': 0.65, 'confidence': 0.75}
         }
+        
+        # Safe ingredients added to the training set alongside the database
+        self.safe_training_ingredients = [
+            "water", "aqua", "glycerin", "aloe vera", "vitamin e",
+            "panthenol", "allantoin", "glycine", "arginine", "olive oil",
+            "jojoba oil", "shea butter", "coconut oil", "almond oil",
+            "hyaluronic acid", "niacinamide", "tocopherol", "xanthan gum",
+            "citric acid", "potassium sorbate", "sodium benzoate",
+            "camellia sinensis leaf extract", "chamomilla recutita extract",
+            "rosa damascena flower water", "lavandula angustifolia oil",
+            "squalane", "beta glucan", "ceramide", "peptide",
+            "sodium hyaluronate", "green tea extract", "centella asiatica",
+            "panthenol", "bisabolol", "allantoin", "madecassoside"
+        ]
+        
+        self.metadata_path = os.path.join(self.model_path, 'metadata.json')
+        self.classifier = None
+        # Fingerprint of the loaded or trained artifacts
+        self.model_fingerprint = None
             
     def _normalize_ingredient(self, text):
         """Enhanced ingredient normalization with better chemical name handling."""
@@ -138,15 +195,12 @@ class IngredientMLClassifier:
             
             return text.strip()
         except Exception as e:
-            print(f"Error in normalization: {e}")
+            logger.error("Error in normalization: %s", e)
             return text
     
     def _extract_chemical_features(self, text):
         """Extract chemical features with pattern matching."""
-        features = {}
-        for name, pattern in self.chemical_patterns.items():
-            features[f'has_{name}'] = 1 if re.search(pattern, text.lower()) else 0
-        return features
+        return self.feature_engine.extract(text)
     
     def _get_ingredient_category(self, features):
         """Determine the primary category of an ingredient based on its features."""
@@ -167,16 +221,10 @@ class IngredientMLClassifier:
     def prepare_data(self):
         """Prepare training data with enhanced feature generation."""
         try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            database_path = os.path.join(current_dir, 'toxic_chemicals_database.json')
-            
-            with open(database_path, 'r') as f:
-                data = json.load(f)
-                harmful_ingredients = data.get('harmful_ingredients', {})
+            harmful_ingredients = self._load_training_database()
             
             X = []  # Ingredient names
             y = []  # Labels
-            additional_features = []  # Chemical features
             
             # Process harmful ingredients
             for name, info in harmful_ingredients.items():
@@ -184,7 +232,6 @@ class IngredientMLClassifier:
                 if normalized_name:
                     X.append(normalized_name)
                     y.append(1)
-                    additional_features.append(self._extract_chemical_features(normalized_name))
                     
                     # Add variations
                     variations = [
@@ -200,50 +247,120 @@ class IngredientMLClassifier:
                         if var and var != normalized_name:
                             X.append(var)
                             y.append(1)
-                            additional_features.append(self._extract_chemical_features(var))
             
             # Add safe ingredients with expanded list
-            safe_ingredients = [
-                "water", "aqua", "glycerin", "aloe vera", "vitamin e",
-                "panthenol", "allantoin", "glycine", "arginine", "olive oil",
-                "jojoba oil", "shea butter", "coconut oil", "almond oil",
-                "hyaluronic acid", "niacinamide", "tocopherol", "xanthan gum",
-                "citric acid", "potassium sorbate", "sodium benzoate",
-                "camellia sinensis leaf extract", "chamomilla recutita extract",
-                "rosa damascena flower water", "lavandula angustifolia oil",
-                "squalane", "beta glucan", "ceramide", "peptide",
-                "sodium hyaluronate", "green tea extract", "centella asiatica",
-                "panthenol", "bisabolol", "allantoin", "madecassoside"
-            ]
-            
-            for ingredient in safe_ingredients:
+            for ingredient in self.safe_training_ingredients:
                 normalized = self._normalize_ingredient(ingredient)
                 if normalized:
                     X.append(normalized)
                     y.append(0)
-                    additional_features.append(self._extract_chemical_features(normalized))
             
-            return X, y, additional_features
+            return X, y
         except Exception as e:
             print(f"Error preparing data: {e}")
-            return [], [], []
+            return [], []
+    
+    def _load_training_database(self):
+        """Read the harmful ingredients used as positive training examples."""
+        if self.store is None:
+            self.store = IngredientStore()
+        return self.store.harmful_ingredients()
+    
+    def fingerprint(self):
+        """Hash everything the trained artifacts depend on.
+        
+        Only the training-relevant part of the database (names and
+        alternative names) is hashed, so EWG refreshes that touch scores or
+        timestamps do not invalidate the model.
+        """
+        try:
+            harmful_ingredients = self._load_training_database()
+        except Exception as e:
+            logger.error("Error reading database for fingerprint: %s", e)
+            harmful_ingredients = {}
+        
+        payload = {
+            'database': {
+                name: sorted(info.get('alternative_names', []))
+                for name, info in harmful_ingredients.items()
+            },
+            'chemical_patterns': self.chemical_patterns,
+            'safe_ingredients': self.safe_training_ingredients,
+            'vectorizer': {k: repr(v) for k, v in self.vectorizer.get_params().items()},
+            'artifacts': MODEL_ARTIFACTS,
+            'param_grid': self.param_grid
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def save(self, best_params=None):
+        """Persist the trained artifacts together with their fingerprint.
+        
+        Each file is replaced atomically and the metadata is written last,
+        so a reader never pairs a half-written model with a new fingerprint.
+        """
+        with atomic_write(os.path.join(self.model_path, 'features.joblib'), 'wb') as f:
+            joblib.dump(self.features, f)
+        with atomic_write(os.path.join(self.model_path, 'classifier.joblib'), 'wb') as f:
+            joblib.dump(self.classifier, f)
+        
+        self.model_fingerprint = self.fingerprint()
+        metadata = {
+            'fingerprint': self.model_fingerprint,
+            'trained_at': datetime.now().isoformat(),
+            'best_params': best_params or {}
+        }
+        with atomic_write(self.metadata_path) as f:
+            json.dump(metadata, f, indent=4)
+    
+    def load(self):
+        """Load persisted artifacts if they match the current fingerprint."""
+        try:
+            if not os.path.exists(self.metadata_path):
+                logger.info("No model metadata found")
+                return False
+            
+            with open(self.metadata_path, 'r') as f:
+                metadata = json.load(f)
+            
+            if metadata.get('fingerprint') != self.fingerprint():
+                logger.info("Model fingerprint does not match database, retraining required")
+                return False
+            
+            features = joblib.load(os.path.join(self.model_path, 'features.joblib'))
+            classifier = joblib.load(os.path.join(self.model_path, 'classifier.joblib'))
+        except Exception as e:
+            logger.error("Error loading model artifacts: %s", e)
+            return False
+        
+        self.features = features
+        self.vectorizer = features.transformer_list[0][1]
+        self.classifier = classifier
+        self.model_fingerprint = metadata['fingerprint']
+        return True
+    
+    def load_or_train(self):
+        """Load persisted artifacts, training only when they are missing or stale.
+        
+        Training holds a lock on the model directory, so when several workers
+        start together one trains and the others load its artifacts.
+        """
+        if self.load():
+            return True
+        with file_lock(os.path.join(self.model_path, '.train.lock')):
+            if self.load():
+                return True
+            print("Training ML model...")
+            return self.train()
             
     def train(self):
         """Train model with enhanced feature engineering and grid search."""
-        X_text, y, additional_features = self.prepare_data()
+        X_text, y = self.prepare_data()
         if not X_text or not y:
             return False
             
-        # Convert text to TF-IDF features
-        X_tfidf = self.vectorizer.fit_transform(X_text)
-        
-        # Convert additional features to array and scale them
-        X_additional = np.array([list(f.values()) for f in additional_features])
-        scaler = StandardScaler()
-        X_additional_scaled = scaler.fit_transform(X_additional)
-        
-        # Combine TF-IDF and additional features
-        X_combined = np.hstack((X_tfidf.toarray(), X_additional_scaled))
+        # TF-IDF and scaled chemical features as one sparse matrix
+        X_combined = self.features.fit_transform(X_text).tocsr()
         y = np.array(y)
         
         # Perform grid search
@@ -276,104 +393,169 @@ class IngredientMLClassifier:
         print(classification_report(y_test, y_pred, target_names=['Safe', 'Harmful']))
         
         # Save models
-        joblib.dump(self.vectorizer, os.path.join(self.model_path, 'vectorizer.joblib'))
-        joblib.dump(self.classifier, os.path.join(self.model_path, 'classifier.joblib'))
-        joblib.dump(scaler, os.path.join(self.model_path, 'scaler.joblib'))
+        self.save(grid_search.best_params_)
         
         return True
         
     def predict(self, ingredient):
         """Enhanced prediction with better accuracy and safety checks."""
-        try:
-            normalized = self._normalize_ingredient(ingredient)
-            if not normalized or len(normalized) <= 1:
-                return None
+        return self.predict_many([ingredient])[0]
 
-            # Known safe ingredient patterns
-            safe_patterns = [
-                r'\b(vitamin|mineral)\s+[a-e]\d*\b',  # Vitamins and minerals
-                r'\b(aloe|jojoba|shea|coconut|argan)\b',  # Natural oils and extracts
-                r'\b(glycerin|panthenol|allantoin|hyaluronic acid)\b',  # Safe synthetics
-                r'\b(niacinamide|tocopherol|ceramide)\b'  # Beneficial ingredients
-            ]
-            
-            # Check for safe patterns first
-            for pattern in safe_patterns:
-                if re.search(pattern, normalized, re.IGNORECASE):
-                    return {
-                        'is_harmful': False,
-                        'confidence': 1.0,
-                        'ingredient': ingredient,
-                        'category': 'safe ingredients',
-                        'chemical_score': 0
-                    }
+    def predict_many(self, ingredients):
+        """Predict a list of ingredients with a single vectorizer and forest call.
+        
+        Returns one entry per input, in order, shaped exactly like predict()
+        (None for names that are empty or could not be scored).
+        """
+        results = [None] * len(ingredients)
+        pending = []  # (index, ingredient, normalized) still needing the model
+        
+        for index, ingredient in enumerate(ingredients):
+            try:
+                normalized = self._normalize_ingredient(ingredient)
+                if not normalized or len(normalized) <= 1:
+                    continue
+                
+                known = self._predict_known(ingredient, normalized)
+                if known:
+                    results[index] = known
+                else:
+                    pending.append((index, ingredient, normalized))
+            except Exception as e:
+                logger.error("Error in prediction: %s", e)
+        
+        if not pending:
+            return results
+        
+        try:
+            # ML-based prediction for unknown ingredients
+            normalized_names = [normalized for _, _, normalized in pending]
+            X_additional, X_combined = self._transform(normalized_names)
+            
+            # One forest pass; the predicted class is the most probable one
+            probabilities = self.classifier.predict_proba(X_combined)
+            predictions = self.classifier.classes_[probabilities.argmax(axis=1)]
+            
+            for (index, ingredient, _), vector, pred, prob in zip(
+                    pending, X_additional, predictions, probabilities):
+                features = dict(zip(self.feature_engine.feature_names, vector))
+                risk_score = self._chemical_risk_score(features)
+                confidence = float(max(prob))
+                
+                # More conservative approach to harmful classification
+                is_harmful = (pred == 1 and confidence > 0.8) or risk_score >= 3
+                
+                results[index] = {
+                    'is_harmful': bool(is_harmful),
+                    'confidence': confidence,
+                    'ingredient': ingredient,
+                    'category': self._get_ingredient_category(features),
+                    'chemical_score': risk_score,
+                    'is_chemical': bool(features.get('has_chemical_suffix', 0) or 
+                                      features.get('has_chemical_prefix', 0))
+                }
+        except Exception as e:
+            logger.error("Error in prediction: %s", e)
+        
+        return results
 
-            # Check database for known harmful ingredients
-            compound_matches = []
-            for harmful in self.harmful_ingredients.keys():
-                if harmful in normalized or normalized in harmful:
-                    compound_matches.append(harmful)
+    def _transform(self, names):
+        """Return (raw chemical features, model input) for a batch of names.
+        
+        Equivalent to self.features.transform(names), but the chemical
+        features are computed once and reused for both outputs instead of
+        being recomputed inside the FeatureUnion.
+        """
+        X_additional = self.feature_engine.transform(names)
+        tfidf = self.features.transformer_list[0][1]
+        scale = self.features.transformer_list[1][1].named_steps['scale']
+        X_chemical = scale.transform(sparse.csr_matrix(X_additional, dtype=np.float64))
+        X_combined = sparse.hstack([tfidf.transform(names), X_chemical]).tocsr()
+        return X_additional, X_combined
 
-            # If found in harmful ingredients database
-            if compound_matches:
-                highest_score = 0
-                matched_ingredient = None
-                
-                for match in compound_matches:
-                    info = self.harmful_ingredients[match]
-                    if info['score'] > highest_score:
-                        highest_score = info['score']
-                        matched_ingredient = match
+    def _predict_known(self, ingredient, normalized):
+        """Resolve safe patterns and database matches without the model."""
+        # Check for safe patterns first
+        for pattern in SAFE_INGREDIENT_PATTERNS:
+            if pattern.search(normalized):
+                return {
+                    'is_harmful': False,
+                    'confidence': 1.0,
+                    'ingredient': ingredient,
+                    'category': 'safe ingredients',
+                    'chemical_score': 0
+                }
 
-                if matched_ingredient and highest_score >= 7:  # Only if score is high enough
-                    return {
-                        'is_harmful': True,
-                        'confidence': 1.0,
-                        'ingredient': ingredient,
-                        'matched_name': matched_ingredient,
-                        'category': self.harmful_ingredients[matched_ingredient]['categories'][0],
-                        'chemical_score': highest_score,
-                        'concerns': self.harmful_ingredients[matched_ingredient]['concerns']
-                    }
+        # Prefer the shared, cached resolver over scanning the database
+        if self.resolver is not None:
+            return self._predict_resolved(ingredient)
+        
+        # Check database for known harmful ingredients
+        compound_matches = []
+        for harmful in self.harmful_ingredients.keys():
+            if harmful in normalized or normalized in harmful:
+                compound_matches.append(harmful)
 
-            # ML-based prediction for unknown ingredients
-            features = self._extract_chemical_features(normalized)
-            
-            # Calculate chemical risk score
-            risk_score = 0
-            risk_score += features.get('has_paraben', 0) * 3
-            risk_score += features.get('has_phthalate', 0) * 3
-            risk_score += features.get('has_formaldehyde', 0) * 4
-            risk_score += features.get('has_heavy_metal', 0) * 4
-            risk_score += features.get('has_solvent', 0) * 2
-            risk_score -= features.get('has_natural', 0) * 2
-            risk_score -= features.get('has_vitamin', 0) * 2
-            
-            # Get ML prediction
-            X_tfidf = self.vectorizer.transform([normalized])
-            X_additional = np.array([list(features.values())])
-            X_combined = np.hstack((X_tfidf.toarray(), X_additional))
-            
-            pred = self.classifier.predict(X_combined)[0]
-            prob = self.classifier.predict_proba(X_combined)[0]
-            confidence = float(max(prob))
+        # If found in harmful ingredients database
+        if compound_matches:
+            highest_score = 0
+            matched_ingredient = None
+            
+            for match in compound_matches:
+                info = self.harmful_ingredients[match]
+                if info['score'] > highest_score:
+                    highest_score = info['score']
+                    matched_ingredient = match
 
-            # More conservative approach to harmful classification
-            is_harmful = (pred == 1 and confidence > 0.8) or risk_score >= 3
+            if matched_ingredient and highest_score >= 7:  # Only if score is high enough
+                return {
+                    'is_harmful': True,
+                    'confidence': 1.0,
+                    'ingredient': ingredient,
+                    'matched_name': matched_ingredient,
+                    'category': self.harmful_ingredients[matched_ingredient]['categories'][0],
+                    'chemical_score': highest_score,
+                    'concerns': self.harmful_ingredients[matched_ingredient]['concerns']
+                }
+        return None
 
+    def _predict_resolved(self, ingredient):
+        """Resolve an ingredient through the shared IngredientResolver."""
+        resolution = self.resolver.resolve(ingredient)
+        
+        if resolution['source'] == 'known_safe':
+            return {
+                'is_harmful': False,
+                'confidence': 1.0,
+                'ingredient': ingredient,
+                'category': 'safe ingredients',
+                'chemical_score': 0
+            }
+        
+        info = resolution['info']
+        if resolution['source'] == 'database' and info and info.get('score', 0) >= 7:
             return {
-                'is_harmful': is_harmful,
-                'confidence': confidence,
+                'is_harmful': True,
+                'confidence': 1.0,
                 'ingredient': ingredient,
-                'category': self._get_ingredient_category(features),
-                'chemical_score': risk_score,
-                'is_chemical': bool(features.get('has_chemical_suffix', 0) or 
-                                  features.get('has_chemical_prefix', 0))
+                'matched_name': resolution['match']['matched_name'],
+                'category': info['categories'][0],
+                'chemical_score': info['score'],
+                'concerns': info['concerns']
             }
+        return None
 
-        except Exception as e:
-            print(f"Error in prediction: {e}")
-            return None
+    def _chemical_risk_score(self, features):
+        """Calculate chemical risk score from extracted features."""
+        risk_score = 0
+        risk_score += features.get('has_paraben', 0) * 3
+        risk_score += features.get('has_phthalate', 0) * 3
+        risk_score += features.get('has_formaldehyde', 0) * 4
+        risk_score += features.get('has_heavy_metal', 0) * 4
+        risk_score += features.get('has_solvent', 0) * 2
+        risk_score -= features.get('has_natural', 0) * 2
+        risk_score -= features.get('has_vitamin', 0) * 2
+        return int(risk_score)
 
     def get_ingredient_category(self, ingredient):
         """Get the category of an ingredient based on chemical features."""
@@ -411,5 +593,24 @@ class IngredientMLClassifier:
             return 'general'
             
         except Exception as e:
-            print(f"Error determining category for {ingredient}: {e}")
-            return 'general' 
\ No newline at end of file
+            logger.error("Error determining category for %s: %s", ingredient, e)
+            return 'general'
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the ingredient classifier artifacts.')
+    parser.add_argument('command', choices=['train', 'check'],
+                        help='train: retrain and save the model; check: verify saved artifacts')
+    args = parser.parse_args()
+    configure_logging()
+    
+    classifier = IngredientMLClassifier()
+    if args.command == 'train':
+        return 0 if classifier.train() else 1
+    
+    if classifier.load():
+        print(f"Model artifacts are up to date ({classifier.fingerprint()[:12]})")
+        return 0
+    return 1
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+import os
+import re
+import shlex
+import threading
+import pytesseract
+from app_logging import get_logger
+
+try:
+    import tesserocr
+except ImportError:  # optional: falls back to pytesseract
+    tesserocr = None
+
+logger = get_logger(__name__)
+
+# 'auto' uses tesserocr when it is installed and pytesseract otherwise
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'auto')
+OCR_LANG = os.environ.get('OCR_LANG', 'eng')
+
+def parse_config(config):
+    """Split a tesseract command-line config into (psm, variables).
+
+    Understands "--psm N" and "-c name=value", the options the app uses.
+    """
+    psm = None
+    variables = {}
+    args = shlex.split(config or '')
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--psm' and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif arg == '-c' and i + 1 < len(args):
+            name, _, value = args[i + 1].partition('=')
+            variables[name] = value
+            i += 1
+        elif re.match(r'^-c\w+=', arg):
+            name, _, value = arg[2:].partition('=')
+            variables[name] = value
+        i += 1
+    return psm, variables
+
+class PytesseractBackend:
+    """Runs the tesseract binary once per image through pytesseract."""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang=OCR_LANG):
+        self.lang = lang
+
+    def warm_up(self):
+        pass
+
+    def image_to_string(self, image, config=''):
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def image_to_data(self, image, config=''):
+        data = pytesseract.image_to_data(image, lang=self.lang, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        return [
+            {
+                'text': data['text'][i],
+                'left': data['left'][i],
+                'top': data['top'][i],
+                'width': data['width'][i],
+                'height': data['height'][i],
+                'conf': float(data['conf'][i]),
+                'block': data['block_num'][i],
+                'par': data['par_num'][i],
+                'line': data['line_num'][i]
+            }
+            for i in range(len(data['text'])) if data['text'][i].strip()
+        ]
+
+class TesserocrBackend:
+    """Keeps a libtesseract engine loaded and reuses it for every image.
+
+    Loading the language model is the expensive part of a tesseract run;
+    here it happens once per thread (one engine per thread, as the API
+    is not thread-safe) instead of once per image.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, lang=OCR_LANG):
+        self.lang = lang
+        self._local = threading.local()
+
+    def _api(self):
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=self.lang)
+            self._local.api = api
+        return api
+
+    def warm_up(self):
+        self._api()
+
+    def _configure(self, config):
+        psm, variables = parse_config(config)
+        api = self._api()
+        # Settings persist on the engine, so set them explicitly every time
+        api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+        api.SetVariable('tessedit_char_whitelist', variables.pop('tessedit_char_whitelist', ''))
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        return api
+
+    def image_to_string(self, image, config=''):
+        api = self._configure(config)
+        api.SetImage(image)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_data(self, image, config=''):
+        """Word boxes in the same shape as PytesseractBackend.image_to_data."""
+        api = self._configure(config)
+        api.SetImage(image)
+        try:
+            api.Recognize()
+            words = []
+            block = par = line = 0
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(api.GetIterator(), level):
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block += 1
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par += 1
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if not text or not text.strip() or not box:
+                    continue
+                left, top, right, bottom = box
+                words.append({
+                    'text': text,
+                    'left': left,
+                    'top': top,
+                    'width': right - left,
+                    'height': bottom - top,
+                    'conf': word.Confidence(level),
+                    'block': block,
+                    'par': par,
+                    'line': line
+                })
+            return words
+        finally:
+            api.Clear()
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def create_backend(name=OCR_BACKEND, lang=OCR_LANG):
+    """Create the named backend, falling back to pytesseract if unavailable."""
+    if name in ('auto', 'tesserocr') and tesserocr is not None:
+        try:
+            backend = TesserocrBackend(lang)
+            backend.warm_up()
+            return backend
+        except Exception as e:
+            logger.warning("Could not start tesserocr, falling back to pytesseract: %s", e)
+    elif name == 'tesserocr':
+        logger.warning("tesserocr is not installed, falling back to pytesseract")
+    elif name not in ('auto', 'pytesseract'):
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return PytesseractBackend(lang)
+
+def backend_name(name=OCR_BACKEND):
+    """Name of the backend create_backend(name) picks, without loading it.
+
+    Used where the engine runs elsewhere, e.g. to key cached OCR output in
+    the parent of the OCR pool.
+    """
+    if name in ('auto', 'tesserocr') and tesserocr is not None:
+        return TesserocrBackend.name
+    if name not in ('auto', 'tesserocr', 'pytesseract'):
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return PytesseractBackend.name
+
+def get_backend():
+    """Return this process's shared OCR backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+def warm_up():
+    """Load the OCR engine ahead of the first job, e.g. as a pool initializer."""
+    get_backend().warm_up()
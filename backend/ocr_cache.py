@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from atomic_file import atomic_write
+from app_logging import get_logger
+from cache import LRUCache
+from image_preprocessing import get_preset
+from ocr_backends import OCR_LANG, backend_name
+
+logger = get_logger(__name__)
+
+class OCRCache:
+    """Cache of OCR output keyed by image content and OCR settings.
+
+    The key hashes the image bytes together with the resolved
+    preprocessing options, tesseract config, OCR backend and language, so
+    re-uploads of the same photo skip OCR while a settings change never
+    serves stale text.
+    Results live in an in-memory LRU and, if `directory` is given, in one
+    file per key on disk, which survives restarts and is shared by every
+    worker process.
+    """
+
+    def __init__(self, maxsize=512, ttl=None, directory=None):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def key(image_bytes, preset='none', config='', mode='full', backend=None, lang=OCR_LANG):
+        """Cache key for an image and the settings used to OCR it.
+
+        backend defaults to the one OCR_BACKEND selects; engines and
+        languages read the same image differently, so both are part of
+        the key.
+        """
+        settings = json.dumps({
+            'preset': get_preset(preset),
+            'config': config,
+            'mode': mode,
+            'backend': backend or backend_name(),
+            'lang': lang
+        }, sort_keys=True)
+        digest = hashlib.sha256(image_bytes)
+        digest.update(settings.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.txt')
+
+    def get(self, key):
+        """Return cached text for key, or None."""
+        text = self.memory.get(key)
+        if text is not None or not self.directory:
+            return text
+
+        path = self._path(key)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            with self._lock:
+                self.disk_misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self.memory.set(key, text)
+        return text
+
+    def set(self, key, text):
+        """Store OCR output in every tier."""
+        self.memory.set(key, text)
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_write(path) as f:
+                f.write(text)
+        except OSError as e:
+            logger.warning("Error writing OCR cache entry: %s", e)
+
+    def stats(self):
+        """Return hit rates for the memory and disk tiers."""
+        memory = self.memory.stats()
+        with self._lock:
+            disk_lookups = self.disk_hits + self.disk_misses
+            hits = memory['hits'] + self.disk_hits
+            lookups = memory['hits'] + memory['misses']
+            return {
+                'memory': memory,
+                'disk': {
+                    'enabled': bool(self.directory),
+                    'hits': self.disk_hits,
+                    'misses': self.disk_misses,
+                    'hit_rate': self.disk_hits / disk_lookups if disk_lookups else 0.0
+                },
+                'hit_rate': hits / lookups if lookups else 0.0
+            }
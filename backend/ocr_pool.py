@@ -0,0 +1,151 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from image_preprocessing import load_image, preprocess
+from ingredient_region import ocr_ingredients
+from ocr_backends import get_backend, warm_up
+
+class OCRBusy(Exception):
+    """Raised when the OCR queue is full; retry_after is a hint in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"OCR queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class OCRTimeout(Exception):
+    """Raised when an OCR job does not finish within the request timeout."""
+
+def run_ocr(image_bytes, preset='none', config='', mode='full'):
+    """Preprocess and OCR an encoded image; executed in a pool process.
+
+    mode 'ingredients' reads only the ingredient list (see ingredient_region).
+    """
+    image = preprocess(load_image(image_bytes), preset)
+    if mode == 'ingredients':
+        return ocr_ingredients(image, get_backend(), fallback_config=config).strip()
+    return get_backend().image_to_string(image, config=config).strip()
+
+class OCRPool:
+    """Process pool running OCR off the request threads.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more
+    wait. Further submissions are rejected with OCRBusy instead of piling
+    up, so a burst of uploads cannot oversubscribe the machine. Callers
+    wait up to `timeout` seconds for their result. A job that times out
+    keeps its slot until its process finishes, so the limit still holds.
+
+    Pool processes are long-lived and run `initializer` on start, which by
+    default loads the OCR engine once per process.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None, timeout=30, func=run_ocr,
+                 initializer=warm_up):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 2 if max_queue is None else max_queue
+        self.timeout = timeout
+        self.func = func
+        self.initializer = initializer
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._busy_time = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 initializer=self.initializer)
+        return self._executor
+
+    def retry_after(self):
+        """Estimated seconds until a queue slot frees up."""
+        with self._lock:
+            average = self._busy_time / self.completed if self.completed else 1.0
+            waiting = max(0, self._in_flight - self.max_workers) + 1
+        return max(1, math.ceil(average * waiting / self.max_workers))
+
+    def submit(self, *args):
+        """Queue a job and return its future, or raise OCRBusy if full."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                busy = True
+            else:
+                self._in_flight += 1
+                self.submitted += 1
+                busy = False
+        if busy:
+            raise OCRBusy(self.retry_after())
+
+        started = time.monotonic()
+        try:
+            future = self._get_executor().submit(self.func, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool and try once more
+            with self._lock:
+                self._executor = None
+            try:
+                future = self._get_executor().submit(self.func, *args)
+            except Exception:
+                self._finish(started, failed=True)
+                raise
+        except Exception:
+            self._finish(started, failed=True)
+            raise
+        future.add_done_callback(
+            lambda f: self._finish(started, failed=f.cancelled() or f.exception() is not None)
+        )
+        return future
+
+    def _finish(self, started, failed):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._busy_time += time.monotonic() - started
+
+    def extract(self, *args, timeout=None):
+        """Run a job and wait for its result.
+
+        Raises OCRBusy when saturated and OCRTimeout after `timeout` seconds.
+        """
+        future = self.submit(*args)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise OCRTimeout(f"OCR did not finish within {self.timeout}s")
+
+    def stats(self):
+        """Return queue depth and job counters."""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queue_depth': max(0, self._in_flight - self.max_workers),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'avg_seconds': self._busy_time / self.completed if self.completed else 0.0
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,41 @@
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to `rate` per second.
+
+    Up to `capacity` calls may burst. Callers that find the bucket empty
+    reserve the next token and sleep until it is due, so concurrent callers
+    are served in arrival order without busy waiting.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, stop_event=None):
+        """Block until a call is allowed.
+
+        Returns False if stop_event was set while waiting.
+        """
+        wait = self._reserve()
+        if wait <= 0:
+            return True
+        if stop_event is not None:
+            return not stop_event.wait(wait)
+        time.sleep(wait)
+        return True
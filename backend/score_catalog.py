@@ -0,0 +1,281 @@
+"""Score a product catalog offline, outside the Flask app.
+
+Reads a CSV or JSONL file of products (an id and an INCI ingredient list
+per row), streams it through a pool of worker processes and writes one
+JSON line per product to the output file:
+
+    {"id": ..., "total_ingredients": n, "harmful_ingredients": [...],
+     "ml_flagged": [...], "safety_score": ...}
+
+Each worker loads the ingredient index and ML model once. The parent
+keeps a cache of verdicts per unique ingredient, so an ingredient is only
+sent to a worker the first time any product in the catalog lists it.
+Progress is checkpointed next to the output after every chunk; --resume
+continues an interrupted run from the last checkpoint.
+
+    python score_catalog.py catalog.csv scores.jsonl
+    python score_catalog.py catalog.jsonl scores.jsonl --workers 8 --resume
+    python score_catalog.py catalog.csv scores.jsonl --id-column sku --ingredients-column inci
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from app_logging import LOG_LEVEL, configure_logging
+from atomic_file import atomic_write
+from cache import LRUCache
+from ingredient_resolver import IngredientResolver
+from ingredient_scraper import IngredientAnalyzer, split_ingredient_list
+from ingredient_store import INGREDIENT_DB_PATH, IngredientStore
+from ml_classifier import IngredientMLClassifier
+
+# Per-process state of a worker, set up once by init_worker
+_worker = {}
+
+def init_worker(db_path, verbose=False):
+    """Load the ingredient index and ML model once per worker process."""
+    configure_logging('DEBUG' if verbose else LOG_LEVEL)
+
+    store = IngredientStore(db_path)
+    snapshot = store.snapshot()
+    analyzer = IngredientAnalyzer(store=store, database=snapshot)
+    resolver = IngredientResolver(analyzer)
+    analyzer.resolver = resolver
+    classifier = IngredientMLClassifier(snapshot[0], snapshot[1], resolver=resolver, store=store)
+    _worker['resolver'] = resolver
+    _worker['classifier'] = classifier if classifier.load() else None
+
+def score_names(names):
+    """Verdicts for a shard of normalized ingredient names; runs in a worker.
+
+    Names the database does not flag are also run through the ML model in
+    one predict_many call.
+    """
+    resolver = _worker['resolver']
+    classifier = _worker['classifier']
+    resolutions = [resolver.resolve(name) for name in names]
+
+    predictions = {}
+    unknown = [name for name, resolution in zip(names, resolutions) if resolution['source'] == 'unknown']
+    if classifier is not None and unknown:
+        predictions = dict(zip(unknown, classifier.predict_many(unknown)))
+
+    verdicts = {}
+    for name, resolution in zip(names, resolutions):
+        match = resolution['match']
+        verdict = {
+            'is_harmful': match['is_harmful'],
+            'matched_name': match['matched_name'],
+            'score': match['score'],
+            'categories': match['categories'],
+            'source': resolution['source']
+        }
+        prediction = predictions.get(name)
+        if prediction:
+            verdict['ml_harmful'] = prediction['is_harmful']
+            verdict['ml_confidence'] = prediction['confidence']
+        verdicts[name] = verdict
+    return verdicts
+
+def read_rows(path, id_column='id', ingredients_column='ingredients'):
+    """Yield (product id, ingredient text) from a CSV or JSONL file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for number, line in enumerate(f):
+                if line.strip():
+                    row = json.loads(line)
+                    yield row.get(id_column, number), row.get(ingredients_column) or ''
+        else:
+            for number, row in enumerate(csv.DictReader(f)):
+                yield row.get(id_column, number), row.get(ingredients_column) or ''
+
+def load_checkpoint(path):
+    """Return the checkpoint dict at path, or None."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def score_row(product_id, names, verdicts, analyzer):
+    """Assemble one product's result from per-ingredient verdicts."""
+    harmful = []
+    ml_flagged = []
+    for name in names:
+        verdict = verdicts[IngredientResolver.normalize(name)]
+        if verdict['is_harmful']:
+            harmful.append({
+                'ingredient': name,
+                'matched_name': verdict['matched_name'],
+                'score': verdict['score'],
+                'categories': verdict['categories']
+            })
+        elif verdict.get('ml_harmful'):
+            ml_flagged.append(name)
+    return {
+        'id': product_id,
+        'total_ingredients': len(names),
+        'harmful_ingredients': harmful,
+        'ml_flagged': ml_flagged,
+        'safety_score': analyzer._calculate_safety_score(harmful, len(names))
+    }
+
+def score_catalog(input_path, output_path, workers=None, chunk_size=1000, shard_size=200,
+                  id_column='id', ingredients_column='ingredients', resume=False,
+                  cache_size=200000, progress_interval=10, db_path=INGREDIENT_DB_PATH,
+                  verbose=False):
+    """Score every product in input_path, appending results to output_path.
+
+    Rows are read in chunks of chunk_size. Ingredients of a chunk that are
+    not cached (or already on their way) go to the workers in shards of
+    shard_size; chunks are written in input order once their verdicts are
+    in. Returns a summary dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = output_path + '.checkpoint'
+
+    store = IngredientStore(db_path)
+    snapshot = store.snapshot()
+    analyzer = IngredientAnalyzer(store=store, database=snapshot)
+    # Train (once, here) if the saved model is stale so workers only load it
+    classifier = IngredientMLClassifier(snapshot[0], snapshot[1], store=store)
+    if not classifier.load_or_train():
+        print("ML model unavailable, scoring with the ingredient database only")
+
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint and checkpoint.get('input') != os.path.abspath(input_path):
+        print(f"Checkpoint is for {checkpoint.get('input')}, starting over")
+        checkpoint = None
+    if checkpoint:
+        if checkpoint.get('model_fingerprint') != classifier.model_fingerprint:
+            print("Warning: the model changed since the checkpoint was written")
+        os.truncate(output_path, checkpoint['output_bytes'])
+        print(f"Resuming after {checkpoint['rows']} rows")
+    rows_done = checkpoint['rows'] if checkpoint else 0
+
+    cache = LRUCache(maxsize=cache_size)
+    in_flight = {}  # normalized name -> future of the shard scoring it
+    pending = deque()
+    started = last_report = time.monotonic()
+    rows_this_run = 0
+
+    def submit(chunk, pool):
+        rows = [(product_id, split_ingredient_list(text)) for product_id, text in chunk]
+        verdicts = {}
+        futures = set()
+        new = []
+        new_keys = set()
+        for _, names in rows:
+            for name in names:
+                key = IngredientResolver.normalize(name)
+                if key in verdicts or key in new_keys:
+                    continue
+                if key in in_flight:
+                    futures.add(in_flight[key])
+                    continue
+                verdict = cache.get(key)
+                if verdict is None:
+                    new.append(key)
+                    new_keys.add(key)
+                else:
+                    verdicts[key] = verdict
+        for i in range(0, len(new), shard_size):
+            shard = new[i:i + shard_size]
+            future = pool.submit(score_names, shard)
+            futures.add(future)
+            for key in shard:
+                in_flight[key] = future
+        return rows, verdicts, futures
+
+    def write(entry, out):
+        nonlocal rows_done, rows_this_run, last_report
+        rows, verdicts, futures = entry
+        for future in futures:
+            for key, verdict in future.result().items():
+                verdicts[key] = verdict
+                cache.set(key, verdict)
+                if in_flight.get(key) is future:
+                    del in_flight[key]
+        for product_id, names in rows:
+            out.write(json.dumps(score_row(product_id, names, verdicts, analyzer)) + '\n')
+        out.flush()
+
+        rows_done += len(rows)
+        rows_this_run += len(rows)
+        with atomic_write(checkpoint_path) as f:
+            json.dump({
+                'input': os.path.abspath(input_path),
+                'rows': rows_done,
+                'output_bytes': out.tell(),
+                'model_fingerprint': classifier.model_fingerprint
+            }, f)
+
+        now = time.monotonic()
+        if progress_interval and now - last_report >= progress_interval:
+            last_report = now
+            print(f"{rows_done} rows, {rows_this_run / (now - started):.0f} rows/s, "
+                  f"verdict cache hit rate {cache.stats()['hit_rate']:.1%}")
+
+    rows = itertools.islice(read_rows(input_path, id_column, ingredients_column), rows_done, None)
+    with open(output_path, 'a' if checkpoint else 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                initargs=(db_path, verbose)) as pool:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            pending.append(submit(chunk, pool))
+            # Keep a few chunks in flight, writing the oldest in input order
+            while len(pending) > workers * 2:
+                write(pending.popleft(), out)
+        while pending:
+            write(pending.popleft(), out)
+
+    elapsed = time.monotonic() - started
+    stats = cache.stats()
+    return {
+        'rows': rows_done,
+        'rows_this_run': rows_this_run,
+        'seconds': elapsed,
+        'rows_per_second': rows_this_run / elapsed if elapsed else 0.0,
+        'unique_ingredients': stats['misses'],
+        'cache_hit_rate': stats['hit_rate']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a product catalog (CSV or JSONL) offline.')
+    parser.add_argument('input', help='CSV or JSONL (.jsonl/.ndjson) file of products')
+    parser.add_argument('output', help='JSONL file to write scores to')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per chunk (default: 1000)')
+    parser.add_argument('--id-column', default='id')
+    parser.add_argument('--ingredients-column', default='ingredients')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint')
+    parser.add_argument('--cache-size', type=int, default=200000,
+                        help='Unique ingredient verdicts kept in memory (default: 200000)')
+    parser.add_argument('--progress', type=float, default=10, help='Seconds between progress lines')
+    parser.add_argument('--verbose', action='store_true', help='Log the per-ingredient matching trace')
+    args = parser.parse_args()
+    configure_logging('DEBUG' if args.verbose else LOG_LEVEL)
+
+    summary = score_catalog(
+        args.input, args.output,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        id_column=args.id_column,
+        ingredients_column=args.ingredients_column,
+        resume=args.resume,
+        cache_size=args.cache_size,
+        progress_interval=args.progress,
+        verbose=args.verbose
+    )
+    print(f"Scored {summary['rows_this_run']} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/s), {summary['unique_ingredients']} unique "
+          f"ingredients, verdict cache hit rate {summary['cache_hit_rate']:.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+from collections import Counter
+from functools import lru_cache
+
+@lru_cache(maxsize=4096)
+def _windows(length, size):
+    """Slice objects for every window of `size` characters in a string."""
+    return tuple(slice(i, i + size) for i in range(length - size + 1))
+
+class SubstringScorer:
+    """Common-substring similarity between one query and many candidates.
+
+    Computes the same total as filling the longest-common-suffix matrix of
+    two strings and summing every cell of value >= min_length, without
+    building the matrix. If P(k) is the number of position pairs where both
+    strings share a k-character substring, that total equals::
+
+        min_length * P(min_length) + P(min_length + 1) + P(min_length + 2) + ...
+
+    P(k) is the dot product of the k-gram counts of the two strings and the
+    series stops at the first k with no shared k-gram. The query's k-gram
+    counts are built once and reused for every candidate, so scoring is
+    O(len * longest common substring) with all loops running inside C.
+    """
+
+    def __init__(self, query, min_length=3):
+        self.query = query
+        self.min_length = min_length
+        self._grams = {}
+
+    def _query_grams(self, size):
+        grams = self._grams.get(size)
+        if grams is None:
+            query = self.query
+            grams = Counter(map(query.__getitem__, _windows(len(query), size)))
+            self._grams[size] = grams
+        return grams
+
+    def total(self, candidate):
+        """Sum of the lengths of all common substrings of min_length or more."""
+        limit = min(len(self.query), len(candidate))
+        total = 0
+        size = self.min_length
+        while size <= limit:
+            grams = self._query_grams(size)
+            pairs = sum(map(grams.__getitem__, map(candidate.__getitem__, _windows(len(candidate), size))))
+            if not pairs:
+                break
+            total += pairs * (self.min_length if size == self.min_length else 1)
+            size += 1
+        return total
+
+    def score(self, candidate):
+        """Common-substring total normalized by the longer string's length."""
+        longest = max(len(self.query), len(candidate))
+        return self.total(candidate) / longest if longest else 0
+
+    def score_many(self, candidates):
+        """Score the query against every candidate at once."""
+        return [self.score(candidate) for candidate in candidates]
+
+def common_substring_score(str1, str2, min_length=3):
+    """Normalized common-substring score for a single pair of strings."""
+    return SubstringScorer(str1, min_length).score(str2)
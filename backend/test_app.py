@@ -0,0 +1,183 @@
+import io
+import json
+from concurrent.futures import Future
+from contextlib import contextmanager
+import app
+from database_snapshot import DatabaseSnapshot
+from ml_classifier import IngredientMLClassifier
+
+def test_snapshot_with_new_training_data_does_not_train():
+    previous = app.ml_classifier
+    state = (app.harmful_ingredients, app.safe_alternatives, app.toxicity_categories)
+    original_train = IngredientMLClassifier.train
+    original_fingerprint = IngredientMLClassifier.fingerprint
+
+    def fail(self):
+        raise AssertionError("the serving process must not train")
+
+    # As if the store's training data changed since the model was trained
+    IngredientMLClassifier.fingerprint = lambda self: 'changed'
+    IngredientMLClassifier.train = fail
+    try:
+        harmful = dict(app.harmful_ingredients, **{'test chemical': {'score': 7, 'categories': []}})
+        snapshot = DatabaseSnapshot(-1, harmful, app.safe_alternatives, app.toxicity_categories, None)
+        app.apply_database_snapshot(snapshot)
+
+        # The data is swapped in; the previous model keeps serving
+        assert app.harmful_ingredients is harmful
+        assert app.ml_classifier is previous
+    finally:
+        IngredientMLClassifier.train = original_train
+        IngredientMLClassifier.fingerprint = original_fingerprint
+        app.ml_classifier = previous
+        app.harmful_ingredients, app.safe_alternatives, app.toxicity_categories = state
+
+LABEL = 'Ingredients: Water, Triclosan, Glycerin'
+
+@contextmanager
+def patched(name, value):
+    """Temporarily replace a module-level name in app."""
+    original = getattr(app, name)
+    setattr(app, name, value)
+    try:
+        yield
+    finally:
+        setattr(app, name, original)
+
+def fake_ocr(text):
+    return patched('ocr_image', lambda image_bytes, mode=app.OCR_MODE: text)
+
+def upload(client, path, headers=None):
+    return client.post(path, data={'image': (io.BytesIO(b'photo'), 'label.jpg')},
+                       content_type='multipart/form-data', headers=headers)
+
+def read_events(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_analysis_streams_when_asked():
+    client = app.app.test_client()
+    expected = app.analyze_ingredients(LABEL)
+    assert any(verdict['is_harmful'] for verdict in expected)
+
+    with fake_ocr(LABEL):
+        for path in ('/analyze-ingredients', '/analyze-image'):
+            for query, headers in (('', {'Accept': 'application/x-ndjson'}), ('?stream=1', None)):
+                response = upload(client, path + query, headers)
+                assert response.status_code == 200
+                assert response.mimetype == 'application/x-ndjson'
+                events = read_events(response)
+                print(f"{path}{query}: {[event['event'] for event in events]}")
+                assert [event['event'] for event in events] == (
+                    ['text'] + ['ingredient'] * len(expected) + ['done'])
+                assert events[0]['extracted_text'] == LABEL
+                assert [event['result'] for event in events[1:-1]] == expected
+                assert events[-1]['count'] == len(expected)
+
+        # Without either, the response is the usual JSON document
+        response = upload(client, '/analyze-ingredients')
+        assert response.mimetype == 'application/json'
+        assert response.get_json()['ingredients'] == expected
+
+def test_stream_reports_errors():
+    def failing_analysis(text):
+        yield {'ingredient': 'water', 'is_harmful': False}
+        raise RuntimeError('resolver unavailable')
+
+    client = app.app.test_client()
+    with fake_ocr(LABEL), patched('iter_analysis', failing_analysis):
+        events = read_events(upload(client, '/analyze-ingredients?stream=1'))
+    assert [event['event'] for event in events] == ['text', 'ingredient', 'error']
+    assert events[-1]['error'] == 'resolver unavailable'
+
+def fake_batch_ocr(image_bytes):
+    """start_batch_ocr stand-in: b'busy' finds the queue full, b'broken' fails in OCR."""
+    if image_bytes == b'busy':
+        raise app.OCRBusy(5)
+    if image_bytes == b'broken':
+        future = Future()
+        future.set_exception(RuntimeError('cannot identify image file'))
+        return None, None, future
+    return None, image_bytes.decode('utf-8'), None
+
+def test_batch_json_body():
+    client = app.app.test_client()
+    response = client.post('/analyze/batch', json={'products': [
+        {'id': 'serum', 'ingredients': 'Water, Triclosan, Glycerin'},
+        {'ingredients': ['TRICLOSAN', ' Aloe Vera ', '']}
+    ]})
+    assert response.status_code == 200
+    data = response.get_json()
+    serum, unnamed = data['products']
+    assert serum['id'] == 'serum'
+    assert unnamed['id'] == 1  # products without an id are numbered
+    assert [verdict['ingredient'] for verdict in serum['ingredients']] == ['water', 'triclosan', 'glycerin']
+    assert [verdict['ingredient'] for verdict in unnamed['ingredients']] == ['triclosan', 'aloe vera']
+    assert unnamed['ingredients'][0] == serum['ingredients'][1]
+    assert data['unique_ingredients'] == 4
+
+def test_batch_rejects_bad_products():
+    client = app.app.test_client()
+    for products in ([{'id': 1}], [{'ingredients': 42}], 'water',
+                     [{'ingredients': ['water', None]}], [{'ingredients': ['water', 7, {}]}]):
+        response = client.post('/analyze/batch', json={'products': products})
+        print(f"{products!r}: {response.get_json()}")
+        assert response.status_code == 400
+    assert client.post('/analyze/batch', json={'products': []}).status_code == 400
+
+def test_batch_multipart_and_per_product_errors():
+    client = app.app.test_client()
+    with patched('start_batch_ocr', fake_batch_ocr):
+        response = client.post('/analyze/batch', content_type='multipart/form-data', data={
+            'products': json.dumps([{'id': 'typed', 'ingredients': 'Glycerin'}]),
+            'images': [
+                (io.BytesIO(b'Water, Triclosan'), 'front.jpg'),
+                (io.BytesIO(b'busy'), 'queued.jpg'),
+                (io.BytesIO(b'broken'), 'corrupt.jpg')
+            ]
+        })
+    assert response.status_code == 200
+    typed, front, queued, corrupt = response.get_json()['products']
+    assert typed['id'] == 'typed' and typed['ingredients'][0]['ingredient'] == 'glycerin'
+    assert front['id'] == 'front.jpg'
+    assert front['extracted_text'] == 'Water, Triclosan'
+    assert [verdict['ingredient'] for verdict in front['ingredients']] == ['water', 'triclosan']
+    # One failed product does not fail the batch
+    assert queued == {'id': 'queued.jpg', 'error': 'Server is busy, please retry shortly',
+                      'retry_after': 5}
+    assert corrupt == {'id': 'corrupt.jpg', 'error': 'cannot identify image file'}
+
+def test_batch_size_limits():
+    client = app.app.test_client()
+    products = [{'ingredients': 'water'}] * 3
+    with patched('BATCH_MAX_PRODUCTS', 2):
+        response = client.post('/analyze/batch', json={'products': products})
+    assert response.status_code == 413
+    assert response.get_json()['max_products'] == 2
+
+    with patched('BATCH_MAX_IMAGES', 1), patched('start_batch_ocr', fake_batch_ocr):
+        response = client.post('/analyze/batch', content_type='multipart/form-data', data={
+            'images': [(io.BytesIO(b'water'), 'a.jpg'), (io.BytesIO(b'water'), 'b.jpg')]
+        })
+    assert response.status_code == 413
+
+def test_batch_streams_products():
+    client = app.app.test_client()
+    response = client.post('/analyze/batch?stream=1', json={'products': [
+        {'id': 'a', 'ingredients': 'Water, Triclosan'},
+        {'id': 'b', 'ingredients': ['water', 'glycerin']}
+    ]})
+    assert response.mimetype == 'application/x-ndjson'
+    events = read_events(response)
+    assert [event['event'] for event in events] == ['product', 'product', 'done']
+    assert [event['result']['id'] for event in events[:2]] == ['a', 'b']
+    assert events[-1] == {'event': 'done', 'count': 2, 'unique_ingredients': 3}
+
+if __name__ == "__main__":
+    test_snapshot_with_new_training_data_does_not_train()
+    test_analysis_streams_when_asked()
+    test_stream_reports_errors()
+    test_batch_json_body()
+    test_batch_rejects_bad_products()
+    test_batch_multipart_and_per_product_errors()
+    test_batch_size_limits()
+    test_batch_streams_products()
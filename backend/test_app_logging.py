@@ -0,0 +1,53 @@
+import io
+import logging
+from app_logging import (LOG_FORMAT, RequestIdFilter, SamplingFilter, get_trace_logger,
+                         start_request)
+
+class CountingArg:
+    """Counts how often a log call formats it."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+def capture(logger, level):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return stream
+
+def test_disabled_trace_does_no_formatting():
+    trace = get_trace_logger('test_app_logging.quiet', rate=1.0)
+    stream = capture(trace, logging.INFO)
+    arg = CountingArg()
+    for _ in range(1000):
+        trace.debug("Checking ingredient %s", arg)
+    assert arg.formatted == 0
+    assert stream.getvalue() == ''
+
+def test_request_id_and_sampling():
+    trace = get_trace_logger('test_app_logging.sampled', rate=0.1)
+    stream = capture(trace, logging.DEBUG)
+
+    assert start_request('abc-123') == 'abc-123'
+    for _ in range(2000):
+        trace.debug("Checking ingredient %s", 'water')
+    lines = stream.getvalue().splitlines()
+    print(f"kept {len(lines)} of 2000 lines")
+    assert 100 < len(lines) < 300
+    assert all('[abc-123]' in line for line in lines)
+
+    # Ids that could break the log line are replaced
+    assert start_request('bad id\nINFO forged') != 'bad id\nINFO forged'
+    assert SamplingFilter(1.0).filter(None)
+
+if __name__ == "__main__":
+    test_disabled_trace_does_no_formatting()
+    test_request_id_and_sampling()
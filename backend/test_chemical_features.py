@@ -0,0 +1,43 @@
+import re
+from chemical_features import ChemicalFeatureEngine
+from ml_classifier import IngredientMLClassifier
+
+def test_feature_engine_matches_regex_search():
+    patterns = IngredientMLClassifier().chemical_patterns
+    engine = ChemicalFeatureEngine(patterns)
+
+    test_names = [
+        'methylparaben',
+        'sodium lauryl sulfate',
+        'sodium laureth sulphate',
+        'lead acetate',
+        'dibutyl phthalate',
+        'triclosan',
+        'tri-ethanolamine',
+        'quaternium-15',
+        'zinc oxide',
+        'hyaluronic acid',
+        'cetearyl alcohol',
+        'aloe vera leaf extract',
+        'monoethanolamine',
+        'acid\n',
+        'sulfate amine',
+        'water',
+        ''
+    ]
+
+    for name in test_names:
+        expected = {
+            f'has_{feature}': 1 if re.search(pattern, name.lower()) else 0
+            for feature, pattern in patterns.items()
+        }
+        features = engine.extract(name)
+        print(f"{name!r}: {[k for k, v in features.items() if v]}")
+        assert features == expected
+
+    matrix = engine.transform(test_names)
+    assert matrix.shape == (len(test_names), len(patterns))
+    assert tuple(matrix[0]) == engine.vector(test_names[0])
+
+if __name__ == "__main__":
+    test_feature_engine_matches_regex_search()
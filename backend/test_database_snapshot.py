@@ -0,0 +1,63 @@
+from database_snapshot import SnapshotHolder
+from ingredient_resolver import IngredientResolver
+from ingredient_store import IngredientStore
+
+NEW_CHEMICAL = {
+    'score': 8,
+    'categories': ['solvents'],
+    'concerns': ['neurotoxicity'],
+    'found_in': ['nail polish']
+}
+
+def test_reload_swaps_snapshot():
+    store = IngredientStore(':memory:')
+    holder = SnapshotHolder(store, interval=0)
+    resolver = IngredientResolver(holder.current.analyzer)
+    holder.subscribe(lambda snapshot: resolver.swap(snapshot.analyzer))
+
+    old = holder.current
+    assert not holder.check()  # nothing changed yet
+    assert not resolver.resolve('xylenol')['match']['is_harmful']
+
+    store.upsert('xylenol', NEW_CHEMICAL)
+    assert holder.check()
+    new = holder.current
+    print(f"Reloaded version {old.version} -> {new.version}")
+
+    assert new.version == store.version()
+    assert 'xylenol' in new.harmful_ingredients
+    assert new.analyzer is not old.analyzer
+    # The old snapshot is untouched for requests still using it
+    assert 'xylenol' not in old.harmful_ingredients
+    assert old.analyzer._check_ingredient('xylenol')['matched_name'] is None
+
+    # The resolver dropped its cached miss and uses the new analyzer
+    assert resolver.resolve('xylenol')['match']['matched_name'] == 'xylenol'
+
+def test_resolver_ignores_results_from_replaced_analyzer():
+    store = IngredientStore(':memory:')
+    holder = SnapshotHolder(store, interval=0)
+    old_analyzer = holder.current.analyzer
+    resolver = IngredientResolver(old_analyzer)
+
+    store.upsert('xylenol', NEW_CHEMICAL)
+    holder.check()
+    check_ingredient = old_analyzer._check_ingredient
+
+    def check_then_reload(ingredient):
+        # The database is swapped while this lookup is still running
+        result = check_ingredient(ingredient)
+        resolver.swap(holder.current.analyzer)
+        return result
+
+    old_analyzer._check_ingredient = check_then_reload
+    stale = resolver.resolve('xylenol')
+    assert stale['match']['matched_name'] is None
+
+    # The stale miss was not cached, so the next lookup sees the new data
+    assert len(resolver.cache) == 0
+    assert resolver.resolve('xylenol')['match']['matched_name'] == 'xylenol'
+
+if __name__ == "__main__":
+    test_reload_swaps_snapshot()
+    test_resolver_ignores_results_from_replaced_analyzer()
@@ -1,4 +1,4 @@
-from ingredient_api import scrape_ewg_data
+from ingredient_api import ewg_scraper
 
 def test_ewg_scraper():
     test_ingredients = [
@@ -9,7 +9,7 @@ def test_ewg_scraper():
     
     for ingredient in test_ingredients:
         print(f"\nTesting EWG scraper for: {ingredient}")
-        data = scrape_ewg_data(ingredient)
+        data = ewg_scraper.scrape_ingredient(ingredient)
         if data:
             print(f"Hazard Score: {data['hazard_score']}")
             print(f"Concerns: {data['concerns']}")
@@ -0,0 +1,158 @@
+import copy
+import threading
+import time
+from datetime import datetime, timedelta
+from ewg_refresh import EWGRefreshWorker, is_stale
+from rate_limit import TokenBucket
+
+TEST_DATABASE = {
+    'methylparaben': {
+        'score': 8,
+        'ewg_last_updated': datetime.now().isoformat()
+    },
+    'triclosan': {
+        'score': 7,
+        'ewg_last_updated': (datetime.now() - timedelta(days=30)).isoformat()
+    },
+    'toluene': {
+        'score': 8
+    }
+}
+
+class FakeStore:
+    """In-memory stand-in for load_database/save_database."""
+
+    def __init__(self):
+        self.data = (copy.deepcopy(TEST_DATABASE), {}, {})
+        self.saves = 0
+
+    def load(self):
+        return copy.deepcopy(self.data)
+
+    def save(self, harmful, safe, toxicity):
+        self.data = (copy.deepcopy(harmful), safe, toxicity)
+        self.saves += 1
+
+def fake_scrape(name):
+    return {
+        'hazard_score': 5,
+        'concerns': ['test concern'],
+        'found_in': ['test product'],
+        'last_updated': datetime.now().isoformat()
+    }
+
+def test_is_stale():
+    assert not is_stale(TEST_DATABASE['methylparaben'])
+    assert is_stale(TEST_DATABASE['triclosan'])
+    assert is_stale(TEST_DATABASE['toluene'])
+    assert is_stale({'ewg_last_updated': 'not a date'})
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        assert bucket.acquire()
+    elapsed = time.monotonic() - start
+    print(f"6 tokens at 50/s took {elapsed:.3f}s")
+    assert elapsed >= 0.09
+
+    # A set stop event interrupts the wait
+    stop = threading.Event()
+    stop.set()
+    slow = TokenBucket(rate=0.01)
+    assert slow.acquire(stop)
+    assert not slow.acquire(stop)
+
+def test_run_once_updates_stale_entries():
+    store = FakeStore()
+    scraped = []
+    published = []
+
+    def scrape(name):
+        scraped.append(name)
+        return fake_scrape(name)
+
+    worker = EWGRefreshWorker(scrape, store.load, store.save, rate=1000, jitter=0)
+    worker.subscribe(lambda harmful, safe, toxicity: published.append(harmful))
+
+    assert worker.run_once() == 2
+    assert sorted(scraped) == ['toluene', 'triclosan']
+    assert store.saves == 1
+    assert store.data[0]['toluene']['ewg_score'] == 5
+    assert 'ewg_score' not in store.data[0]['methylparaben']
+    assert published and published[0]['triclosan']['ewg_concerns'] == ['test concern']
+
+    # Nothing is stale on the second pass
+    assert worker.run_once() == 0
+    assert store.saves == 1
+
+def test_run_once_backs_off_and_gives_up():
+    store = FakeStore()
+    attempts = []
+
+    def failing_scrape(name):
+        attempts.append(name)
+        return None
+
+    worker = EWGRefreshWorker(failing_scrape, store.load, store.save, rate=1000,
+                              jitter=0, backoff=0.01, max_failures=2)
+    assert worker.run_once() == 0
+    assert len(attempts) == 2
+    assert store.saves == 0
+
+def test_run_once_scrapes_in_batches():
+    store = FakeStore()
+    batches = []
+
+    def scrape_many(names):
+        batches.append(list(names))
+        return {name: fake_scrape(name) if name == 'toluene' else None for name in names}
+
+    worker = EWGRefreshWorker(None, store.load, store.save, rate=None, jitter=0,
+                              scrape_many=scrape_many, batch_size=5)
+    # One call for both stale ingredients; a partly failed batch still saves
+    assert worker.run_once() == 1
+    assert batches == [['triclosan', 'toluene']]
+    assert store.data[0]['toluene']['ewg_score'] == 5
+    assert 'ewg_score' not in store.data[0]['triclosan']
+
+    # Scraper results without found_in/last_updated are still stamped
+    store = FakeStore()
+    worker = EWGRefreshWorker(None, store.load, store.save, rate=None, scrape_many=lambda names: {
+        name: {'hazard_score': 3, 'concerns': []} for name in names
+    })
+    assert worker.run_once() == 2
+    assert not is_stale(store.data[0]['triclosan'])
+    assert store.data[0]['triclosan']['ewg_found_in'] == []
+
+def test_enqueue_refreshes_in_background():
+    store = FakeStore()
+    looked_up = []
+    worker = EWGRefreshWorker(fake_scrape, store.load, store.save, interval=0,
+                              rate=1000, lookup=looked_up.append)
+
+    assert worker.enqueue('triclosan')
+    assert not worker.enqueue('triclosan')  # already queued
+    assert worker.enqueue('glycerin')
+    assert worker.queue_size() == 2
+
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while (worker.queue_size() or len(looked_up) < 1) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop(timeout=5)
+
+    # Database names are scraped and saved, anything else goes to lookup
+    assert store.data[0]['triclosan']['ewg_score'] == 5
+    assert 'ewg_score' not in store.data[0]['toluene']
+    assert looked_up == ['glycerin']
+
+if __name__ == "__main__":
+    test_is_stale()
+    test_token_bucket_limits_rate()
+    test_run_once_updates_stale_entries()
+    test_run_once_backs_off_and_gives_up()
+    test_run_once_scrapes_in_batches()
+    test_enqueue_refreshes_in_background()
@@ -0,0 +1,178 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from ewg_cache import EWGCache
+from ewg_scraper import EWGScraper
+
+SEARCH_PAGE = '<a class="product-tile" href="/skindeep/ingredients/{slug}/">{name}</a>'
+
+DETAIL_PAGE = '''
+<div class="hazard-score">{score}</div>
+<section class="concerns"><div class="concern-item"><h3>Irritation</h3></div></section>
+<section class="categories"><div class="category-item">Preservative</div></section>
+'''
+
+SCORES = {'methylparaben': 8, 'oxybenzone': 7, 'glycerin': 1, 'flaky': 5}
+
+class StubEWGHandler(BaseHTTPRequestHandler):
+    """Serves fake search and detail pages; 'flaky' fails once with a 503."""
+
+    requests_seen = []
+    failed_once = set()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self.requests_seen.append(parts.path)
+
+        if parts.path == '/skindeep/search/':
+            name = parse_qs(parts.query).get('search', [''])[0]
+            if name not in SCORES:
+                return self._send(200, 'No results')
+            if name == 'flaky' and name not in self.failed_once:
+                self.failed_once.add(name)
+                return self._send(503, 'Try again')
+            return self._send(200, SEARCH_PAGE.format(slug=name, name=name))
+
+        if parts.path.startswith('/skindeep/ingredients/'):
+            name = parts.path.strip('/').split('/')[-1]
+            if self.headers.get('If-None-Match') == f'"{name}"':
+                return self._send(304, '')
+            return self._send(200, DETAIL_PAGE.format(score=SCORES[name]), etag=f'"{name}"')
+
+        self._send(404, 'Not found')
+
+    def _send(self, status, body, etag=None):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubEWGHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_scrape_many_against_stub():
+    server, url = start_stub_server()
+    try:
+        scraper = EWGScraper(site_url=url, max_workers=4, rate=1000, backoff=0.01)
+        results = scraper.scrape_many(['methylparaben', 'oxybenzone', 'glycerin', 'unknown', 'flaky', 'glycerin'])
+
+        print(f"Results: { {name: data and data['hazard_score'] for name, data in results.items()} }")
+        assert list(results) == ['methylparaben', 'oxybenzone', 'glycerin', 'unknown', 'flaky']
+        assert results['methylparaben']['hazard_score'] == 8
+        assert results['methylparaben']['concerns'] == ['Irritation']
+        assert results['methylparaben']['ewg_url'] == f"{url}/skindeep/ingredients/methylparaben/"
+        assert results['methylparaben']['last_updated']
+        assert results['unknown'] is None
+        # The 503 was retried
+        assert results['flaky']['hazard_score'] == 5
+        assert set(scraper.get_harmful_ingredients()) == {'methylparaben', 'oxybenzone'}
+    finally:
+        server.shutdown()
+
+def test_scrape_many_is_rate_limited():
+    server, url = start_stub_server()
+    try:
+        scraper = EWGScraper(site_url=url, max_workers=6, rate=20)
+        start = time.monotonic()
+        results = scraper.scrape_many(['methylparaben', 'oxybenzone', 'glycerin'] * 2)
+        elapsed = time.monotonic() - start
+        print(f"6 requests at 20/s took {elapsed:.3f}s")
+        assert len(results) == 3
+        assert elapsed >= 0.2
+    finally:
+        server.shutdown()
+
+def test_cache_persists_and_revalidates():
+    server, url = start_stub_server()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'test_ewg_cache.sqlite3')
+    try:
+        StubEWGHandler.requests_seen.clear()
+        scraper = EWGScraper(site_url=url, rate=1000, cache=EWGCache(path))
+        assert scraper.scrape_ingredient('methylparaben')['hazard_score'] == 8
+        assert len(StubEWGHandler.requests_seen) == 2
+
+        # A new scraper on the same file answers without the network
+        cache = EWGCache(path, ttl=0)
+        scraper = EWGScraper(site_url=url, rate=1000, cache=cache)
+        assert scraper.get_cached('Methylparaben')['hazard_score'] == 8
+        assert len(StubEWGHandler.requests_seen) == 2
+
+        # Stale pages are revalidated: the detail page comes back 304
+        detail_url = f"{url}/skindeep/ingredients/methylparaben/"
+        assert scraper.fetch_page(detail_url) is not None
+        assert len(StubEWGHandler.requests_seen) == 3
+        print(f"Cache stats: {cache.stats()}")
+        assert cache.stats()['hits'] == 1
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory)
+
+def test_cache_evicts_least_recently_used():
+    cache = EWGCache(':memory:', max_bytes=25)
+    cache.put_page('a', 'x' * 10)
+    cache.put_page('b', 'x' * 10)
+    assert cache.get_page('a')['body'] == 'x' * 10
+    cache.put_page('c', 'x' * 10)
+    # 'b' was the least recently used page
+    assert cache.get_page('b') is None
+    assert cache.get_page('a') is not None
+    assert cache.stats()['bytes'] == 20
+
+def test_outage_serves_stale_result_without_refreshing_it():
+    server, url = start_stub_server()
+    cache = EWGCache(':memory:', ttl=60)
+    try:
+        scraper = EWGScraper(site_url=url, rate=1000, cache=cache)
+        original = scraper.scrape_ingredient('methylparaben')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Age the cached pages and result past the TTL, then lose the site
+    with cache._lock:
+        cache._conn.execute('UPDATE pages SET fetched_at = fetched_at - 120')
+        cache._conn.execute('UPDATE results SET fetched_at = fetched_at - 120')
+    scraper = EWGScraper(site_url=url, rate=1000, cache=cache, max_retries=0)
+    assert scraper.scrape_ingredient('methylparaben') == original
+    data, fresh = cache.get_result('methylparaben')
+    assert data['last_updated'] == original['last_updated']
+    assert not fresh
+
+    # Nothing cached to fall back on
+    assert scraper.scrape_ingredient('oxybenzone') is None
+
+def test_results_are_bounded():
+    cache = EWGCache(':memory:', max_results=2)
+    cache.put_result('a', {'hazard_score': 8})
+    cache.put_result('b', {'hazard_score': 2})
+    assert cache.get_result('a')[0] is not None
+    cache.put_result('c', {'hazard_score': 6})
+    # 'b' was the least recently used result
+    assert cache.get_result('b') == (None, False)
+    assert set(cache.results()) == {'a', 'c'}
+    assert set(cache.results(min_hazard_score=7)) == {'a'}
+    assert cache.stats()['results'] == 2
+
+if __name__ == "__main__":
+    test_scrape_many_against_stub()
+    test_scrape_many_is_rate_limited()
+    test_cache_persists_and_revalidates()
+    test_cache_evicts_least_recently_used()
+    test_outage_serves_stale_result_without_refreshing_it()
+    test_results_are_bounded()
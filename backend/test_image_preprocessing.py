@@ -0,0 +1,49 @@
+import io
+from PIL import Image, ImageDraw
+from image_preprocessing import PRESETS, load_image, preprocess
+
+def make_label(size=(4000, 3000), orientation=None):
+    """A grey photo with a dark text-like block away from the edges."""
+    image = Image.new('RGB', size, (180, 170, 160))
+    draw = ImageDraw.Draw(image)
+    for row in range(10):
+        top = 1000 + row * 60
+        draw.rectangle((1500, top, 2500, top + 20), fill=(20, 20, 20))
+
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+def test_presets_downscale_and_binarize():
+    image = load_image(make_label())
+
+    assert preprocess(image, 'none').size == (4000, 3000)
+
+    fast = preprocess(image, 'fast')
+    print(f"fast: {fast.size} {fast.mode}")
+    assert max(fast.size) == PRESETS['fast']['max_side']
+    assert fast.mode == 'L'
+
+    binary = preprocess(image, 'default')
+    assert max(binary.size) == PRESETS['default']['max_side']
+    assert set(binary.getdata()) <= {0, 255}
+
+    label = preprocess(image, 'label')
+    print(f"label: {label.size}")
+    # Cropped to the text block plus its margin
+    assert label.width < binary.width / 2
+    assert label.height < binary.height / 2
+
+def test_exif_orientation_is_applied():
+    # Orientation 6 means the camera was rotated; upright is portrait
+    image = load_image(make_label(orientation=6))
+    assert image.size == (4000, 3000)
+    upright = preprocess(image, 'fast')
+    assert upright.height > upright.width
+
+if __name__ == "__main__":
+    test_presets_downscale_and_binarize()
+    test_exif_orientation_is_applied()
@@ -0,0 +1,117 @@
+from ingredient_scraper import IngredientAnalyzer
+from ingredient_index import NGramIndex
+from substring_similarity import SubstringScorer, common_substring_score
+
+TEST_DATABASE = {
+    'methylparaben': {
+        'score': 8,
+        'categories': ['preservatives', 'parabens'],
+        'concerns': ['endocrine disruption'],
+        'found_in': ['cosmetics'],
+        'alternative_names': ['methyl paraben', 'E218']
+    },
+    'sodium lauryl sulfate': {
+        'score': 6,
+        'categories': ['surfactants'],
+        'concerns': ['irritation'],
+        'found_in': ['shampoo'],
+        'alternative_names': ['sodium dodecyl sulfate']
+    },
+    'dibutyl phthalate': {
+        'score': 9,
+        'categories': ['plasticizers'],
+        'concerns': ['reproductive toxicity'],
+        'found_in': ['nail polish']
+    }
+}
+
+def make_analyzer():
+    analyzer = IngredientAnalyzer()
+    analyzer.harmful_ingredients = TEST_DATABASE
+    analyzer.build_index()
+    return analyzer
+
+def test_index_precomputes_name_forms():
+    analyzer = make_analyzer()
+    assert len(analyzer.index) == len(TEST_DATABASE)
+
+    entry = analyzer.index.entries[0]
+    assert entry.name == 'methylparaben'
+    assert entry.primary.normalized == 'methylparaben'
+    assert [alt.lower for alt in entry.alternatives] == ['methyl paraben', 'e218']
+    assert 'paraben' in entry.primary.tags
+    assert entry.has_family
+
+    # Alternative names point back at their ingredient
+    match, is_alternative = analyzer.index.exact[analyzer._normalize_ingredient_name('sodium dodecyl sulfate')]
+    assert match.name == 'sodium lauryl sulfate'
+    assert is_alternative
+
+def test_check_ingredient_uses_index():
+    analyzer = make_analyzer()
+
+    expected = {
+        'Methylparaben': 'methylparaben',
+        'methyl paraben': 'methylparaben',
+        'Sodium Dodecyl Sulfate': 'sodium lauryl sulfate',
+        'dibutylphthalate': 'dibutyl phthalate',
+        'water': None
+    }
+
+    for ingredient, matched_name in expected.items():
+        result = analyzer._check_ingredient(ingredient)
+        print(f"{ingredient}: {result['matched_name']}")
+        assert result['matched_name'] == matched_name
+        assert result['is_harmful'] == (matched_name is not None)
+
+def common_substring_total(str1, str2):
+    """Reference implementation: sum every matrix cell of length >= 3."""
+    matrix = [[0] * (len(str2) + 1) for _ in range(len(str1) + 1)]
+    total = 0
+    for i in range(len(str1)):
+        for j in range(len(str2)):
+            if str1[i] == str2[j]:
+                matrix[i + 1][j + 1] = matrix[i][j] + 1
+                if matrix[i + 1][j + 1] >= 3:
+                    total += matrix[i + 1][j + 1]
+    return total
+
+def test_substring_scorer_matches_matrix():
+    pairs = [
+        ('methylparaben', 'propylparaben'),
+        ('sodiumlaurylsulfate', 'sodiumlaurethsulfate'),
+        ('aaaaaa', 'aaaa'),
+        ('abcabcabc', 'cabcab'),
+        ('water', 'toluene'),
+        ('', 'glycerin')
+    ]
+
+    for str1, str2 in pairs:
+        total = SubstringScorer(str1).total(str2)
+        print(f"{str1} / {str2}: {total}")
+        assert total == common_substring_total(str1, str2)
+
+    scorer = SubstringScorer('butylparaben')
+    candidates = [str2 for _, str2 in pairs]
+    assert scorer.score_many(candidates) == [
+        common_substring_score('butylparaben', candidate) for candidate in candidates
+    ]
+
+def test_ngram_index_prunes_candidates():
+    index = NGramIndex(['methylparaben', 'propylparaben', 'toluene'], n=3)
+
+    candidates = dict(index.candidates('methylparabn'))
+    print(f"Candidates: {candidates}")
+    assert 2 not in candidates  # toluene shares no trigram
+    assert candidates[0] > candidates[1] > 0
+
+    analyzer = make_analyzer()
+    result = analyzer._check_partial_matches('methylparabn', 'methylparabn')
+    assert result['matched_name'] == 'methylparaben'
+    assert analyzer._check_partial_matches('xyz', 'xyz') is None
+
+if __name__ == "__main__":
+    test_index_precomputes_name_forms()
+    test_check_ingredient_uses_index()
+    test_substring_scorer_matches_matrix()
+    test_ngram_index_prunes_candidates()
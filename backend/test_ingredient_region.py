@@ -0,0 +1,77 @@
+import shlex
+from PIL import Image
+from ingredient_region import (INGREDIENT_CHARACTERS, INGREDIENTS_CONFIG, find_ingredients_region,
+                               ocr_ingredients)
+from ocr_backends import parse_config
+
+def word(text, left, top, block=1, par=1, line=1, width=None, height=20):
+    return {'text': text, 'left': left, 'top': top, 'width': width or 12 * len(text),
+            'height': height, 'conf': 90.0, 'block': block, 'par': par, 'line': line}
+
+# A label with a brand block, the ingredient list, directions below and a
+# side column next to the list
+LABEL_WORDS = [
+    word('GENTLE', 300, 50, block=1), word('CLEANSER', 400, 50, block=1),
+    word('Ingredients:', 100, 300, block=2, line=1), word('Water,', 260, 300, block=2, line=1),
+    word('Glycerin,', 100, 330, block=2, line=2), word('Triclosan', 220, 330, block=2, line=2),
+    word('Fragrance.', 100, 360, block=2, line=3),
+    word('Recyclable', 700, 300, block=3),
+    word('Directions:', 100, 420, block=4), word('apply', 240, 420, block=4)
+]
+
+class FakeBackend:
+    """Records OCR calls and answers image_to_data with fixed words."""
+
+    name = 'fake'
+
+    def __init__(self, words):
+        self.words = words
+        self.calls = []
+
+    def image_to_data(self, image, config=''):
+        self.calls.append(('data', image.size, config))
+        return self.words
+
+    def image_to_string(self, image, config=''):
+        self.calls.append(('string', image.size, config))
+        return 'text'
+
+def test_finds_ingredient_block():
+    left, top, right, bottom = find_ingredients_region(LABEL_WORDS, margin=0)
+    print(f"region: {(left, top, right, bottom)}")
+    assert (left, top) == (100, 300)
+    # Ends with the list: no directions below it, no side column
+    assert bottom == 380
+    assert right < 700
+
+    assert find_ingredients_region([word('GENTLE', 300, 50)]) is None
+
+def test_ocr_crops_to_region():
+    # Detection runs on a half-size copy; the crop is scaled back up
+    image = Image.new('L', (2000, 1000), 255)
+    backend = FakeBackend([dict(w, left=w['left'] // 2, top=w['top'] // 2,
+                                width=w['width'] // 2, height=w['height'] // 2)
+                           for w in LABEL_WORDS])
+    assert ocr_ingredients(image, backend) == 'text'
+    (_, detect_size, _), (_, crop_size, config) = backend.calls
+    assert detect_size == (1000, 500)
+    assert config == INGREDIENTS_CONFIG
+    assert crop_size[0] < 1400 and crop_size[1] < 200
+
+    # Without a heading the whole image is read with the fallback config
+    backend = FakeBackend([word('GENTLE', 300, 50)])
+    ocr_ingredients(image, backend, fallback_config='--psm 3')
+    assert backend.calls[-1] == ('string', (2000, 1000), '--psm 3')
+
+def test_ingredients_config_parses():
+    # pytesseract and the tesserocr backend both shlex.split the config
+    assert shlex.split(INGREDIENTS_CONFIG) == [
+        '--psm', '6', '-c', f'tessedit_char_whitelist={INGREDIENT_CHARACTERS}'
+    ]
+    assert parse_config(INGREDIENTS_CONFIG) == (6, {'tessedit_char_whitelist': INGREDIENT_CHARACTERS})
+    assert "'" in INGREDIENT_CHARACTERS
+
+if __name__ == "__main__":
+    test_finds_ingredient_block()
+    test_ocr_crops_to_region()
+    test_ingredients_config_parses()
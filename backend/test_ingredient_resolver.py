@@ -0,0 +1,48 @@
+from ingredient_scraper import IngredientAnalyzer
+from ingredient_resolver import IngredientResolver
+
+def test_resolver_caches_by_normalized_name():
+    analyzer = IngredientAnalyzer()
+    resolver = IngredientResolver(analyzer, maxsize=2, ttl=60)
+
+    first = resolver.resolve('Methylparaben')
+    print(f"Methylparaben: {first['source']} -> {first['match']['matched_name']}")
+    assert first['source'] == 'database'
+    assert first['info'] is analyzer.harmful_ingredients['methylparaben']
+
+    # Same normalized name hits the cache
+    assert resolver.resolve('  methylparaben ') is first
+    assert resolver.stats()['hits'] == 1
+    assert resolver.stats()['misses'] == 1
+
+    assert resolver.resolve('Aloe Vera')['source'] == 'known_safe'
+    assert resolver.resolve('water')['source'] == 'unknown'
+
+    # Bounded: the least recently used entry was evicted
+    stats = resolver.stats()
+    print(f"Cache stats: {stats}")
+    assert stats['size'] == 2
+    resolver.resolve('methylparaben')
+    assert resolver.stats()['misses'] == 4
+
+def test_analyzer_uses_shared_resolver():
+    analyzer = IngredientAnalyzer()
+    resolver = IngredientResolver(analyzer)
+    analyzer.resolver = resolver
+
+    analysis = analyzer.analyze_ingredients('Water, Triclosan, Water')
+    assert analysis['total_ingredients'] == 2
+    assert [i['matched_name'] for i in analysis['harmful_ingredients']] == ['triclosan']
+
+    analyzer.analyze_ingredients('Triclosan, Glycerin')
+    assert resolver.stats()['hits'] >= 1
+
+    # Verdicts come out one at a time, in label order
+    results = analyzer.iter_analysis('Triclosan, Glycerin')
+    ingredient, match = next(results)
+    assert (ingredient, match['is_harmful']) == ('Triclosan', True)
+    assert [i for i, _ in results] == ['Glycerin']
+
+if __name__ == "__main__":
+    test_resolver_caches_by_normalized_name()
+    test_analyzer_uses_shared_resolver()
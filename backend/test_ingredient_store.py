@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+from atomic_file import atomic_write, file_lock
+from ingredient_store import IngredientStore, VersionConflict, INGREDIENT_JSON_PATH
+
+def make_store():
+    return IngredientStore(':memory:')
+
+def test_seeded_snapshot_matches_json():
+    store = make_store()
+    with open(INGREDIENT_JSON_PATH, 'r') as f:
+        data = json.load(f)
+
+    harmful, safe, toxicity = store.snapshot()
+    print(f"Loaded {len(harmful)} harmful ingredients")
+    assert harmful == data['harmful_ingredients']
+    assert list(harmful) == list(data['harmful_ingredients'])  # order is kept
+    assert safe == data['safe_alternatives']
+    assert toxicity == data['toxicity_categories']
+
+def test_indexed_queries():
+    store = make_store()
+    assert store.get('  MethylParaben ')['score'] == 8
+    assert store.get('water') is None
+    assert 'methylparaben' in store.by_category('parabens')
+    assert all(info['score'] >= 8 for info in store.with_min_score(8).values())
+
+def test_upsert_and_save_are_incremental():
+    store = make_store()
+    names = list(store.harmful_ingredients())
+
+    info = store.get('methylparaben')
+    info['score'] = 9
+    info['categories'] = ['preservatives']
+    store.upsert('methylparaben', info)
+    assert store.get('methylparaben')['score'] == 9
+    assert 'methylparaben' not in store.by_category('parabens')
+    # Updated rows keep their position
+    assert list(store.harmful_ingredients()) == names
+
+    store.upsert('new chemical', {'score': 7, 'categories': ['solvents']})
+    assert list(store.harmful_ingredients())[-1] == 'new chemical'
+
+    harmful, safe, toxicity = store.snapshot()
+    del harmful['new chemical']
+    store.save(harmful, safe, toxicity)
+    assert store.get('new chemical') is None
+    assert list(store.harmful_ingredients()) == names
+
+def test_failed_transaction_rolls_back():
+    store = make_store()
+    try:
+        with store.transaction():
+            store.upsert('temporary', {'score': 1})
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    assert store.get('temporary') is None
+
+def test_failed_commit_rolls_back():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'test_commit.sqlite3')
+        store = IngredientStore(path, seed_path=None)
+        # A deferred foreign key is only checked at COMMIT, so COMMIT fails
+        store._conn.executescript(
+            'CREATE TABLE notes (ingredient_id INTEGER REFERENCES ingredients (id) '
+            'DEFERRABLE INITIALLY DEFERRED)'
+        )
+        try:
+            with store.transaction():
+                store.upsert('lost', {'score': 1})
+                store._conn.execute('INSERT INTO notes VALUES (12345)')
+            assert False, "expected the commit to fail"
+        except sqlite3.IntegrityError as e:
+            print(f"Commit failed: {e}")
+        assert not store._conn.in_transaction
+        assert store.get('lost') is None
+
+        # Later transactions commit on their own again
+        store.upsert('kept', {'score': 2})
+        assert IngredientStore(path, seed_path=None).get('kept') == {'score': 2}
+    finally:
+        shutil.rmtree(directory)
+
+def test_json_round_trip():
+    store = make_store()
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'test_export.json')
+        store.export_json(path)
+        other = IngredientStore(':memory:', seed_path=None)
+        assert other.is_empty()
+        other.import_json(path)
+        assert other.snapshot() == store.snapshot()
+    finally:
+        shutil.rmtree(directory)
+
+def test_version_counter_and_conflicts():
+    store = make_store()
+    version, harmful, safe, toxicity = store.versioned_snapshot()
+
+    # Saving identical data is not a change
+    store.save(harmful, safe, toxicity, expected_version=version)
+    assert store.version() == version
+
+    store.upsert('new chemical', {'score': 7})
+    assert store.version() == version + 1
+
+    # A writer working from the old version must not overwrite the upsert
+    try:
+        store.save(harmful, safe, toxicity, expected_version=version)
+        assert False, "expected a VersionConflict"
+    except VersionConflict as e:
+        print(f"Conflict: {e}")
+    assert store.get('new chemical') is not None
+
+def test_atomic_write_and_lock():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'test_atomic.json')
+        with atomic_write(path) as f:
+            f.write('old')
+        try:
+            with atomic_write(path) as f:
+                f.write('partial')
+                raise RuntimeError('crash mid-write')
+        except RuntimeError:
+            pass
+        with open(path) as f:
+            assert f.read() == 'old'
+        assert not [name for name in os.listdir(directory) if name.startswith('.test_atomic.json.')]
+
+        lock_path = path + '.lock'
+        with file_lock(lock_path) as acquired:
+            assert acquired
+            with file_lock(lock_path, blocking=False) as acquired_again:
+                assert not acquired_again
+    finally:
+        shutil.rmtree(directory)
+
+def test_atomic_write_keeps_file_mode():
+    directory = tempfile.mkdtemp()
+    try:
+        # A new file gets the same mode as one created with open()
+        reference = os.path.join(directory, 'reference')
+        open(reference, 'w').close()
+        path = os.path.join(directory, 'test_mode.json')
+        with atomic_write(path) as f:
+            f.write('new')
+        assert stat.S_IMODE(os.stat(path).st_mode) == stat.S_IMODE(os.stat(reference).st_mode)
+
+        # Replacing a file keeps its mode
+        os.chmod(path, 0o640)
+        with atomic_write(path) as f:
+            f.write('replaced')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_seeded_snapshot_matches_json()
+    test_indexed_queries()
+    test_upsert_and_save_are_incremental()
+    test_failed_transaction_rolls_back()
+    test_failed_commit_rolls_back()
+    test_json_round_trip()
+    test_version_counter_and_conflicts()
+    test_atomic_write_and_lock()
+    test_atomic_write_keeps_file_mode()
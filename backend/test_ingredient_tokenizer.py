@@ -0,0 +1,34 @@
+from benchmark_tokenizer import load_dumps, reference_extract
+from ingredient_tokenizer import extract_ingredients, iter_label_ingredients
+
+# Fragments that exercise each rule of the original filter
+EDGE_CASES = [
+    '', 'a', 'ab', '12', '--, ++, %%, -%, +1 (800) 555-0199',
+    'info@brand.com, www.brand, brand.com, http://brand, https',
+    '12 mill road, 4b, vitamin b3, water²',
+    'one two three four, one two three four five',
+    'sodium chloride, customer care, baker street, main ave, rodeo dr',
+    'vitamin e, aloe barbadensis leaf juice [aloe], ci 77891',
+    'Ingredients: AQUA (WATER), Glycerin;\nSodium\tBenzoate'
+]
+
+def test_matches_original_filter():
+    dumps = load_dumps()
+    assert dumps, "expected sample OCR dumps in ocr_samples/"
+    for text in dumps + EDGE_CASES:
+        assert extract_ingredients(text) == reference_extract(text), text
+
+    found = extract_ingredients(EDGE_CASES[-1])
+    print(f"found: {found}")
+    assert found == ['aqua', 'water', 'glycerin', 'sodium\tbenzoate']
+
+def test_label_pipeline_is_lazy_and_deduped():
+    ingredients = iter_label_ingredients('Water, Sodium\nBenzoate, water, ' + 'glycerin, ' * 10000)
+    # A generator: the first ingredients come out before the rest are filtered
+    assert next(ingredients) == 'water'
+    assert next(ingredients) == 'sodium benzoate'
+    assert list(ingredients) == ['glycerin']
+
+if __name__ == "__main__":
+    test_matches_original_filter()
+    test_label_pipeline_is_lazy_and_deduped()
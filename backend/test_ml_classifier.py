@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+from ingredient_store import IngredientStore
+from ml_classifier import IngredientMLClassifier
+
+SMALL_DATABASE = {
+    'methylparaben': {'score': 8, 'categories': ['parabens'], 'alternative_names': ['methyl paraben']},
+    'propylparaben': {'score': 8, 'categories': ['parabens'], 'alternative_names': ['propyl paraben']},
+    'triclosan': {'score': 9, 'categories': ['antimicrobials'], 'alternative_names': ['irgasan']},
+    'dibutyl phthalate': {'score': 9, 'categories': ['phthalates'], 'alternative_names': ['dbp']},
+    'sodium lauryl sulfate': {'score': 6, 'categories': ['sulfates'], 'alternative_names': ['sls']},
+    'formaldehyde': {'score': 10, 'categories': ['formaldehyde'], 'alternative_names': ['formalin']},
+    'lead acetate': {'score': 10, 'categories': ['heavy_metals'], 'alternative_names': []},
+    'toluene': {'score': 8, 'categories': ['solvents'], 'alternative_names': ['methylbenzene']}
+}
+
+def make_classifier(directory, store):
+    """A classifier on a small store that keeps its model files in directory."""
+    classifier = IngredientMLClassifier(store.harmful_ingredients(), {}, store=store)
+    classifier.model_path = directory
+    classifier.metadata_path = os.path.join(directory, 'metadata.json')
+    # One small forest keeps training to a second or two
+    classifier.param_grid = {'n_estimators': [20], 'max_depth': [10]}
+    return classifier
+
+def make_store():
+    store = IngredientStore(':memory:', seed_path=None)
+    store.upsert_many(SMALL_DATABASE)
+    return store
+
+def test_matching_fingerprint_loads_without_training():
+    directory = tempfile.mkdtemp()
+    try:
+        store = make_store()
+        classifier = make_classifier(directory, store)
+        assert not classifier.load()  # nothing saved yet
+        assert classifier.load_or_train()
+        assert os.path.exists(classifier.metadata_path)
+        assert classifier.model_fingerprint == classifier.fingerprint()
+
+        def fail():
+            raise AssertionError("load_or_train retrained a model with a matching fingerprint")
+
+        reloaded = make_classifier(directory, store)
+        reloaded.train = fail
+        assert reloaded.fingerprint() == classifier.fingerprint()
+        assert reloaded.load_or_train()
+        assert reloaded.model_fingerprint == classifier.model_fingerprint
+
+        ingredients = ['triclosan', 'water', 'butylparaben', 'jojoba oil']
+        print(f"predictions: {reloaded.predict_many(ingredients)}")
+        assert reloaded.predict_many(ingredients) == classifier.predict_many(ingredients)
+    finally:
+        shutil.rmtree(directory)
+
+def test_stale_artifacts_are_rejected():
+    directory = tempfile.mkdtemp()
+    try:
+        store = make_store()
+        assert make_classifier(directory, store).load_or_train()
+
+        store.upsert('benzophenone', {'score': 7, 'categories': ['uv_filters'],
+                                      'alternative_names': ['oxybenzone']})
+        stale = make_classifier(directory, store)
+        assert stale.fingerprint() != make_classifier(directory, make_store()).fingerprint()
+        assert not stale.load()
+        assert stale.classifier is None
+        assert stale.model_fingerprint is None
+
+        # Retraining replaces the stale artifacts with ones for the new data
+        assert stale.load_or_train()
+        assert make_classifier(directory, store).load()
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_matching_fingerprint_loads_without_training()
+    test_stale_artifacts_are_rejected()
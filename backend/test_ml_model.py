@@ -1,10 +1,23 @@
+import os
+import shutil
+import tempfile
 from ml_classifier import IngredientMLClassifier
 from tabulate import tabulate
 from collections import defaultdict
 
 def test_model():
+    # Train into a scratch directory, not the tracked models/ artifacts
+    directory = tempfile.mkdtemp()
+    try:
+        check_model(directory)
+    finally:
+        shutil.rmtree(directory)
+
+def check_model(model_path):
     # Initialize the classifier
     classifier = IngredientMLClassifier()
+    classifier.model_path = model_path
+    classifier.metadata_path = os.path.join(model_path, 'metadata.json')
     
     # Train the model
     print("Training model...")
@@ -0,0 +1,30 @@
+import ocr_backends
+from ocr_backends import PytesseractBackend, create_backend, parse_config
+
+def test_parse_config():
+    assert parse_config('') == (None, {})
+    psm, variables = parse_config('--psm 6 -c tessedit_char_whitelist="abc, ()"')
+    assert psm == 6
+    assert variables == {'tessedit_char_whitelist': 'abc, ()'}
+    assert parse_config('-cpreserve_interword_spaces=1') == (None, {'preserve_interword_spaces': '1'})
+
+def test_falls_back_to_pytesseract():
+    backend = create_backend('pytesseract')
+    assert isinstance(backend, PytesseractBackend)
+
+    if ocr_backends.tesserocr is None:
+        # Asking for tesserocr without it installed still gives a backend
+        assert isinstance(create_backend('tesserocr'), PytesseractBackend)
+        assert isinstance(create_backend('auto'), PytesseractBackend)
+    else:
+        print(f"auto backend: {create_backend('auto').name}")
+
+    try:
+        create_backend('unknown')
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_parse_config()
+    test_falls_back_to_pytesseract()
@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+from ocr_cache import OCRCache
+
+def test_key_depends_on_image_and_settings():
+    key = OCRCache.key(b'image', 'default')
+    assert key == OCRCache.key(b'image', 'default')
+    assert key != OCRCache.key(b'other image', 'default')
+    assert key != OCRCache.key(b'image', 'label')
+    assert key != OCRCache.key(b'image', 'default', '--psm 6')
+    assert key != OCRCache.key(b'image', 'default', mode='ingredients')
+    assert key != OCRCache.key(b'image', 'default', lang='deu')
+    backends = {OCRCache.key(b'image', 'default', backend=name) for name in ('pytesseract', 'tesserocr')}
+    assert len(backends) == 2 and key in backends
+
+def test_memory_and_disk_tiers():
+    directory = os.path.join(tempfile.mkdtemp(), 'test_ocr_cache')
+    try:
+        cache = OCRCache(maxsize=2, directory=directory)
+        key = OCRCache.key(b'label photo', 'default')
+        assert cache.get(key) is None
+        cache.set(key, 'water, glycerin')
+        assert cache.get(key) == 'water, glycerin'
+
+        # A new process only has the disk tier
+        restarted = OCRCache(maxsize=2, directory=directory)
+        assert restarted.get(key) == 'water, glycerin'
+        assert restarted.get(key) == 'water, glycerin'
+        stats = restarted.stats()
+        print(f"Stats: {stats}")
+        assert stats['disk']['hits'] == 1
+        assert stats['memory']['hits'] == 1
+        assert stats['hit_rate'] == 1.0
+    finally:
+        shutil.rmtree(os.path.dirname(directory))
+
+if __name__ == "__main__":
+    test_key_depends_on_image_and_settings()
+    test_memory_and_disk_tiers()
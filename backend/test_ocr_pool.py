@@ -0,0 +1,57 @@
+import time
+from ocr_pool import OCRPool, OCRBusy, OCRTimeout
+
+def fake_ocr(text, seconds=0.0):
+    """Stands in for tesseract so the pool can be tested without it."""
+    time.sleep(seconds)
+    return text.upper()
+
+def test_extract_runs_in_pool():
+    pool = OCRPool(max_workers=2, max_queue=2, timeout=10, func=fake_ocr)
+    try:
+        assert pool.extract('water, glycerin') == 'WATER, GLYCERIN'
+        stats = pool.stats()
+        print(f"Stats: {stats}")
+        assert stats['completed'] == 1
+        assert stats['in_flight'] == 0
+    finally:
+        pool.shutdown()
+
+def test_full_queue_is_rejected():
+    pool = OCRPool(max_workers=1, max_queue=1, timeout=10, func=fake_ocr)
+    try:
+        futures = [pool.submit('a', 0.5), pool.submit('b', 0.5)]
+        assert pool.stats()['queue_depth'] == 1
+        try:
+            pool.submit('c')
+            assert False, "expected OCRBusy"
+        except OCRBusy as e:
+            print(f"Rejected: {e}")
+            assert e.retry_after >= 1
+        assert [f.result() for f in futures] == ['A', 'B']
+        assert pool.stats()['rejected'] == 1
+
+        # Slots free up once jobs finish
+        assert pool.extract('d') == 'D'
+    finally:
+        pool.shutdown()
+
+def test_timeout():
+    pool = OCRPool(max_workers=1, max_queue=0, timeout=0.2, func=fake_ocr)
+    try:
+        try:
+            pool.extract('slow', 1.0)
+            assert False, "expected OCRTimeout"
+        except OCRTimeout:
+            pass
+        stats = pool.stats()
+        assert stats['timeouts'] == 1
+        # The timed out job still holds its worker until it finishes
+        assert stats['in_flight'] == 1
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    test_extract_runs_in_pool()
+    test_full_queue_is_rejected()
+    test_timeout()
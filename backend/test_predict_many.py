@@ -0,0 +1,38 @@
+from ml_classifier import IngredientMLClassifier
+from ingredient_api import load_database
+
+def test_predict_many_matches_predict():
+    harmful_ingredients, safe_alternatives, _ = load_database()
+    classifier = IngredientMLClassifier(harmful_ingredients, safe_alternatives)
+    assert classifier.load_or_train()
+
+    ingredients = [
+        'methylparaben',
+        'water',
+        'aloe vera',
+        'lead acetate',
+        'sodium lauryl sulfate',
+        'cetearyl alcohol',
+        'titanium dioxide',
+        'x',
+        ''
+    ]
+
+    batch = classifier.predict_many(ingredients)
+    assert len(batch) == len(ingredients)
+
+    for ingredient, result in zip(ingredients, batch):
+        print(f"{ingredient!r}: {result}")
+        assert result == classifier.predict(ingredient)
+
+    assert batch[-1] is None
+
+    # Chemical features are computed once; the model input must not change
+    names = ingredients[:-1]
+    X_additional, X_combined = classifier._transform(names)
+    assert (X_combined != classifier.features.transform(names)).nnz == 0
+    assert X_additional.shape == (len(names), len(classifier.feature_engine.feature_names))
+    assert classifier.predict_many([]) == []
+
+if __name__ == "__main__":
+    test_predict_many_matches_predict()
@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import tempfile
+from score_catalog import score_catalog
+
+PRODUCTS = [
+    ('p1', 'Water, Triclosan, Glycerin'),
+    ('p2', 'Aqua (Water), Glycerin, Methylparaben'),
+    ('p3', 'Water, Aloe Vera'),
+    ('p4', ''),
+    ('p5', 'TRICLOSAN, glycerin, Cetearyl Alcohol')
+]
+
+def read_scores(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+def test_scores_catalog_and_resumes():
+    directory = tempfile.mkdtemp()
+    try:
+        catalog = os.path.join(directory, 'catalog.csv')
+        with open(catalog, 'w') as f:
+            f.write('id,ingredients\n')
+            for product_id, ingredients in PRODUCTS:
+                f.write(f'{product_id},"{ingredients}"\n')
+        output = os.path.join(directory, 'scores.jsonl')
+
+        summary = score_catalog(catalog, output, workers=2, chunk_size=2, progress_interval=0)
+        print(f"summary: {summary}")
+        assert summary['rows'] == len(PRODUCTS)
+        # 11 listed ingredients, 7 distinct: each is scored once for the catalog
+        assert summary['unique_ingredients'] == 7
+
+        scores = read_scores(output)
+        assert [score['id'] for score in scores] == [product_id for product_id, _ in PRODUCTS]
+        assert [h['matched_name'] for h in scores[0]['harmful_ingredients']] == ['triclosan']
+        assert scores[3]['total_ingredients'] == 0
+        assert scores[4]['harmful_ingredients'][0]['ingredient'] == 'TRICLOSAN'
+
+        # Simulate a run interrupted after the first chunk
+        with open(output, 'r') as f:
+            first_chunk = f.readline() + f.readline()
+        with open(output, 'a') as f:
+            f.write('{"partial": ')
+        with open(output + '.checkpoint', 'r') as f:
+            checkpoint = json.load(f)
+        checkpoint.update(rows=2, output_bytes=len(first_chunk.encode('utf-8')))
+        with open(output + '.checkpoint', 'w') as f:
+            json.dump(checkpoint, f)
+
+        summary = score_catalog(catalog, output, workers=1, chunk_size=2, resume=True,
+                                progress_interval=0)
+        assert summary['rows_this_run'] == 3
+        assert read_scores(output) == scores
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    test_scores_catalog_and_resumes()
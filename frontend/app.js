@@ -20,8 +20,10 @@ async function analyzeProduct() {
         const formData = new FormData();
         formData.append('image', file);
 
+        // Ask for an NDJSON stream so verdicts can be shown as they arrive
         const response = await fetch(`${API_URL}/analyze-ingredients`, {
             method: 'POST',
+            headers: { 'Accept': 'application/x-ndjson, application/json;q=0.9' },
             body: formData
         });
 
@@ -30,9 +32,15 @@ async function analyzeProduct() {
             throw new Error(error.error || 'Failed to analyze ingredients');
         }
 
-        const data = await response.json();
+        let data;
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.includes('application/x-ndjson') && response.body) {
+            data = await readAnalysisStream(response, resultDiv, loadingDiv);
+        } else {
+            data = await response.json();
+        }
         
-        // Display results only once
+        // Display the full, sorted results once everything has arrived
         displayResults(data, resultDiv);
         
         // Show result container
@@ -46,6 +54,61 @@ async function analyzeProduct() {
     }
 }
 
+// Read an NDJSON analysis stream, rendering each ingredient card as soon as
+// its line arrives. Resolves to the same shape as the JSON response.
+async function readAnalysisStream(response, resultDiv, loadingDiv) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const data = { extracted_text: '', ingredients: [] };
+    let buffer = '';
+    let cardsDiv = null;
+
+    const handleEvent = (event) => {
+        if (event.event === 'text') {
+            data.extracted_text = event.extracted_text;
+            resultDiv.innerHTML = `
+                <div class="analysis-container">
+                    <div class="extracted-text-section">
+                        <h2>Extracted Ingredients</h2>
+                        <div class="text-content">${event.extracted_text}</div>
+                    </div>
+                    <div class="analysis-section">
+                        <h2>Ingredients Analysis</h2>
+                        <div class="ingredients-analysis"></div>
+                    </div>
+                </div>
+            `;
+            cardsDiv = resultDiv.querySelector('.ingredients-analysis');
+            resultDiv.style.display = 'block';
+        } else if (event.event === 'ingredient') {
+            data.ingredients.push(event.result);
+            loadingDiv.style.display = 'none';
+            if (cardsDiv) {
+                cardsDiv.insertAdjacentHTML('beforeend', generateIngredientCard(event.result));
+            }
+        } else if (event.event === 'error') {
+            throw new Error(event.error || 'Failed to analyze ingredients');
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+        if (done) break;
+    }
+    if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+    }
+
+    if (!data.ingredients.length) {
+        throw new Error('No ingredients found in image');
+    }
+    return data;
+}
+
 function displayResults(data, resultDiv) {
     let resultsHtml = '<div class="analysis-container">';
     